@@ -2,7 +2,7 @@ import React, { useMemo } from 'react';
 import { FormControl, InputLabel, Select, MenuItem } from '@mui/material';
 import { colors } from '../../config/colors';
 import { QuestionType, type VocabQuestion } from '../../types/quiz';
-import { detectAvailableFields, isQuestionTypeCompatible, isCompoundFormatCompatible } from '../../utils/fieldDetection';
+import { isQuestionTypeCompatible, isCompoundFormatCompatible } from '../../utils/fieldDetection';
 
 interface FieldAwareQuizFormatSelectorProps {
   value: {
@@ -12,7 +12,7 @@ interface FieldAwareQuizFormatSelectorProps {
   };
   onChange: (format: { input1: string; input2: string | undefined; output: string }) => void;
   allowMultipleInputs?: boolean;
-  vocabularyQuestions?: VocabQuestion[]; // Questions to analyze for field availability
+  availableFields?: (keyof VocabQuestion)[]; // Fields the book has values for (from the lesson index)
   showUnavailableOptions?: boolean; // Show unavailable options as disabled
 }
 
@@ -28,16 +28,16 @@ export const FieldAwareQuizFormatSelector: React.FC<FieldAwareQuizFormatSelector
   value,
   onChange,
   allowMultipleInputs = false,
-  vocabularyQuestions = [],
+  availableFields: bookFields,
   showUnavailableOptions = true
 }) => {
   const availableFields = useMemo(() => {
-    if (vocabularyQuestions.length === 0) {
-      // If no questions provided, assume all fields are available
+    if (!bookFields) {
+      // Not known (yet), assume all fields are available
       return new Set<keyof VocabQuestion>(['np1', 'jp_kanji', 'jp_rubi', 'japanese_question']);
     }
-    return detectAvailableFields(vocabularyQuestions);
-  }, [vocabularyQuestions]);
+    return new Set<keyof VocabQuestion>(bookFields);
+  }, [bookFields]);
 
 
   // Check if a format option is available
@@ -97,7 +97,7 @@ export const FieldAwareQuizFormatSelector: React.FC<FieldAwareQuizFormatSelector
   // renderOption function moved inline to select elements
 
   // Warning message if current combination is invalid
-  const showWarning = vocabularyQuestions.length > 0 && !isCurrentCombinationValid();
+  const showWarning = bookFields !== undefined && !isCurrentCombinationValid();
 
   return (
     <div className="md:col-span-2">
@@ -8,6 +8,7 @@ interface LessonRangeSelectorProps {
   onLessonStartChange: (value: number) => void;
   onLessonEndChange: (value: number) => void;
   disabled?: boolean;
+  kaRange?: { min: number; max: number }; // Lessons available in the selected book
   useStringState?: boolean; // For StudentWaitingRoom compatibility
   onStringChange?: (value: string, type: 'start' | 'end') => void;
 }
@@ -18,6 +19,7 @@ export const LessonRangeSelector: React.FC<LessonRangeSelectorProps> = ({
   onLessonStartChange,
   onLessonEndChange,
   disabled = false,
+  kaRange,
   useStringState = false,
   onStringChange
 }) => {
@@ -49,9 +51,10 @@ export const LessonRangeSelector: React.FC<LessonRangeSelectorProps> = ({
           type={useStringState ? "text" : "number"}
           inputProps={{ 
             inputMode: "numeric",
-            min: "1"
+            min: String(kaRange?.min ?? 1),
+            ...(kaRange ? { max: String(kaRange.max) } : {})
           }}
-          placeholder="1"
+          placeholder={String(kaRange?.min ?? 1)}
           value={lessonStart}
           onChange={(e) => handleNumberChange(e.target.value, 'start')}
           disabled={disabled}
@@ -84,9 +87,10 @@ export const LessonRangeSelector: React.FC<LessonRangeSelectorProps> = ({
           type={useStringState ? "text" : "number"}
           inputProps={{ 
             inputMode: "numeric",
-            min: "1"
+            min: String(kaRange?.min ?? 1),
+            ...(kaRange ? { max: String(kaRange.max) } : {})
           }}
-          placeholder="5"
+          placeholder={String(kaRange?.max ?? 5)}
           value={lessonEnd}
           onChange={(e) => handleNumberChange(e.target.value, 'end')}
           disabled={disabled}
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useRef, useState } from 'react';
 import { StudentWaitingRoom } from './StudentWaitingRoom';
 import { StudentQuiz } from './StudentQuiz';
 import { StudentResult } from './StudentResult';
@@ -9,12 +9,13 @@ import type { QuizConfig, StudentMode } from '../../types/quiz';
 import { LoadingScreen } from '../common/LoadingScreen';
 
 interface QuizData {
+  id?: string; // Room questions only; used to submit answers
   question: string;
   options: string[];
-  correctAnswer: string;
+  correctAnswer: string; // Empty for room questions until the server has graded them
 }
 
-type StudentState = 'waiting' | 'loading' | 'quiz' | 'result' | 'error';
+type StudentState = 'waiting' | 'loading' | 'quiz' | 'submitting' | 'result' | 'error';
 
 interface StudentContainerProps {
   roomCodeFromUrl?: string;
@@ -24,12 +25,17 @@ export const StudentContainer: React.FC<StudentContainerProps> = ({ roomCodeFrom
   const [state, setState] = useState<StudentState>('waiting');
   const [studentName, setStudentName] = useState('');
   const [mode, setMode] = useState<StudentMode>('study');
-  const [, setRoomCode] = useState('');
+  const [roomCode, setRoomCode] = useState('');
   const [quizData, setQuizData] = useState<QuizData[]>([]);
   const [originalQuizData, setOriginalQuizData] = useState<QuizData[]>([]);
   const [currentScore, setCurrentScore] = useState(0);
   const [totalQuestions, setTotalQuestions] = useState(0);
   const [error, setError] = useState<string | null>(null);
+  // Classroom mode: answers of the first attempt (questionId -> option), submitted once for grading
+  const roomAnswersRef = useRef<Record<string, string> | null>(null);
+  const [submitError, setSubmitError] = useState<string | null>(null);
+  // Classroom mode: the room was fetched without correct answers, so the quiz cannot grade locally
+  const [answersHidden, setAnswersHidden] = useState(false);
 
   // Utility function to shuffle array
   const shuffleArray = <T,>(array: T[]): T[] => {
@@ -56,6 +62,7 @@ export const StudentContainer: React.FC<StudentContainerProps> = ({ roomCodeFrom
     setStudentName(name);
     setMode('study');
     setError(null);
+    setAnswersHidden(false);
 
     try {
       // Fetch questions from API based on config
@@ -104,8 +111,8 @@ export const StudentContainer: React.FC<StudentContainerProps> = ({ roomCodeFrom
     setError(null);
 
     try {
-      // Get room data from DynamoDB
-      const roomResponse = await roomCodeService.getRoom(code);
+      // Get room data from DynamoDB; correct answers stay on the server, which grades the submission
+      const roomResponse = await roomCodeService.getRoom(code, undefined, 'student', true);
       const room = roomResponse.room;
 
       // Join the room
@@ -118,11 +125,15 @@ export const StudentContainer: React.FC<StudentContainerProps> = ({ roomCodeFrom
 
       // Use the pre-generated questions from the room
       const convertedQuizData = room.questions.map(question => ({
+        id: question.id,
         question: question.questionText,
         options: question.options,
-        correctAnswer: question.correctAnswer
+        correctAnswer: ''
       }));
 
+      roomAnswersRef.current = {};
+      setSubmitError(null);
+      setAnswersHidden(true);
       setOriginalQuizData(convertedQuizData);
       setQuizData(convertedQuizData);
       setTotalQuestions(convertedQuizData.length);
@@ -135,7 +146,42 @@ export const StudentContainer: React.FC<StudentContainerProps> = ({ roomCodeFrom
     }
   };
 
-  const handleQuizComplete = (score: number, total: number) => {
+  const handleAnswer = (questionIndex: number, option: string) => {
+    const questionId = quizData[questionIndex]?.id;
+    // Keep the first answer to each question; a restart must not overwrite it
+    if (roomAnswersRef.current && questionId && !(questionId in roomAnswersRef.current)) {
+      roomAnswersRef.current[questionId] = option;
+    }
+  };
+
+  const handleQuizComplete = async (score: number, total: number) => {
+    // Classroom mode: the server grades the first attempt, updates the room's results and returns the score
+    const answers = roomAnswersRef.current;
+    if (mode === 'classroom' && answers) {
+      roomAnswersRef.current = null;
+      setState('submitting');
+      try {
+        const result = await roomCodeService.submitAnswers(
+          roomCode,
+          studentName,
+          Object.entries(answers).map(([questionId, answer]) => ({ questionId, answer }))
+        );
+        score = result.score;
+        total = result.totalQuestions;
+
+        // Now that the answers are known, retries can be graded locally with feedback
+        const correctAnswers = new Map(result.results.map(r => [r.questionId, r.correctAnswer]));
+        setOriginalQuizData(originalQuizData.map(question => ({
+          ...question,
+          correctAnswer: (question.id && correctAnswers.get(question.id)) || question.correctAnswer
+        })));
+        setAnswersHidden(false);
+      } catch (err) {
+        console.error('Failed to submit answers:', err);
+        setSubmitError('回答を先生に送信できませんでした。先生に知らせてください。');
+      }
+    }
+
     setCurrentScore(score);
     setTotalQuestions(total);
     setState('result');
@@ -167,9 +213,14 @@ export const StudentContainer: React.FC<StudentContainerProps> = ({ roomCodeFrom
           <StudentQuiz
             quizData={quizData}
             onQuizComplete={handleQuizComplete}
+            onAnswer={handleAnswer}
+            showFeedback={!answersHidden}
           />
         );
 
+      case 'submitting':
+        return <LoadingScreen message="採点中..." subMessage="回答を先生に送信しています" />;
+
       case 'result':
         return (
           <StudentResult
@@ -177,6 +228,7 @@ export const StudentContainer: React.FC<StudentContainerProps> = ({ roomCodeFrom
             totalQuestions={totalQuestions}
             studentName={studentName}
             onRestart={handleRestart}
+            submitError={submitError}
           />
         );
 
@@ -11,11 +11,15 @@ interface QuizData {
 interface StudentQuizProps {
   quizData: QuizData[];
   onQuizComplete: (score: number, totalQuestions: number) => void;
+  onAnswer?: (questionIndex: number, option: string) => void;
+  showFeedback?: boolean; // false: answers are graded by the server, so no right/wrong feedback here
 }
 
 export const StudentQuiz: React.FC<StudentQuizProps> = ({ 
   quizData, 
   onQuizComplete, 
+  onAnswer,
+  showFeedback = true,
 }) => {
   const [currentQuestionIndex, setCurrentQuestionIndex] = useState(0);
   const [score, setScore] = useState(0);
@@ -146,6 +150,26 @@ export const StudentQuiz: React.FC<StudentQuizProps> = ({
       setTappedOption(null);
     }, 150);
     
+    onAnswer?.(currentQuestionIndex, option);
+
+    if (!showFeedback) {
+      // 正解は端末にないので、選択だけ記録して次の問題へ
+      if (navigator.vibrate) {
+        navigator.vibrate(50);
+      }
+      setTimeout(() => {
+        if (currentQuestionIndex < quizData.length - 1) {
+          setCurrentQuestionIndex(currentQuestionIndex + 1);
+          setSelectedOption(null);
+          setTappedOption(null);
+          setTimeRemaining(30);
+        } else {
+          onQuizComplete(0, quizData.length);
+        }
+      }, 600);
+      return;
+    }
+
     const isCorrect = option === quizData[currentQuestionIndex].correctAnswer;
     if (isCorrect) {
       setScore(score + 1);
@@ -186,7 +210,7 @@ export const StudentQuiz: React.FC<StudentQuizProps> = ({
       setSelectedOption('__timeout__'); // Special marker for timeout
       
       // Play incorrect sound for timeout
-      if (sounds && userInteracted) {
+      if (sounds && userInteracted && showFeedback) {
         playSound(sounds.incorrect, 'incorrect');
       }
       
@@ -214,7 +238,7 @@ export const StudentQuiz: React.FC<StudentQuizProps> = ({
     }, 1000);
     
     return () => clearTimeout(timer);
-  }, [timeRemaining, selectedOption, currentQuestionIndex, quizData, score, sounds, userInteracted]);
+  }, [timeRemaining, selectedOption, currentQuestionIndex, quizData, score, sounds, userInteracted, showFeedback]);
 
   if (quizData.length === 0) {
     return (
@@ -316,7 +340,34 @@ export const StudentQuiz: React.FC<StudentQuizProps> = ({
                 // Determine final style based on current state
                 if (selectedOption) {
                   // Answer has been selected - show feedback
-                  if (option === currentQuestion.correctAnswer) {
+                  if (!showFeedback && option === selectedOption) {
+                    // Graded later by the server: just mark the choice
+                    return (
+                      <Button
+                        key={`selected-${currentQuestionIndex}-${index}`}
+                        variant="contained"
+                        disabled={true}
+                        sx={{
+                          backgroundColor: '#DBEAFE',
+                          color: '#1F2937',
+                          border: '2px solid #93C5FD',
+                          borderRadius: '12px',
+                          minHeight: { xs: '60px', md: '100px' },
+                          fontSize: { xs: '18px', md: '20px' },
+                          fontWeight: 'medium',
+                          textTransform: 'none',
+                          width: '100%',
+                          '&.Mui-disabled': {
+                            backgroundColor: '#DBEAFE',
+                            color: '#1F2937',
+                            border: '2px solid #93C5FD',
+                          }
+                        }}
+                      >
+                        {option}
+                      </Button>
+                    );
+                  } else if (showFeedback && option === currentQuestion.correctAnswer) {
                     // This is the correct answer
                     return (
                       <Button
@@ -352,7 +403,7 @@ export const StudentQuiz: React.FC<StudentQuizProps> = ({
                         <span>{option}</span>
                       </Button>
                     );
-                  } else if (option === selectedOption) {
+                  } else if (showFeedback && option === selectedOption) {
                     // This was the selected (incorrect) answer
                     return (
                       <Button
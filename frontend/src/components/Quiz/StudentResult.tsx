@@ -8,13 +8,15 @@ interface StudentResultProps {
   totalQuestions: number;
   studentName: string;
   onRestart: () => void;
+  submitError?: string | null; // Classroom mode: the answers could not be sent to the teacher
 }
 
 export const StudentResult: React.FC<StudentResultProps> = ({ 
   score, 
   totalQuestions, 
   studentName, 
-  onRestart
+  onRestart,
+  submitError
 }) => {
   const [personalBest, setPersonalBest] = useState<number>(0);
   const [isNewRecord, setIsNewRecord] = useState(false);
@@ -224,6 +226,12 @@ export const StudentResult: React.FC<StudentResultProps> = ({
             <p className="text-base md:text-lg text-gray-600">{studentName}さん、{getEndingMessage()}！</p>
           </div>
 
+          {submitError && (
+            <div className="bg-red-50 border border-red-200 text-red-700 rounded-2xl p-3 md:p-4 mb-4 md:mb-8 text-sm md:text-base">
+              ⚠️ {submitError}
+            </div>
+          )}
+
           {/* Current Score */}
           <div className={`bg-gradient-to-r ${getScoreColor()} rounded-2xl p-4 md:p-8 text-white mb-4 md:mb-8`}>
             <div className="text-5xl md:text-6xl font-bold mb-1 md:mb-2">{percentage}%</div>
@@ -39,7 +39,7 @@ export const StudentWaitingRoom: React.FC<StudentWaitingRoomProps> = ({ onStartQ
     output: '漢字'
   });
   const [isLoading, setIsLoading] = useState(true);
-  const [vocabularyQuestions, setVocabularyQuestions] = useState<VocabQuestion[]>([]);
+  const [availableFields, setAvailableFields] = useState<(keyof VocabQuestion)[] | undefined>(undefined);
 
   // Set classroom mode when room code is provided from URL
   useEffect(() => {
@@ -68,19 +68,19 @@ export const StudentWaitingRoom: React.FC<StudentWaitingRoomProps> = ({ onStartQ
 
   useEffect(() => {
     if (selectedBookId && books.length > 0) {
-      loadVocabularyQuestions(selectedBookId);
+      loadAvailableFields(selectedBookId);
     }
   }, [selectedBookId, books]);
 
-  const loadVocabularyQuestions = async (bookId: number) => {
+  const loadAvailableFields = async (bookId: number) => {
     try {
-      // Load a sample of questions to analyze field availability
-      const response = await vocabService.getQuestions(bookId, 20, 0);
-      setVocabularyQuestions(response.questions);
+      // The lesson index carries the fields the book has values for; no questions are downloaded
+      const response = await vocabService.getLessons(bookId);
+      setAvailableFields(response.available_fields);
     } catch (err) {
-      console.error('Failed to load vocabulary questions for field analysis:', err);
+      console.error('Failed to load lesson index for field analysis:', err);
       // Don't show error to user as this is for field detection only
-      setVocabularyQuestions([]);
+      setAvailableFields(undefined);
     }
   };
 
@@ -122,7 +122,7 @@ export const StudentWaitingRoom: React.FC<StudentWaitingRoomProps> = ({ onStartQ
 
   const handleRoomCodeChange = (e: React.ChangeEvent<HTMLInputElement>) => {
     const value = e.target.value.toUpperCase().replace(/[^A-Z0-9]/g, '');
-    if (value.length <= 6) {
+    if (value.length <= 12) {
       setRoomCode(value);
     }
   };
@@ -271,7 +271,7 @@ export const StudentWaitingRoom: React.FC<StudentWaitingRoomProps> = ({ onStartQ
                   value={quizFormat}
                   onChange={handleFormatChange}
                   allowMultipleInputs={true}
-                  vocabularyQuestions={vocabularyQuestions}
+                  availableFields={availableFields}
                 />
               </>
             )}
@@ -29,7 +29,8 @@ export const TeacherConfig: React.FC<TeacherConfigProps> = ({ onConfigSubmit })
   });
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
-  const [vocabularyQuestions, setVocabularyQuestions] = useState<VocabQuestion[]>([]);
+  const [availableFields, setAvailableFields] = useState<(keyof VocabQuestion)[] | undefined>(undefined);
+  const [kaRange, setKaRange] = useState<{ min: number; max: number } | undefined>(undefined);
 
 
   // Update selectedQuestionType when format changes
@@ -45,7 +46,7 @@ export const TeacherConfig: React.FC<TeacherConfigProps> = ({ onConfigSubmit })
 
   useEffect(() => {
     if (selectedBookId) {
-      loadVocabularyQuestions(selectedBookId);
+      loadLessonIndex(selectedBookId);
     }
   }, [selectedBookId]);
 
@@ -67,19 +68,20 @@ export const TeacherConfig: React.FC<TeacherConfigProps> = ({ onConfigSubmit })
     }
   };
 
-  const loadVocabularyQuestions = async (bookId: number) => {
+  // One lesson index request gives both the lesson range and the fields the book has values for
+  const loadLessonIndex = async (bookId: number) => {
     try {
-      // Load a sample of questions to analyze field availability
-      const response = await vocabService.getQuestions(bookId, 20, 0);
-      setVocabularyQuestions(response.questions);
+      const { min_ka, max_ka, available_fields } = await vocabService.getLessons(bookId);
+      setKaRange({ min: min_ka ?? 1, max: max_ka ?? 1 });
+      setAvailableFields(available_fields);
     } catch (err) {
-      console.error('Failed to load vocabulary questions for field analysis:', err);
-      // Don't show error to user as this is for field detection only
-      setVocabularyQuestions([]);
+      console.error('Failed to load lesson index:', err);
+      // Don't show error to user; the pickers fall back to their defaults
+      setKaRange(undefined);
+      setAvailableFields(undefined);
     }
   };
 
-
   const handleSubmit = (e: React.FormEvent) => {
     e.preventDefault();
     setError(null);
@@ -168,6 +170,7 @@ export const TeacherConfig: React.FC<TeacherConfigProps> = ({ onConfigSubmit })
           <LessonRangeSelector
             lessonStart={lessonStart}
             lessonEnd={lessonEnd}
+            kaRange={kaRange}
             onLessonStartChange={(value) => {
               setLessonStart(value);
               setError(null);
@@ -190,7 +193,7 @@ export const TeacherConfig: React.FC<TeacherConfigProps> = ({ onConfigSubmit })
             value={quizFormat}
             onChange={handleFormatChange}
             allowMultipleInputs={true}
-            vocabularyQuestions={vocabularyQuestions}
+            availableFields={availableFields}
           />
         </div>
 
@@ -40,6 +40,10 @@ export const vocabApi = {
       offset: offset.toString() 
     }),
   
+  // Get per-lesson question counts of a book (no questions)
+  getLessons: (bookId: number) =>
+    buildApiUrl('vocab', { book_id: bookId.toString(), lessons: '1' }),
+  
   // Create/Update endpoints (for POST/PUT requests)
   vocab: () => `${API_CONFIG.baseUrl}${API_CONFIG.endpoints.vocab}`,
   migrate: () => `${API_CONFIG.baseUrl}${API_CONFIG.endpoints.migrate}`,
@@ -79,6 +83,20 @@ export interface BooksResponse {
   limit: number;
 }
 
+export interface VocabLesson {
+  ka: number;
+  question_count: number;
+}
+
+export interface LessonsResponse {
+  book: VocabBook;
+  lessons: VocabLesson[];
+  min_ka: number | null;
+  max_ka: number | null;
+  total_questions: number;
+  available_fields: (keyof VocabQuestion)[]; // Fields with non-empty values, for the quiz format picker
+}
+
 export interface QuestionsResponse {
   book: VocabBook;
   questions: VocabQuestion[];
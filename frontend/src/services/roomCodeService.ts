@@ -1,4 +1,13 @@
-import type { CreateRoomResponse, GetRoomResponse, QuizConfig, QuizQuestion } from '../types/quiz';
+import type {
+  CreateRoomResponse,
+  GetRoomResponse,
+  ListRoomsResponse,
+  QuizConfig,
+  QuizAnswer,
+  QuizQuestion,
+  RoomsStatsResponse,
+  SubmitAnswersResponse,
+} from '../types/quiz';
 import { API_CONFIG } from '../config/api';
 
 /**
@@ -38,10 +47,22 @@ class RoomCodeService {
   }
 
   /**
-   * Get quiz room by room code
+   * Get quiz room by room code (all questions, or only the given page of questions).
+   * The student view may be served from a server-side cache a few seconds old, and can
+   * leave out correctAnswer (hideAnswers) when answers are graded by submitAnswers.
    */
-  async getRoom(roomCode: string): Promise<GetRoomResponse> {
-    const response = await fetch(`${this.baseUrl}/room/${roomCode}`, {
+  async getRoom(
+    roomCode: string,
+    page?: number,
+    view?: 'student',
+    hideAnswers: boolean = false
+  ): Promise<GetRoomResponse> {
+    const params = new URLSearchParams();
+    if (page !== undefined) params.set('page', String(page));
+    if (view) params.set('view', view);
+    if (view && hideAnswers) params.set('hideAnswers', '1');
+    const query = params.toString() ? `?${params.toString()}` : '';
+    const response = await fetch(`${this.baseUrl}/room/${roomCode}${query}`, {
       method: 'GET',
       headers: {
         'Content-Type': 'application/json',
@@ -59,6 +80,28 @@ class RoomCodeService {
     return response.json();
   }
 
+  /**
+   * List the live rooms a teacher created, newest first (one page; pass nextToken for the next)
+   */
+  async listRooms(createdBy: string, nextToken?: string | null, limit?: number): Promise<ListRoomsResponse> {
+    const params = new URLSearchParams({ createdBy });
+    if (nextToken) params.set('nextToken', nextToken);
+    if (limit !== undefined) params.set('limit', String(limit));
+    const response = await fetch(`${this.baseUrl}/rooms?${params.toString()}`, {
+      method: 'GET',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+    });
+
+    if (!response.ok) {
+      const error = await response.text();
+      throw new Error(`Failed to list rooms: ${error}`);
+    }
+
+    return response.json();
+  }
+
   /**
    * Join a room (add student to room)
    */
@@ -82,12 +125,45 @@ class RoomCodeService {
     }
   }
 
+  /**
+   * Submit a student's answers (once per student); the server grades them and updates the room's results
+   */
+  async submitAnswers(roomCode: string, studentName: string, answers: QuizAnswer[]): Promise<SubmitAnswersResponse> {
+    const response = await fetch(`${this.baseUrl}/room/${roomCode}/answers`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({
+        studentName,
+        answers,
+      }),
+    });
+
+    if (!response.ok) {
+      if (response.status === 404) {
+        throw new Error('Room not found or expired');
+      }
+      const error = await response.text();
+      throw new Error(`Failed to submit answers: ${error}`);
+    }
+
+    return response.json();
+  }
+
   /**
    * Get room statistics
    */
   async getRoomStats(roomCode: string): Promise<{
     studentsCount: number;
     studentsJoined: string[];
+    scores?: Record<string, { score: number; answered: number }>;
+    answers?: {
+      submissions: number;
+      answered: number;
+      correct: number;
+      questions: Record<string, { attempts: number; correct: number }>;
+    };
     expiresAt: string;
   }> {
     const response = await fetch(`${this.baseUrl}/room/${roomCode}/stats`, {
@@ -108,6 +184,28 @@ class RoomCodeService {
     return response.json();
   }
 
+  /**
+   * Get statistics of many rooms in one request (up to 100 room codes)
+   */
+  async getRoomsStats(roomCodes: string[]): Promise<RoomsStatsResponse> {
+    const response = await fetch(`${this.baseUrl}/rooms/stats`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({
+        roomCodes,
+      }),
+    });
+
+    if (!response.ok) {
+      const error = await response.text();
+      throw new Error(`Failed to get rooms stats: ${error}`);
+    }
+
+    return response.json();
+  }
+
   /**
    * Delete/close a room (for teachers)
    */
@@ -132,8 +230,9 @@ class RoomCodeService {
    * Validate room code format
    */
   isValidRoomCode(roomCode: string): boolean {
-    // Room codes should be 6 characters, alphanumeric
-    return /^[A-Z0-9]{6}$/.test(roomCode);
+    // Room codes are 6 alphanumeric characters by default; the server can be configured
+    // to issue longer or checksummed codes (up to 12 characters)
+    return /^[A-Z0-9]{6,12}$/.test(roomCode);
   }
 
   /**
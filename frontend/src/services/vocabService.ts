@@ -1,4 +1,4 @@
-import { vocabApi, type BooksResponse, type QuestionsResponse } from '../config/api';
+import { vocabApi, type BooksResponse, type LessonsResponse, type QuestionsResponse } from '../config/api';
 
 // Generic API call function
 async function apiCall<T>(url: string, options?: RequestInit): Promise<T> {
@@ -58,6 +58,13 @@ export const vocabService = {
     return apiCall<QuestionsResponse>(url);
   },
 
+  // Get per-lesson question counts, lesson range and usable fields of a book
+  // (a few hundred bytes instead of every question)
+  async getLessons(bookId: number): Promise<LessonsResponse> {
+    const url = vocabApi.getLessons(bookId);
+    return apiCall<LessonsResponse>(url);
+  },
+
   // Create a new vocabulary book
   async createBook(bookData: {
     name: string;
@@ -129,6 +136,52 @@ export const vocabService = {
     });
   },
 
+  // Copy a book (optionally only lessons ka_from..ka_to) in one server-side operation
+  async cloneBook(sourceBookId: number, options: {
+    name?: string;
+    description?: string;
+    level?: string;
+    ka_from?: number;
+    ka_to?: number;
+  } = {}) {
+    return apiCall(vocabApi.vocab(), {
+      method: 'POST',
+      body: JSON.stringify({
+        action: 'clone_book',
+        data: { source_book_id: sourceBookId, ...options },
+      }),
+    });
+  },
+
+  // Move all questions of the source books into the target book
+  async mergeBooks(targetBookId: number, sourceBookIds: number[], options: {
+    append_lessons?: boolean;
+    delete_sources?: boolean;
+  } = {}) {
+    return apiCall(vocabApi.vocab(), {
+      method: 'PUT',
+      body: JSON.stringify({
+        action: 'merge_books',
+        data: { target_book_id: targetBookId, source_book_ids: sourceBookIds, ...options },
+      }),
+    });
+  },
+
+  // Shift lessons in a range by `shift`, or renumber them consecutively when no shift is given
+  async renumberLessons(bookId: number, options: {
+    ka_from?: number;
+    ka_to?: number;
+    shift?: number;
+  } = {}) {
+    return apiCall(vocabApi.vocab(), {
+      method: 'PUT',
+      body: JSON.stringify({
+        action: 'renumber_lessons',
+        data: { book_id: bookId, ...options },
+      }),
+    });
+  },
+
   // Run database migrations
   async runMigration(action: 'create_tables' | 'check_tables' = 'create_tables') {
     return apiCall(vocabApi.migrate(), {
@@ -346,7 +346,10 @@ export interface QuizRoom {
   createdAt: string;
   expiresAt: string;
   createdBy: string; // "guest" for non-authenticated users
-  studentsJoined: string[];
+  studentsCount: number; // The roster itself comes from getRoomStats
+  questionCount?: number;
+  questionPages?: number; // Questions are stored in pages; getRoom(code, page) fetches one
+  questionPage?: number; // Set when only one page of questions was requested
 }
 
 // Room code API responses
@@ -359,6 +362,38 @@ export interface GetRoomResponse {
   room: QuizRoom;
 }
 
+export interface RoomSummary {
+  roomCode: string;
+  config: QuizConfig;
+  createdAt: string;
+  expiresAt: string;
+  studentsCount?: number;
+  questionCount?: number;
+}
+
+export interface ListRoomsResponse {
+  rooms: RoomSummary[];
+  nextToken: string | null; // Pass back to listRooms for the next page
+}
+
+export interface QuizAnswer {
+  questionId: string;
+  answer: string;
+}
+
+export interface SubmitAnswersResponse {
+  score: number;
+  answered: number;
+  totalQuestions: number;
+  results: { questionId: string; correct: boolean; correctAnswer: string }[];
+}
+
+export interface RoomsStatsResponse {
+  rooms: Record<string, { studentsCount: number; expiresAt: string }>;
+  notFound: string[]; // Missing or expired
+  unprocessed: string[]; // Throttled; ask again for these
+}
+
 // Student modes
 export type StudentMode = 'study' | 'classroom';
 
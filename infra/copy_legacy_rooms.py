@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+One-off copy of the rooms still live in the legacy single-item table (VocabApp-QuizRooms-<env>)
+into the per-room partitions of VocabApp-QuizRoomItems-<env>, under the same room codes so links
+already handed out keep working. Run it once right after deploying the partitioned layout; the
+legacy table can be removed from the stack once its last room has expired.
+
+Each room becomes a metadata item and its question chunks (written together, only if the code is
+still free, so re-running skips rooms already copied) plus one roster item per joined student.
+
+Usage:
+    python copy_legacy_rooms.py --env dev --dry-run
+    python copy_legacy_rooms.py --env prod
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOMS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lambda', 'rooms')
+
+
+def legacy_rooms(client, table_name):
+    """Items of the legacy table, page by page"""
+    paginator = client.get_paginator('scan')
+    for page in paginator.paginate(TableName=table_name):
+        yield from page.get('Items', [])
+
+
+def copy_room(room_utils, room):
+    """Write one legacy room in the new layout; returns 'copied', 'exists' or 'too_large'"""
+    questions = room.get('questions', [])
+    students = room.get('studentsJoined', [])
+    chunks = [
+        questions[i:i + room_utils.QUESTIONS_PER_CHUNK]
+        for i in range(0, len(questions), room_utils.QUESTIONS_PER_CHUNK)
+    ]
+    if 1 + len(chunks) > room_utils.MAX_TRANSACT_ITEMS:
+        return 'too_large'
+
+    room_code = room['roomCode']
+    items = [{
+        **room_utils.room_key(room_code),
+        'config': room.get('config', {}),
+        'createdAt': room.get('createdAt'),
+        'expiresAt': room.get('expiresAt'),
+        'createdBy': room.get('createdBy', 'guest'),
+        'studentsCount': len(students),
+        'questionCount': len(questions),
+        'questionPages': len(chunks),
+        'ttl': room['ttl']
+    }] + [
+        {
+            **room_utils.room_key(room_code, room_utils.question_chunk_sk(page)),
+            **room_utils.encode_question_chunk(chunk),
+            'ttl': room['ttl']
+        }
+        for page, chunk in enumerate(chunks)
+    ]
+    client = room_utils.table.meta.client
+    try:
+        client.transact_write_items(TransactItems=[
+            {
+                'Put': {
+                    'TableName': room_utils.table_name,
+                    'Item': {name: room_utils._serializer.serialize(value) for name, value in item.items()},
+                    'ConditionExpression': 'attribute_not_exists(roomCode)'
+                }
+            }
+            for item in items
+        ])
+    except client.exceptions.TransactionCanceledException as e:
+        reasons = e.response.get('CancellationReasons', [])
+        if any(reason.get('Code') == 'ConditionalCheckFailed' for reason in reasons):
+            return 'exists'
+        raise
+
+    # The legacy roster kept names only; the room's creation time stands in for the join time
+    with room_utils.table.batch_writer() as batch:
+        for student_name in students:
+            batch.put_item(Item={
+                **room_utils.room_key(room_code, room_utils.student_sk(student_name)),
+                'studentName': student_name,
+                'joinedAt': room.get('createdAt'),
+                'ttl': room['ttl']
+            })
+    return 'copied'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Copy live rooms from the legacy rooms table')
+    parser.add_argument('--env', required=True, help='stack environment (dev, prod)')
+    parser.add_argument('--dry-run', action='store_true', help='only count the rooms that would be copied')
+    args = parser.parse_args()
+
+    legacy_table = f"VocabApp-QuizRooms-{args.env}"
+    os.environ['QUIZ_ROOMS_TABLE'] = f"VocabApp-QuizRoomItems-{args.env}"
+    sys.path.insert(0, ROOMS_DIR)
+    import room_utils
+    from boto3.dynamodb.types import TypeDeserializer
+
+    deserializer = TypeDeserializer()
+    client = room_utils.table.meta.client
+    counts = {'copied': 0, 'exists': 0, 'too_large': 0, 'expired': 0}
+
+    print(f"📦 Copying live rooms from {legacy_table} to {room_utils.table_name}"
+          f"{' (dry run)' if args.dry_run else ''}")
+    now = int(time.time())
+    for raw in legacy_rooms(client, legacy_table):
+        room = {name: deserializer.deserialize(value) for name, value in raw.items()}
+        if int(room.get('ttl', 0)) <= now:
+            counts['expired'] += 1
+            continue
+        result = 'copied' if args.dry_run else copy_room(room_utils, room)
+        counts[result] += 1
+        if result == 'too_large':
+            print(f"⚠️ {room['roomCode']}: {len(room.get('questions', []))} questions do not fit one transaction, skipped")
+
+    print(f"✅ {counts['copied']} copied, {counts['exists']} already present, "
+          f"{counts['expired']} expired, {counts['too_large']} skipped as too large")
+
+
+if __name__ == "__main__":
+    main()
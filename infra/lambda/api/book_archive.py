@@ -0,0 +1,344 @@
+import json
+import os
+import time
+import zlib
+from collections import Counter
+from datetime import date
+
+import boto3
+import psycopg2
+from psycopg2.extras import execute_values
+from db_utils import get_db_connection, lambda_response, handle_db_error, transaction, strip_column_fields
+
+# 最終アクセスからこの日数が経ったブックをアーカイブする
+ARCHIVE_AFTER_DAYS = 365
+
+# 1回の実行で処理するブック数の上限と時間の上限
+ARCHIVE_BATCH_BOOKS = 20
+DEFAULT_MAX_SECONDS = 240
+
+# アーカイブに保存する質問の列（復元時も同じ順で戻す）
+QUESTION_COLUMNS = [
+    'id', 'ka', 'np1', 'jp_kanji', 'jp_rubi',
+    'nepali_sentence', 'japanese_question', 'japanese_example',
+    'extra_data', 'created_at', 'updated_at'
+]
+
+# コンテナ内で記録済みの (book_id -> 日付)。同じ日の2回目以降のアクセスではDBに書かない
+_recorded_access = {}
+
+# ハンドラーが発行するSQL（クエリプラン検証からも参照）
+RECORD_ACCESS_SQL = """
+    INSERT INTO vocabulary_book_access (book_id, last_accessed_on)
+    VALUES (%s, CURRENT_DATE)
+    ON CONFLICT (book_id) DO UPDATE SET last_accessed_on = EXCLUDED.last_accessed_on
+    WHERE vocabulary_book_access.last_accessed_on < EXCLUDED.last_accessed_on
+"""
+
+GET_ARCHIVE_SQL = """
+    SELECT payload, question_count, restore_requested_at
+    FROM vocabulary_book_archives WHERE book_id = %s
+"""
+
+FIND_INACTIVE_BOOKS_SQL = """
+    SELECT b.id
+    FROM vocabulary_books b
+    LEFT JOIN vocabulary_book_access a ON a.book_id = b.id
+    WHERE b.archived_at IS NULL
+    AND b.question_count > 0
+    AND COALESCE(a.last_accessed_on, b.created_at::date) < CURRENT_DATE - %s
+    ORDER BY b.id
+    LIMIT %s
+"""
+
+# GIN インデックス（0009）で引く。= ANY(question_ids) はインデックスを使えない
+FIND_ARCHIVE_FOR_QUESTION_SQL = """
+    SELECT book_id FROM vocabulary_book_archives
+    WHERE question_ids @> ARRAY[%s]::integer[]
+"""
+
+SELECT_BOOK_QUESTIONS_SQL = """
+    SELECT {columns}
+    FROM vocabulary_questions
+    WHERE book_id = %s
+    ORDER BY ka, id
+""".format(columns=', '.join(QUESTION_COLUMNS))
+
+
+def encode_questions(rows):
+    """質問行を圧縮したバイト列に変換 -> (payload, 圧縮前のバイト数)"""
+    raw = json.dumps([list(row) for row in rows], ensure_ascii=False, default=str).encode('utf-8')
+    return zlib.compress(raw, 9), len(raw)
+
+
+def decode_questions(payload):
+    """アーカイブのバイト列を質問の辞書のリストに戻す"""
+    rows = json.loads(zlib.decompress(bytes(payload)).decode('utf-8'))
+    questions = [dict(zip(QUESTION_COLUMNS, row)) for row in rows]
+    # 0007 より前にアーカイブされたブックも、専用列と重複するキーなしで返す・復元する
+    for q in questions:
+        q['extra_data'] = strip_column_fields(q['extra_data'])
+    return questions
+
+
+def record_access(cursor, book_id):
+    """ブックの最終アクセス日を記録（1ブック1日1回まで書き込み）"""
+    today = date.today()
+    if _recorded_access.get(book_id) == today:
+        return
+    cursor.execute(RECORD_ACCESS_SQL, (book_id,))
+    _recorded_access[book_id] = today
+
+
+def read_archived_questions(cursor, book_id, tags, limit, offset):
+    """アーカイブ済みブックの質問を返す（get_vocab と同じ並び・タグ絞り込み）"""
+    cursor.execute(GET_ARCHIVE_SQL, (book_id,))
+    row = cursor.fetchone()
+    if not row:
+        return []
+
+    questions = decode_questions(row[0])
+    if tags:
+        questions = [
+            q for q in questions
+            if set(tags) <= set((q['extra_data'] or {}).get('tags', []))
+        ]
+    return questions[offset:offset + limit]
+
+
+def read_archived_lessons(cursor, book_id):
+    """アーカイブ済みブックの課ごとの件数（vocabulary_lessons と同じ形）"""
+    cursor.execute(GET_ARCHIVE_SQL, (book_id,))
+    row = cursor.fetchone()
+    if not row:
+        return []
+
+    counts = Counter(q['ka'] for q in decode_questions(row[0]))
+    return [{'ka': ka, 'question_count': counts[ka]} for ka in sorted(counts)]
+
+
+def request_restore(cursor, book_id):
+    """
+    バックグラウンドでの復元を依頼
+    未依頼なら依頼日時を記録し、アーカイブLambdaを非同期で起動（失敗しても定期実行が拾う）
+    """
+    cursor.execute("""
+        UPDATE vocabulary_book_archives
+        SET restore_requested_at = CURRENT_TIMESTAMP
+        WHERE book_id = %s AND restore_requested_at IS NULL
+    """, (book_id,))
+    if cursor.rowcount == 0:
+        return
+
+    function_name = os.environ.get('ARCHIVE_FUNCTION_NAME')
+    if not function_name:
+        return
+    try:
+        boto3.client('lambda').invoke(
+            FunctionName=function_name,
+            InvocationType='Event',
+            Payload=json.dumps({'action': 'restore', 'book_id': book_id}).encode('utf-8')
+        )
+    except Exception as e:
+        print(f"Restore invocation failed for book {book_id}, the scheduled job will pick it up: {str(e)}")
+
+
+def archive_book(conn, book_id):
+    """ブックの質問を1行の圧縮アーカイブに移し、ホットテーブルから削除"""
+    with transaction(conn) as cursor:
+        cursor.execute("SELECT archived_at FROM vocabulary_books WHERE id = %s FOR UPDATE", (book_id,))
+        book = cursor.fetchone()
+        if not book or book[0] is not None:
+            return None
+
+        cursor.execute(SELECT_BOOK_QUESTIONS_SQL, (book_id,))
+        rows = cursor.fetchall()
+        if not rows:
+            return None
+
+        payload, raw_bytes = encode_questions(rows)
+        cursor.execute("""
+            INSERT INTO vocabulary_book_archives (book_id, payload, question_count, question_ids, raw_bytes)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (book_id, psycopg2.Binary(payload), len(rows), [row[0] for row in rows], raw_bytes))
+        cursor.execute("DELETE FROM vocabulary_questions WHERE book_id = %s", (book_id,))
+
+        # 削除トリガーで0になった件数を戻す（一覧・クリーンアップは引き続きこの件数を使う）
+        cursor.execute("""
+            UPDATE vocabulary_books
+            SET question_count = %s, archived_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+        """, (len(rows), book_id))
+
+    return {
+        'book_id': book_id,
+        'questions': len(rows),
+        'raw_bytes': raw_bytes,
+        'compressed_bytes': len(payload)
+    }
+
+
+def restore_book(conn, book_id):
+    """アーカイブから質問を元のIDのまま戻す（アーカイブされていなければ何もしない）"""
+    with transaction(conn) as cursor:
+        cursor.execute("SELECT archived_at FROM vocabulary_books WHERE id = %s FOR UPDATE", (book_id,))
+        book = cursor.fetchone()
+        if not book or book[0] is None:
+            return None
+
+        cursor.execute(GET_ARCHIVE_SQL, (book_id,))
+        archive = cursor.fetchone()
+        questions = decode_questions(archive[0]) if archive else []
+
+        # 挿入トリガーが件数を足し直すので先に0にする
+        cursor.execute("""
+            UPDATE vocabulary_books
+            SET question_count = 0, archived_at = NULL
+            WHERE id = %s
+        """, (book_id,))
+        execute_values(
+            cursor,
+            f"INSERT INTO vocabulary_questions (book_id, {', '.join(QUESTION_COLUMNS)}) VALUES %s",
+            [
+                [book_id] + [
+                    json.dumps(q[column]) if column == 'extra_data' else q[column]
+                    for column in QUESTION_COLUMNS
+                ]
+                for q in questions
+            ],
+            page_size=1000
+        )
+        cursor.execute("DELETE FROM vocabulary_book_archives WHERE book_id = %s", (book_id,))
+        # 復元と同じトランザクションで最終アクセス日を今日にする（直後に再アーカイブされないように）
+        cursor.execute(RECORD_ACCESS_SQL, (book_id,))
+
+    _recorded_access[book_id] = date.today()
+    return {'book_id': book_id, 'questions': len(questions)}
+
+
+def restore_book_for_question(conn, question_id):
+    """質問IDを含むアーカイブ済みブックを同期的に復元（更新の前に呼ぶ）"""
+    cursor = conn.cursor()
+    cursor.execute(FIND_ARCHIVE_FOR_QUESTION_SQL, (int(question_id),))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    return restore_book(conn, row[0])
+
+
+def restore_books(conn, book_ids):
+    """指定ブックのうちアーカイブ済みのものを同期的に復元（一括操作の前に呼ぶ）"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id FROM vocabulary_books
+        WHERE id = ANY(%s) AND archived_at IS NOT NULL
+        ORDER BY id
+    """, (list(book_ids),))
+    archived_ids = [row[0] for row in cursor.fetchall()]
+    return [restore_book(conn, book_id) for book_id in archived_ids]
+
+
+def archive_inactive_books(conn, days, max_seconds):
+    """最終アクセスが古いブックを時間の許す限りアーカイブ"""
+    deadline = time.monotonic() + max_seconds
+    archived = []
+    while time.monotonic() < deadline:
+        cursor = conn.cursor()
+        cursor.execute(FIND_INACTIVE_BOOKS_SQL, (days, ARCHIVE_BATCH_BOOKS))
+        book_ids = [row[0] for row in cursor.fetchall()]
+        if not book_ids:
+            break
+        progressed = False
+        for book_id in book_ids:
+            result = archive_book(conn, book_id)
+            if result:
+                print(f"Archived book {book_id}: {result['questions']} questions, "
+                      f"{result['raw_bytes']} -> {result['compressed_bytes']} bytes")
+                archived.append(result)
+                progressed = True
+            if time.monotonic() >= deadline:
+                break
+        # 件数だけ残って質問のないブックばかりなら同じ候補を繰り返さない
+        if not progressed:
+            break
+    return archived
+
+
+def restore_requested_books(conn, max_seconds):
+    """復元依頼が出ているブックを古い依頼から順に復元"""
+    deadline = time.monotonic() + max_seconds
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT book_id FROM vocabulary_book_archives
+        WHERE restore_requested_at IS NOT NULL
+        ORDER BY restore_requested_at
+    """)
+    restored = []
+    for (book_id,) in cursor.fetchall():
+        if time.monotonic() >= deadline:
+            break
+        result = restore_book(conn, book_id)
+        if result:
+            restored.append(result)
+    return restored
+
+
+def lambda_handler(event, context):
+    """
+    アーカイブ・復元のバックグラウンドジョブ（EventBridgeの定期実行・get_vocabからの非同期起動）
+    {
+        "action": "archive" | "restore",
+        "book_id": 1,        (省略時: archive は非アクティブなブック、restore は復元依頼済みのブック)
+        "days": 365,         (archive: 最終アクセスからの日数)
+        "max_seconds": 240
+    }
+    """
+    try:
+        action = event.get('action', 'archive')
+        book_id = event.get('book_id')
+        max_seconds = float(event.get('max_seconds', DEFAULT_MAX_SECONDS))
+
+        print(f"Archive job: action={action}, book_id={book_id}")
+
+        conn = get_db_connection()
+        conn.autocommit = True
+
+        if action == 'archive':
+            if book_id:
+                result = archive_book(conn, int(book_id))
+                archived = [result] if result else []
+            else:
+                archived = archive_inactive_books(conn, int(event.get('days', ARCHIVE_AFTER_DAYS)), max_seconds)
+            return lambda_response(200, {
+                'message': f'{len(archived)} books archived',
+                'archived': archived,
+                'raw_bytes': sum(a['raw_bytes'] for a in archived),
+                'compressed_bytes': sum(a['compressed_bytes'] for a in archived)
+            })
+        elif action == 'restore':
+            if book_id:
+                result = restore_book(conn, int(book_id))
+                restored = [result] if result else []
+            else:
+                restored = restore_requested_books(conn, max_seconds)
+            return lambda_response(200, {
+                'message': f'{len(restored)} books restored',
+                'restored': restored
+            })
+        else:
+            return lambda_response(400, {
+                'error': 'Invalid action',
+                'message': 'Action must be archive or restore'
+            })
+
+    except psycopg2.Error as e:
+        return handle_db_error(e)
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return lambda_response(500, {
+            'error': 'Internal server error',
+            'message': str(e)
+        })
+    finally:
+        if 'conn' in locals():
+            conn.close()
@@ -1,13 +1,58 @@
 import json
+import time
 import psycopg2
-from db_utils import get_db_connection, lambda_response, handle_db_error
+from db_utils import get_db_connection, lambda_response, handle_db_error, transaction, strip_column_fields
+from book_archive import restore_book, restore_books
+
+# ハンドラーが発行するSQL（index_advisor / クエリプラン検証からも参照）
+INSERT_BOOK_SQL = """
+    INSERT INTO vocabulary_books (name, description, level, language_pair)
+    VALUES (%s, %s, %s, %s)
+    RETURNING id, name, description, level, language_pair, created_at, updated_at
+"""
+
+BOOK_EXISTS_SQL = "SELECT id, archived_at FROM vocabulary_books WHERE id = %s"
+
+INSERT_QUESTION_SQL = """
+    INSERT INTO vocabulary_questions 
+    (book_id, ka, np1, jp_kanji, jp_rubi, 
+     nepali_sentence, japanese_question, japanese_example, extra_data)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    RETURNING id, book_id, ka, np1, jp_kanji, jp_rubi, 
+              nepali_sentence, japanese_question, japanese_example, 
+              extra_data, created_at, updated_at
+"""
+
+# 複製: 元ブックのメタデータを引き継いだ新しいブック（指定があれば上書き）
+CLONE_BOOK_SQL = """
+    INSERT INTO vocabulary_books (name, description, level, language_pair)
+    SELECT COALESCE(%s, name || ' (copy)'), COALESCE(%s, description), COALESCE(%s, level), language_pair
+    FROM vocabulary_books WHERE id = %s
+    RETURNING id, name, description, level, language_pair, created_at, updated_at
+"""
+
+# 複製: 質問を1文でコピー（課の範囲は (book_id, ka) インデックスで絞り込む）
+CLONE_QUESTIONS_SQL = """
+    INSERT INTO vocabulary_questions
+    (book_id, ka, np1, jp_kanji, jp_rubi,
+     nepali_sentence, japanese_question, japanese_example, extra_data)
+    SELECT %s, ka, np1, jp_kanji, jp_rubi,
+           nepali_sentence, japanese_question, japanese_example, extra_data
+    FROM vocabulary_questions
+    WHERE book_id = %s AND ka BETWEEN %s AND %s
+    ORDER BY ka, id
+"""
+
+# 課の範囲を省略したときの上下限（ka は INTEGER）
+KA_MIN = 0
+KA_MAX = 2147483647
 
 def lambda_handler(event, context):
     """
     語彙データ書き込みテスト用Lambda関数
     POST /vocab
     {
-        "action": "create_book" | "create_question",
+        "action": "create_book" | "create_question" | "clone_book",
         "data": {...}
     }
     """
@@ -37,12 +82,14 @@ def lambda_handler(event, context):
             return create_vocabulary_book(cursor, data)
         elif action == 'create_question':
             return create_vocabulary_question(cursor, data)
+        elif action == 'clone_book':
+            return clone_vocabulary_book(cursor, data)
         elif action == 'test_insert':
             return test_database_insert(cursor)
         else:
             return lambda_response(400, {
                 'error': 'Invalid action',
-                'message': 'Action must be create_book, create_question, or test_insert'
+                'message': 'Action must be create_book, create_question, clone_book, or test_insert'
             })
     
     except psycopg2.Error as e:
@@ -75,11 +122,7 @@ def create_vocabulary_book(cursor, data):
             'message': 'name is required'
         })
     
-    cursor.execute("""
-        INSERT INTO vocabulary_books (name, description, level, language_pair)
-        VALUES (%s, %s, %s, %s)
-        RETURNING id, name, description, level, language_pair, created_at, updated_at
-    """, (name, description, level, language_pair))
+    cursor.execute(INSERT_BOOK_SQL, (name, description, level, language_pair))
     
     row = cursor.fetchone()
     book = {
@@ -115,30 +158,31 @@ def create_vocabulary_question(cursor, data):
             'message': f'Required fields: {", ".join(missing_fields)}'
         })
     
+    # extra_data はオブジェクト（省略可）
+    extra_data = data.get('extra_data')
+    if extra_data is not None and not isinstance(extra_data, dict):
+        return lambda_response(400, {
+            'error': 'Invalid field',
+            'message': 'extra_data must be an object'
+        })
+    
     # 語彙ブックの存在確認
-    cursor.execute("SELECT id FROM vocabulary_books WHERE id = %s", (book_id,))
-    if not cursor.fetchone():
+    cursor.execute(BOOK_EXISTS_SQL, (book_id,))
+    book_row = cursor.fetchone()
+    if not book_row:
         return lambda_response(404, {
             'error': 'Book not found',
             'message': f'Vocabulary book with id {book_id} does not exist'
         })
     
-    # extra_dataを作成（その他のフィールドをJSONに格納）
-    extra_data = {}
-    optional_fields = ['nepali_sentence', 'japanese_question', 'japanese_example']
-    for field in optional_fields:
-        if field in data:
-            extra_data[field] = data[field]
+    # アーカイブ済みのブックは追加の前に同期的に復元する
+    if book_row[1] is not None:
+        restore_book(cursor.connection, book_id)
     
-    cursor.execute("""
-        INSERT INTO vocabulary_questions 
-        (book_id, ka, np1, jp_kanji, jp_rubi, 
-         nepali_sentence, japanese_question, japanese_example, extra_data)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        RETURNING id, book_id, ka, np1, jp_kanji, jp_rubi, 
-                  nepali_sentence, japanese_question, japanese_example, 
-                  extra_data, created_at, updated_at
-    """, (book_id, ka, np1, jp_kanji, jp_rubi,
+    # extra_data には専用列のない値（タグなど）だけを格納する
+    extra_data = strip_column_fields(extra_data)
+    
+    cursor.execute(INSERT_QUESTION_SQL, (book_id, ka, np1, jp_kanji, jp_rubi,
           data.get('nepali_sentence', ''), 
           data.get('japanese_question', ''), 
           data.get('japanese_example', ''),
@@ -165,6 +209,74 @@ def create_vocabulary_question(cursor, data):
         'question': question
     })
 
+def clone_vocabulary_book(cursor, data):
+    """
+    語彙ブックを複製（ブック1行と質問を INSERT ... SELECT の2文で、1トランザクション内で実行）
+    {
+        "source_book_id": 1,
+        "name": "...", "description": "...", "level": "N4",  (省略時は元ブックの値)
+        "ka_from": 1, "ka_to": 10                             (省略時は全課)
+    }
+    """
+    source_book_id = data.get('source_book_id')
+    if not source_book_id:
+        return lambda_response(400, {
+            'error': 'Missing required field',
+            'message': 'source_book_id is required'
+        })
+    
+    try:
+        source_book_id = int(source_book_id)
+        ka_from = int(data.get('ka_from') or KA_MIN)
+        ka_to = int(data.get('ka_to') or KA_MAX)
+    except (TypeError, ValueError):
+        return lambda_response(400, {
+            'error': 'Invalid field',
+            'message': 'source_book_id, ka_from and ka_to must be integers'
+        })
+    if ka_from > ka_to:
+        return lambda_response(400, {
+            'error': 'Invalid lesson range',
+            'message': 'ka_from must not be greater than ka_to'
+        })
+    
+    started = time.perf_counter()
+    
+    # アーカイブ済みのブックは先に復元する（質問はホットテーブルからコピーする）
+    restore_books(cursor.connection, [source_book_id])
+    
+    with transaction(cursor.connection) as tx:
+        tx.execute(CLONE_BOOK_SQL, (data.get('name'), data.get('description'), data.get('level'), source_book_id))
+        row = tx.fetchone()
+        if not row:
+            return lambda_response(404, {
+                'error': 'Book not found',
+                'message': f'Vocabulary book with id {source_book_id} does not exist'
+            })
+        
+        tx.execute(CLONE_QUESTIONS_SQL, (row[0], source_book_id, ka_from, ka_to))
+        copied_questions = tx.rowcount
+    
+    book = {
+        'id': row[0],
+        'name': row[1],
+        'description': row[2],
+        'level': row[3],
+        'language_pair': row[4],
+        'created_at': row[5],
+        'updated_at': row[6]
+    }
+    
+    return lambda_response(201, {
+        'message': 'Vocabulary book cloned successfully',
+        'book': book,
+        'source_book_id': source_book_id,
+        'ka_from': data.get('ka_from'),
+        'ka_to': data.get('ka_to'),
+        'copied_questions': copied_questions,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    })
+
 def test_database_insert(cursor):
     """データベースへのテスト書き込み"""
     # テスト用語彙ブックを作成
@@ -2,8 +2,12 @@ import json
 import boto3
 import psycopg2
 import os
+from contextlib import contextmanager
 from typing import Dict, Any, Optional
 
+# 専用の列を持つ任意フィールド。extra_data には重複して保存しない（migrations/0007）
+COLUMN_FIELDS = ('nepali_sentence', 'japanese_question', 'japanese_example')
+
 def get_db_connection():
     """
     RDS Proxyまたは直接データベース接続を取得
@@ -32,6 +36,27 @@ def get_db_connection():
     
     return connection
 
+def strip_column_fields(extra_data):
+    """extra_data から専用列と重複するキーを取り除く"""
+    return {key: value for key, value in (extra_data or {}).items() if key not in COLUMN_FIELDS}
+
+@contextmanager
+def transaction(conn):
+    """
+    autocommit接続でも複数の文を1つのトランザクションで実行する
+    例外時はロールバックし、終了後は元のautocommit設定に戻す
+    """
+    original_autocommit = conn.autocommit
+    conn.autocommit = False
+    try:
+        yield conn.cursor()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.autocommit = original_autocommit
+
 def lambda_response(status_code: int, body: Any, headers: Optional[Dict] = None) -> Dict:
     """
     Lambda API Gateway形式のレスポンスを生成
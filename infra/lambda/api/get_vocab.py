@@ -1,11 +1,87 @@
 import json
 import psycopg2
 from db_utils import get_db_connection, lambda_response, handle_db_error
+from book_archive import record_access, read_archived_questions, read_archived_lessons, request_restore
+
+# ハンドラーが発行するSQL（index_advisor / クエリプラン検証からも参照）
+LIST_BOOKS_SQL = """
+    SELECT id, name, description, level, language_pair, 
+           created_at, updated_at, question_count
+    FROM vocabulary_books 
+    ORDER BY created_at DESC 
+    LIMIT %s OFFSET %s
+"""
+
+GET_BOOK_SQL = """
+    SELECT id, name, description, level, language_pair, created_at, updated_at, archived_at
+    FROM vocabulary_books WHERE id = %s
+"""
+
+LIST_QUESTIONS_SQL = """
+    SELECT id, ka, np1, jp_kanji, jp_rubi,
+           nepali_sentence, japanese_question, japanese_example,
+           extra_data, created_at, updated_at
+    FROM vocabulary_questions 
+    WHERE {where_clause}
+    ORDER BY ka 
+    LIMIT %s OFFSET %s
+"""
+
+# 課ごとの件数（トリガーで保守される vocabulary_lessons、migrations/0008）
+LIST_LESSONS_SQL = """
+    SELECT ka, question_count
+    FROM vocabulary_lessons
+    WHERE book_id = %s
+    ORDER BY ka
+"""
+
+# 出題形式の選択用：空でない値がある項目（これまで画面が取得していた先頭20問と同じ範囲で判定）
+FIELD_COLUMNS = ['np1', 'jp_kanji', 'jp_rubi', 'japanese_question', 'nepali_sentence', 'japanese_example']
+FIELD_SAMPLE_SIZE = 20
+AVAILABLE_FIELDS_SQL = f"""
+    SELECT {', '.join(f"COALESCE(bool_or(btrim({column}) <> ''), false)" for column in FIELD_COLUMNS)}
+    FROM (
+        SELECT {', '.join(FIELD_COLUMNS)}
+        FROM vocabulary_questions
+        WHERE book_id = %s
+        ORDER BY ka
+        LIMIT {FIELD_SAMPLE_SIZE}
+    ) sample
+"""
+
+def build_questions_query(book_id, tags, limit, offset):
+    """語彙質問取得SQLとパラメータを組み立てる（タグ指定時は extra_data @> で絞り込み）"""
+    where_clause = "book_id = %s"
+    where_values = [book_id]
+    if tags:
+        where_clause += " AND extra_data @> %s::jsonb"
+        where_values.append(json.dumps({'tags': tags}))
+    
+    return LIST_QUESTIONS_SQL.format(where_clause=where_clause), where_values + [limit, offset]
+
+def question_from_row(row):
+    """LIST_QUESTIONS_SQL の1行をレスポンス用の辞書に変換"""
+    return {
+        'id': row[0],
+        'ka': row[1],
+        'np1': row[2],
+        'jp_kanji': row[3],
+        'jp_rubi': row[4],
+        'nepali_sentence': row[5],
+        'japanese_question': row[6],
+        'japanese_example': row[7],
+        'extra_data': row[8],
+        'created_at': row[9],
+        'updated_at': row[10]
+    }
 
 def lambda_handler(event, context):
     """
     語彙データ読み取りテスト用Lambda関数
     GET /vocab?book_id=1&limit=10
+    GET /vocab?book_id=1&tags=S3,N4  (全タグを持つ語彙のみ。extra_dataのGINインデックスで絞り込み)
+    GET /vocab?book_id=1&lessons=1   (質問は返さず、課ごとの件数・課の範囲・使える項目のみ)
+    アーカイブ済みのブックは圧縮アーカイブから返し、バックグラウンドでの復元を依頼する
     """
     try:
         # クエリパラメータの取得
@@ -13,8 +89,10 @@ def lambda_handler(event, context):
         book_id = query_params.get('book_id')
         limit = int(query_params.get('limit', 50))
         offset = int(query_params.get('offset', 0))
+        tags = [tag.strip() for tag in query_params.get('tags', '').split(',') if tag.strip()]
+        lessons_only = query_params.get('lessons') in ('1', 'true')
         
-        print(f"Request params: book_id={book_id}, limit={limit}, offset={offset}")
+        print(f"Request params: book_id={book_id}, limit={limit}, offset={offset}, tags={tags}")
         
         # データベース接続
         conn = get_db_connection()
@@ -22,14 +100,7 @@ def lambda_handler(event, context):
         
         # 語彙ブック一覧を取得（book_idが指定されていない場合）
         if not book_id:
-            cursor.execute("""
-                SELECT id, name, description, level, language_pair, 
-                       created_at, updated_at,
-                       (SELECT COUNT(*) FROM vocabulary_questions WHERE book_id = vocabulary_books.id) as question_count
-                FROM vocabulary_books 
-                ORDER BY created_at DESC 
-                LIMIT %s OFFSET %s
-            """, (limit, offset))
+            cursor.execute(LIST_BOOKS_SQL, (limit, offset))
             
             books = []
             for row in cursor.fetchall():
@@ -54,10 +125,7 @@ def lambda_handler(event, context):
         # 特定の語彙ブックの質問を取得
         else:
             # まず語彙ブック情報を取得
-            cursor.execute("""
-                SELECT id, name, description, level, language_pair, created_at, updated_at
-                FROM vocabulary_books WHERE id = %s
-            """, (book_id,))
+            cursor.execute(GET_BOOK_SQL, (book_id,))
             
             book_row = cursor.fetchone()
             if not book_row:
@@ -70,42 +138,57 @@ def lambda_handler(event, context):
                 'level': book_row[3],
                 'language_pair': book_row[4],
                 'created_at': book_row[5],
-                'updated_at': book_row[6]
+                'updated_at': book_row[6],
+                'archived': book_row[7] is not None
             }
             
+            # 課の一覧のみ（レッスン選択用。質問本体は読まない）
+            if lessons_only:
+                if book['archived']:
+                    lessons = read_archived_lessons(cursor, book['id'])
+                    sample = read_archived_questions(cursor, book['id'], None, FIELD_SAMPLE_SIZE, 0)
+                    available_fields = [
+                        column for column in FIELD_COLUMNS
+                        if any((q.get(column) or '').strip() for q in sample)
+                    ]
+                else:
+                    cursor.execute(LIST_LESSONS_SQL, (book['id'],))
+                    lessons = [{'ka': row[0], 'question_count': row[1]} for row in cursor.fetchall()]
+                    cursor.execute(AVAILABLE_FIELDS_SQL, (book['id'],))
+                    available_fields = [
+                        column for column, available in zip(FIELD_COLUMNS, cursor.fetchone()) if available
+                    ]
+                
+                record_access(cursor, book['id'])
+                conn.commit()
+                
+                return lambda_response(200, {
+                    'book': book,
+                    'lessons': lessons,
+                    'min_ka': lessons[0]['ka'] if lessons else None,
+                    'max_ka': lessons[-1]['ka'] if lessons else None,
+                    'total_questions': sum(lesson['question_count'] for lesson in lessons),
+                    'available_fields': available_fields
+                })
+            
             # 語彙質問を取得
-            cursor.execute("""
-                SELECT id, ka, np1, jp_kanji, jp_rubi,
-                       nepali_sentence, japanese_question, japanese_example,
-                       extra_data, created_at, updated_at
-                FROM vocabulary_questions 
-                WHERE book_id = %s 
-                ORDER BY ka 
-                LIMIT %s OFFSET %s
-            """, (book_id, limit, offset))
+            if book['archived']:
+                questions = read_archived_questions(cursor, book['id'], tags, limit, offset)
+                request_restore(cursor, book['id'])
+            else:
+                cursor.execute(*build_questions_query(book_id, tags, limit, offset))
+                questions = [question_from_row(row) for row in cursor.fetchall()]
             
-            questions = []
-            for row in cursor.fetchall():
-                questions.append({
-                    'id': row[0],
-                    'ka': row[1],
-                    'np1': row[2],
-                    'jp_kanji': row[3],
-                    'jp_rubi': row[4],
-                    'nepali_sentence': row[5],
-                    'japanese_question': row[6],
-                    'japanese_example': row[7],
-                    'extra_data': row[8],
-                    'created_at': row[9],
-                    'updated_at': row[10]
-                })
+            record_access(cursor, book['id'])
+            conn.commit()
             
             return lambda_response(200, {
                 'book': book,
                 'questions': questions,
                 'total': len(questions),
                 'offset': offset,
-                'limit': limit
+                'limit': limit,
+                'tags': tags
             })
     
     except psycopg2.Error as e:
@@ -118,4 +201,4 @@ def lambda_handler(event, context):
         })
     finally:
         if 'conn' in locals():
-            conn.close()
\ No newline at end of file
+            conn.close()
@@ -0,0 +1,351 @@
+import json
+import re
+
+from query_catalog import handler_queries
+
+# 分析対象のテーブル
+VOCAB_TABLES = ('vocabulary_books', 'vocabulary_questions')
+
+# これより小さいテーブルのSeq Scanはインデックス不足として扱わない（プランナーが正しく選んでいる）
+MIN_ROWS_FOR_MISSING_INDEX = 10000
+
+# vocabulary_questions がパーティション化されている場合（partition_questions.py）、統計・サイズは
+# 各パーティションに付くので pg_partition_tree で親テーブル・親インデックスごとに合算する
+# （パーティション化されていないテーブル・インデックスでは自分自身の1行だけを返す）
+INDEX_STATS_SQL = """
+    SELECT t.relname,
+           ic.relname,
+           (
+               SELECT COALESCE(SUM(s.idx_scan), 0)
+               FROM pg_partition_tree(i.indexrelid) p
+               JOIN pg_stat_user_indexes s ON s.indexrelid = p.relid
+           ) AS idx_scan,
+           (
+               SELECT COALESCE(SUM(pg_relation_size(p.relid)), 0)
+               FROM pg_partition_tree(i.indexrelid) p
+           ) AS size_bytes,
+           i.indisunique,
+           i.indisprimary,
+           am.amname,
+           i.indpred IS NOT NULL AS is_partial,
+           i.indexprs IS NOT NULL AS has_expressions,
+           ARRAY(
+               SELECT a.attname
+               FROM unnest(i.indkey) WITH ORDINALITY AS k(attnum, ord)
+               JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+               ORDER BY k.ord
+           ) AS columns,
+           pg_get_indexdef(i.indexrelid) AS definition,
+           ic.relkind = 'I' AS is_partitioned
+    FROM pg_index i
+    JOIN pg_class t ON t.oid = i.indrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    JOIN pg_class ic ON ic.oid = i.indexrelid
+    JOIN pg_am am ON am.oid = ic.relam
+    WHERE n.nspname = 'public' AND t.relname = ANY(%s)
+    ORDER BY t.relname, ic.relname
+"""
+
+TABLE_STATS_SQL = """
+    SELECT t.relname,
+           SUM(GREATEST(c.reltuples, 0))::bigint,
+           COALESCE(SUM(s.n_tup_ins), 0),
+           COALESCE(SUM(s.n_tup_upd - s.n_tup_hot_upd), 0) AS non_hot_updates,
+           COALESCE(SUM(s.n_tup_del), 0),
+           t.relkind = 'p' AS is_partitioned
+    FROM pg_class t
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    CROSS JOIN LATERAL pg_partition_tree(t.oid) p
+    JOIN pg_class c ON c.oid = p.relid
+    LEFT JOIN pg_stat_user_tables s ON s.relid = p.relid
+    WHERE n.nspname = 'public' AND t.relname = ANY(%s)
+    GROUP BY t.relname, t.relkind
+"""
+
+# パーティション（テーブル・インデックス）名 → 親の名前。EXPLAIN のプランにはパーティション側の名前が出る
+PARTITION_PARENTS_SQL = """
+    WITH roots AS (
+        SELECT t.oid
+        FROM pg_class t
+        JOIN pg_namespace n ON n.oid = t.relnamespace
+        WHERE n.nspname = 'public' AND t.relname = ANY(%(tables)s)
+        UNION ALL
+        SELECT i.indexrelid
+        FROM pg_index i
+        JOIN pg_class t ON t.oid = i.indrelid
+        JOIN pg_namespace n ON n.oid = t.relnamespace
+        WHERE n.nspname = 'public' AND t.relname = ANY(%(tables)s)
+    )
+    SELECT leaf.relname, root.relname
+    FROM roots r
+    JOIN pg_class root ON root.oid = r.oid
+    CROSS JOIN LATERAL pg_partition_tree(r.oid) p
+    JOIN pg_class leaf ON leaf.oid = p.relid
+    WHERE p.relid <> r.oid
+"""
+
+# 親テーブルの外部キーだけ（各パーティションに複製された制約 conparentid <> 0 は数えない）
+FOREIGN_KEYS_SQL = """
+    SELECT cl.relname,
+           con.conname,
+           ARRAY(
+               SELECT a.attname
+               FROM unnest(con.conkey) WITH ORDINALITY AS k(attnum, ord)
+               JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+               ORDER BY k.ord
+           ) AS columns
+    FROM pg_constraint con
+    JOIN pg_class cl ON cl.oid = con.conrelid
+    JOIN pg_namespace n ON n.oid = cl.relnamespace
+    WHERE con.contype = 'f' AND con.conparentid = 0
+    AND n.nspname = 'public' AND cl.relname = ANY(%s)
+"""
+
+TABLE_COLUMNS_SQL = """
+    SELECT table_name, column_name
+    FROM information_schema.columns
+    WHERE table_schema = 'public' AND table_name = ANY(%s)
+"""
+
+
+def walk_plan(node, visit):
+    """EXPLAIN (FORMAT JSON) のプランノードを再帰的にたどる"""
+    visit(node)
+    for child in node.get('Plans', []):
+        walk_plan(child, visit)
+
+
+def explain_handler_queries(cursor, queries, parents=None):
+    """各ハンドラーSQLのプランから、使われたインデックスとSeq Scanを集める（パーティション名は親の名前にまとめる）"""
+    parents = parents or {}
+    results = []
+    for query in queries:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + query['sql'], query['params'])
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        indexes_used = set()
+        seq_scans = []
+        sorts = []
+
+        def visit(node):
+            if 'Index Name' in node:
+                indexes_used.add(parents.get(node['Index Name'], node['Index Name']))
+            if node.get('Node Type') == 'Seq Scan':
+                seq_scans.append({
+                    'table': parents.get(node.get('Relation Name'), node.get('Relation Name')),
+                    'filter': node.get('Filter')
+                })
+            if node.get('Node Type') == 'Sort':
+                children = node.get('Plans', [])
+                # パーティション化されたテーブルでは Sort の下に Append があり、その下が各パーティションの Seq Scan
+                if children and children[0].get('Node Type') == 'Append':
+                    children = children[0].get('Plans', [])
+                if children and children[0].get('Node Type') == 'Seq Scan':
+                    sorts.append({
+                        'table': parents.get(children[0].get('Relation Name'), children[0].get('Relation Name')),
+                        'sort_key': node.get('Sort Key', [])
+                    })
+
+        walk_plan(plan[0]['Plan'], visit)
+        results.append({
+            'name': query['name'],
+            'handler': query['handler'],
+            'indexes_used': sorted(indexes_used),
+            'seq_scans': seq_scans,
+            'seq_scan_sorts': sorts
+        })
+    return results
+
+
+def drop_index_sql(idx):
+    # パーティション化されたインデックスは CONCURRENTLY で削除できない
+    if idx['partitioned']:
+        return f"DROP INDEX IF EXISTS {idx['name']};"
+    return f"DROP INDEX CONCURRENTLY IF EXISTS {idx['name']};"
+
+
+def find_duplicate_indexes(indexes):
+    """先頭列が他のbtreeインデックスの先頭と重複する（またはまったく同じ）インデックス"""
+    duplicates = []
+    plain = [
+        idx for idx in indexes
+        if idx['method'] == 'btree' and not idx['is_partial'] and not idx['has_expressions']
+    ]
+    for idx in plain:
+        if idx['unique']:
+            continue
+        for other in plain:
+            if other is idx or other['table'] != idx['table']:
+                continue
+            if len(other['columns']) < len(idx['columns']):
+                continue
+            if other['columns'][:len(idx['columns'])] != idx['columns']:
+                continue
+            # まったく同じ列構成なら名前順で片方だけを重複扱いにする
+            if other['columns'] == idx['columns'] and not other['unique'] and other['name'] > idx['name']:
+                continue
+            duplicates.append({
+                'index': idx['name'],
+                'table': idx['table'],
+                'columns': idx['columns'],
+                'covered_by': other['name'],
+                'covered_by_columns': other['columns'],
+                'size_bytes': idx['size_bytes'],
+                'maintenance_writes': idx['maintenance_writes'],
+                'drop_sql': drop_index_sql(idx)
+            })
+            break
+    return duplicates
+
+
+def find_unused_indexes(indexes, handler_plans):
+    """統計上一度も使われず、どのハンドラーSQLのプランにも現れないインデックス"""
+    used_by_handlers = {name for plan in handler_plans for name in plan['indexes_used']}
+    unused = []
+    for idx in indexes:
+        if idx['primary'] or idx['unique']:
+            continue
+        if idx['name'] in used_by_handlers:
+            continue
+        unused.append({
+            'index': idx['name'],
+            'table': idx['table'],
+            'columns': idx['columns'],
+            'idx_scan': idx['idx_scan'],
+            'size_bytes': idx['size_bytes'],
+            'maintenance_writes': idx['maintenance_writes'],
+            # 統計上スキャンされているならハンドラー以外（手動クエリ等）が使っている
+            'confidence': 'high' if idx['idx_scan'] == 0 else 'low',
+            'drop_sql': drop_index_sql(idx)
+        })
+    return unused
+
+
+def leading_columns_covered(indexes, table, columns):
+    return any(
+        idx['table'] == table and idx['columns'][:len(columns)] == columns
+        for idx in indexes
+    )
+
+
+def find_missing_indexes(cursor, indexes, handler_plans, table_rows, partitioned_tables=()):
+    """大きなテーブルへのSeq Scan（Filter・Sort）と、インデックスのない外部キー"""
+    cursor.execute(TABLE_COLUMNS_SQL, (list(VOCAB_TABLES),))
+    table_columns = {}
+    for table, column in cursor.fetchall():
+        table_columns.setdefault(table, []).append(column)
+
+    suggestions = {}
+
+    def suggest(table, columns, reason, query_name=None):
+        if not columns or leading_columns_covered(indexes, table, columns):
+            return
+        key = (table, tuple(columns))
+        entry = suggestions.setdefault(key, {
+            'table': table,
+            'columns': columns,
+            'estimated_rows': table_rows.get(table, 0),
+            'reasons': [],
+            'handler_queries': [],
+            # パーティション化されたテーブルには CONCURRENTLY で作れない（各パーティションに作って ATTACH する）
+            'create_sql': (
+                f"CREATE INDEX ON {table} ({', '.join(columns)});" if table in partitioned_tables
+                else f"CREATE INDEX CONCURRENTLY ON {table} ({', '.join(columns)});"
+            )
+        })
+        if reason not in entry['reasons']:
+            entry['reasons'].append(reason)
+        if query_name and query_name not in entry['handler_queries']:
+            entry['handler_queries'].append(query_name)
+
+    def referenced_columns(table, expression):
+        return [
+            column for column in table_columns.get(table, [])
+            if re.search(rf'\b{re.escape(column)}\b', expression or '')
+        ]
+
+    for plan in handler_plans:
+        for scan in plan['seq_scans']:
+            table = scan['table']
+            if table not in VOCAB_TABLES or table_rows.get(table, 0) < MIN_ROWS_FOR_MISSING_INDEX:
+                continue
+            suggest(table, referenced_columns(table, scan['filter']), 'seq_scan_filter', plan['name'])
+        for sort in plan['seq_scan_sorts']:
+            table = sort['table']
+            if table not in VOCAB_TABLES or table_rows.get(table, 0) < MIN_ROWS_FOR_MISSING_INDEX:
+                continue
+            suggest(table, referenced_columns(table, ' '.join(sort['sort_key'])), 'seq_scan_sort', plan['name'])
+
+    # 外部キー列にインデックスがないとCASCADE削除のたびに子テーブルを全件走査する
+    cursor.execute(FOREIGN_KEYS_SQL, (list(VOCAB_TABLES),))
+    for table, constraint, columns in cursor.fetchall():
+        suggest(table, list(columns), f'foreign_key:{constraint}')
+
+    return list(suggestions.values())
+
+
+def advise_indexes(cursor):
+    """
+    語彙スキーマのインデックス診断
+    pg_stat_user_indexes の利用統計・ハンドラーSQLの実際のプラン・カタログ情報から
+    未使用・重複・不足インデックスを書き込みコストとサイズの見積もり付きで返す
+    """
+    tables = list(VOCAB_TABLES)
+
+    cursor.execute(TABLE_STATS_SQL, (tables,))
+    table_rows = {}
+    table_writes = {}
+    partitioned_tables = set()
+    for table, reltuples, inserts, non_hot_updates, deletes, is_partitioned in cursor.fetchall():
+        table_rows[table] = max(reltuples, 0)
+        if is_partitioned:
+            partitioned_tables.add(table)
+        # 各INSERTとHOTでないUPDATEは、そのテーブルのすべてのインデックスに書き込む
+        table_writes[table] = inserts + non_hot_updates
+
+    cursor.execute(INDEX_STATS_SQL, (tables,))
+    indexes = []
+    for row in cursor.fetchall():
+        indexes.append({
+            'table': row[0],
+            'name': row[1],
+            'idx_scan': row[2],
+            'size_bytes': row[3],
+            'unique': row[4],
+            'primary': row[5],
+            'method': row[6],
+            'is_partial': row[7],
+            'has_expressions': row[8],
+            'columns': list(row[9]),
+            'definition': row[10],
+            'partitioned': row[11],
+            'maintenance_writes': table_writes.get(row[0], 0)
+        })
+
+    cursor.execute(PARTITION_PARENTS_SQL, {'tables': tables})
+    parents = dict(cursor.fetchall())
+    handler_plans = explain_handler_queries(cursor, handler_queries(cursor), parents)
+
+    cursor.execute("SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()")
+    stats_reset = cursor.fetchone()[0]
+
+    unused = find_unused_indexes(indexes, handler_plans)
+    duplicate = find_duplicate_indexes(indexes)
+    missing = find_missing_indexes(cursor, indexes, handler_plans, table_rows, partitioned_tables)
+
+    return {
+        'stats_since': stats_reset,
+        'unused': unused,
+        'duplicate': duplicate,
+        'missing': missing,
+        'reclaimable_bytes': sum(
+            idx['size_bytes'] for idx in {i['index']: i for i in unused + duplicate}.values()
+        ),
+        'handler_plans': handler_plans,
+        'indexes': [
+            {key: idx[key] for key in ('table', 'name', 'definition', 'idx_scan', 'size_bytes')}
+            for idx in indexes
+        ]
+    }
@@ -1,13 +1,21 @@
 import json
 import psycopg2
-from db_utils import get_db_connection, lambda_response, handle_db_error
+from psycopg2 import sql
+from db_utils import get_db_connection, lambda_response, handle_db_error, COLUMN_FIELDS
+from schema_migrations import apply_migrations, migration_status
+from index_advisor import advise_indexes
+from partition_questions import partition_questions, DEFAULT_PARTITIONS, DEFAULT_COPY_SECONDS
 
 def lambda_handler(event, context):
     """
     データベースマイグレーション実行Lambda関数
     POST /migrate
     {
-        "action": "create_tables" | "check_tables"
+        "action": "create_tables" | "check_tables" | "migration_status" | "advise_indexes" | "partition_questions"
+                  | "dedupe_extra_data",
+        "exact_counts": false  (check_tables: trueでCOUNT(*)による正確な件数も返す)
+        "step": "prepare" | "copy" | "swap" | "drop_old" | "status"  (partition_questions)
+        "partitions": 16, "max_seconds": 240  (partition_questions の prepare / copy)
     }
     """
     try:
@@ -27,13 +35,31 @@ def lambda_handler(event, context):
         cursor = conn.cursor()
         
         if action == 'create_tables':
-            return create_tables(cursor)
+            return create_tables(conn)
         elif action == 'check_tables':
-            return check_tables(cursor)
+            return check_tables(cursor, exact_counts=bool(body.get('exact_counts', False)))
+        elif action == 'migration_status':
+            return get_migration_status(conn)
+        elif action == 'advise_indexes':
+            return get_index_advice(cursor)
+        elif action == 'partition_questions':
+            result = partition_questions(
+                conn,
+                body.get('step', 'status'),
+                partitions=int(body.get('partitions', DEFAULT_PARTITIONS)),
+                max_seconds=int(body.get('max_seconds', DEFAULT_COPY_SECONDS))
+            )
+            return lambda_response(200, {
+                'message': 'Partition migration step completed',
+                **result
+            })
+        elif action == 'dedupe_extra_data':
+            return dedupe_extra_data(conn)
         else:
             return lambda_response(400, {
                 'error': 'Invalid action',
-                'message': 'Action must be create_tables or check_tables'
+                'message': 'Action must be create_tables, check_tables, migration_status, advise_indexes, '
+                           'partition_questions or dedupe_extra_data'
             })
     
     except psycopg2.Error as e:
@@ -43,6 +69,11 @@ def lambda_handler(event, context):
             'error': 'Invalid JSON',
             'message': 'Request body must be valid JSON'
         })
+    except ValueError as e:
+        return lambda_response(400, {
+            'error': 'Invalid request',
+            'message': str(e)
+        })
     except Exception as e:
         print(f"Error: {str(e)}")
         return lambda_response(500, {
@@ -53,137 +84,165 @@ def lambda_handler(event, context):
         if 'conn' in locals():
             conn.close()
 
-def create_tables(cursor):
-    """テーブル作成"""
-    migration_sql = """
-    -- Create vocabulary books table
-    CREATE TABLE IF NOT EXISTS vocabulary_books (
-        id SERIAL PRIMARY KEY,
-        name VARCHAR(255) NOT NULL,
-        description TEXT,
-        level VARCHAR(10) NOT NULL DEFAULT 'N4',
-        language_pair VARCHAR(10) NOT NULL DEFAULT 'JP-NP',
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
+def create_tables(conn):
+    """未適用のマイグレーションを適用（migrations/ 配下のファイルを番号順に実行）"""
+    applied = apply_migrations(conn)
+    status = migration_status(conn)
+    
+    return lambda_response(200, {
+        'message': 'Database migration completed successfully',
+        'applied_migrations': applied,
+        'current_version': max((m['version'] for m in status if m['applied']), default=0),
+        'pending': [m['version'] for m in status if not m['applied']]
+    })
 
-    CREATE INDEX IF NOT EXISTS idx_vocab_books_level ON vocabulary_books (level);
-    CREATE INDEX IF NOT EXISTS idx_vocab_books_language_pair ON vocabulary_books (language_pair);
+def get_migration_status(conn):
+    """マイグレーションの適用状況"""
+    status = migration_status(conn)
+    
+    return lambda_response(200, {
+        'message': 'Migration status',
+        'migrations': status,
+        'pending': [m['version'] for m in status if not m['applied']]
+    })
 
-    -- Create vocabulary questions table
-    CREATE TABLE IF NOT EXISTS vocabulary_questions (
-        id SERIAL PRIMARY KEY,
-        book_id INTEGER NOT NULL,
-        ka INTEGER NOT NULL,
-        np1 VARCHAR(500) NOT NULL,
-        jp_kanji VARCHAR(500) NOT NULL,
-        jp_rubi VARCHAR(500) NOT NULL,
-        -- Optional fields
-        nepali_sentence TEXT DEFAULT '',
-        japanese_question TEXT DEFAULT '',
-        japanese_example TEXT DEFAULT '',
-        extra_data JSONB DEFAULT '{}',
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        
-        FOREIGN KEY (book_id) REFERENCES vocabulary_books(id) ON DELETE CASCADE
-    );
+def get_index_advice(cursor):
+    """インデックス診断（未使用・重複・不足インデックスと、その書き込み・容量コスト）"""
+    advice = advise_indexes(cursor)
+    
+    return lambda_response(200, {
+        'message': 'Index advice',
+        **advice
+    })
 
-    CREATE INDEX IF NOT EXISTS idx_vocab_questions_book_ka ON vocabulary_questions (book_id, ka);
-    CREATE INDEX IF NOT EXISTS idx_vocab_questions_ka ON vocabulary_questions (ka);
-    CREATE INDEX IF NOT EXISTS idx_vocab_questions_jp_kanji ON vocabulary_questions (jp_kanji);
-    CREATE INDEX IF NOT EXISTS idx_vocab_questions_np1 ON vocabulary_questions (np1);
+# 0007 と同じ削除。0007 が自動適用済みでも、その後に入った重複キーをここで取り除く
+DEDUPE_EXTRA_DATA_SQL = """
+    UPDATE vocabulary_questions
+    SET extra_data = extra_data - %(keys)s::text[]
+    WHERE extra_data ?| %(keys)s::text[]
+"""
 
+def question_storage(cursor):
+    """
+    vocabulary_questions の本体・TOASTのサイズ・不要タプル数（パーティション化後は全パーティションの合計）と
+    extra_data の合計バイト数・専用列と重複するキーのバイト数（全件スキャン）
     """
+    cursor.execute("""
+        SELECT COALESCE(SUM(pg_relation_size(t.relid)), 0),
+               COALESCE(SUM(pg_relation_size(NULLIF(c.reltoastrelid, 0))), 0),
+               COALESCE(SUM(s.n_dead_tup), 0)
+        FROM pg_partition_tree('vocabulary_questions') t
+        JOIN pg_class c ON c.oid = t.relid
+        LEFT JOIN pg_stat_user_tables s ON s.relid = t.relid
+    """)
+    table_bytes, toast_bytes, dead_tuples = cursor.fetchone()
     
-    # SQLを実行
-    statements = [stmt.strip() for stmt in migration_sql.split(';') if stmt.strip()]
-    created_objects = []
+    cursor.execute("""
+        SELECT COALESCE(SUM(pg_column_size(extra_data)), 0),
+               COUNT(*) FILTER (WHERE extra_data ?| %(keys)s::text[]),
+               COALESCE(SUM(pg_column_size(extra_data) - pg_column_size(extra_data - %(keys)s::text[]))
+                        FILTER (WHERE extra_data ?| %(keys)s::text[]), 0)
+        FROM vocabulary_questions
+    """, {'keys': list(COLUMN_FIELDS)})
+    extra_data_bytes, duplicated_rows, duplicated_bytes = cursor.fetchone()
     
-    for statement in statements:
-        if statement:
-            try:
-                cursor.execute(statement)
-                if 'CREATE TABLE' in statement.upper():
-                    table_name = statement.split()[5] if 'IF NOT EXISTS' in statement else statement.split()[2]
-                    created_objects.append(f"Table: {table_name}")
-                elif 'CREATE INDEX' in statement.upper():
-                    index_name = statement.split()[4] if 'IF NOT EXISTS' in statement else statement.split()[2]
-                    created_objects.append(f"Index: {index_name}")
-                elif 'CREATE TRIGGER' in statement.upper():
-                    trigger_name = statement.split()[2]
-                    created_objects.append(f"Trigger: {trigger_name}")
-                elif 'CREATE OR REPLACE FUNCTION' in statement.upper():
-                    func_name = statement.split()[4].split('(')[0]
-                    created_objects.append(f"Function: {func_name}")
-                print(f"✓ Executed: {statement[:50]}...")
-            except Exception as e:
-                print(f"✗ Error executing: {statement[:50]}...")
-                print(f"  Error: {e}")
-                raise
+    return {
+        'table_bytes': table_bytes,
+        'toast_bytes': toast_bytes,
+        'dead_tuples': dead_tuples,
+        'extra_data_bytes': extra_data_bytes,
+        'duplicated_rows': duplicated_rows,
+        'duplicated_bytes': duplicated_bytes
+    }
+
+def dedupe_extra_data(conn):
+    """
+    extra_data の重複キーを削除（migrations/0007 と同じ処理）し、VACUUM で再利用可能にする
+    削除量はデータから計算した重複キーのバイト数で報告する。通常の VACUUM ではファイルは縮まない
+    （空き領域は以後の書き込みで再利用される。縮めるには VACUUM FULL か pg_repack が必要）
+    """
+    cursor = conn.cursor()
+    applied = apply_migrations(conn)
     
-    # Create trigger function and triggers separately
-    try:
-        cursor.execute('''
-            CREATE OR REPLACE FUNCTION update_updated_at_column()
-            RETURNS TRIGGER AS $$
-            BEGIN
-                NEW.updated_at = CURRENT_TIMESTAMP;
-                RETURN NEW;
-            END;
-            $$ language 'plpgsql'
-        ''')
-        created_objects.append("Function: update_updated_at_column")
-        
-        cursor.execute('DROP TRIGGER IF EXISTS update_vocabulary_books_updated_at ON vocabulary_books')
-        cursor.execute('''
-            CREATE TRIGGER update_vocabulary_books_updated_at 
-            BEFORE UPDATE ON vocabulary_books 
-            FOR EACH ROW EXECUTE FUNCTION update_updated_at_column()
-        ''')
-        created_objects.append("Trigger: update_vocabulary_books_updated_at")
-        
-        cursor.execute('DROP TRIGGER IF EXISTS update_vocabulary_questions_updated_at ON vocabulary_questions')
-        cursor.execute('''
-            CREATE TRIGGER update_vocabulary_questions_updated_at 
-            BEFORE UPDATE ON vocabulary_questions 
-            FOR EACH ROW EXECUTE FUNCTION update_updated_at_column()
-        ''')
-        created_objects.append("Trigger: update_vocabulary_questions_updated_at")
-        
-    except Exception as e:
-        print(f"Warning: Could not create triggers: {e}")
+    # 0007 が既に自動適用されていれば、ここで見つかるのはその後に入った重複だけ
+    before = question_storage(cursor)
+    cursor.execute(DEDUPE_EXTRA_DATA_SQL, {'keys': list(COLUMN_FIELDS)})
+    updated_rows = cursor.rowcount
+    
+    # autocommit 接続なのでトランザクション外で実行できる
+    cursor.execute("VACUUM (ANALYZE) vocabulary_questions")
+    after = question_storage(cursor)
     
     return lambda_response(200, {
-        'message': 'Database migration completed successfully',
-        'created_objects': created_objects,
-        'total_statements': len(statements)
+        'message': 'Duplicated extra_data keys removed',
+        'applied_migrations': applied,
+        'updated_rows': updated_rows,
+        'before': before,
+        'after': after,
+        'removed_duplicated_bytes': before['duplicated_bytes'] - after['duplicated_bytes']
     })
 
-def check_tables(cursor):
-    """テーブル存在確認"""
+def check_tables(cursor, exact_counts=False):
+    """
+    テーブル統計（カタログから1クエリで取得。正確な件数は exact_counts 指定時のみ）
+    パーティション化したテーブルは親の1行に全パーティションの件数・サイズを合計する
+    """
     cursor.execute("""
-        SELECT table_name 
-        FROM information_schema.tables 
-        WHERE table_schema = 'public' 
-        AND table_type = 'BASE TABLE'
-        ORDER BY table_name
+        SELECT relname, estimated_rows, table_bytes, index_bytes, total_bytes,
+               n_live_tup, n_dead_tup,
+               CASE WHEN n_live_tup + n_dead_tup > 0
+                    THEN round(n_dead_tup::numeric / (n_live_tup + n_dead_tup), 4)
+                    ELSE 0
+               END AS dead_tuple_ratio,
+               last_vacuum, last_analyze
+        FROM (
+            SELECT c.relname,
+                   -- reltuples は未ANALYZEだと -1（PG14以降）、パーティション化した親は常に -1
+                   SUM(GREATEST(p.reltuples, 0))::bigint AS estimated_rows,
+                   SUM(pg_relation_size(t.relid)) AS table_bytes,
+                   SUM(pg_indexes_size(t.relid)) AS index_bytes,
+                   SUM(pg_total_relation_size(t.relid)) AS total_bytes,
+                   SUM(s.n_live_tup) AS n_live_tup,
+                   SUM(s.n_dead_tup) AS n_dead_tup,
+                   MAX(GREATEST(s.last_vacuum, s.last_autovacuum)) AS last_vacuum,
+                   MAX(GREATEST(s.last_analyze, s.last_autoanalyze)) AS last_analyze
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            CROSS JOIN LATERAL pg_partition_tree(c.oid) t
+            JOIN pg_class p ON p.oid = t.relid
+            LEFT JOIN pg_stat_user_tables s ON s.relid = t.relid
+            WHERE n.nspname = 'public'
+            AND c.relkind IN ('r', 'p')
+            AND NOT c.relispartition
+            GROUP BY c.relname
+        ) tables
+        ORDER BY relname
     """)
     
-    tables = [row[0] for row in cursor.fetchall()]
-    
-    # 各テーブルのレコード数を取得
     table_info = []
-    for table in tables:
-        cursor.execute(f"SELECT COUNT(*) FROM {table}")
-        count = cursor.fetchone()[0]
+    for row in cursor.fetchall():
         table_info.append({
-            'table': table,
-            'count': count
+            'table': row[0],
+            'estimated_rows': row[1],
+            'table_bytes': row[2],
+            'index_bytes': row[3],
+            'total_bytes': row[4],
+            'live_tuples': row[5],
+            'dead_tuples': row[6],
+            'dead_tuple_ratio': float(row[7]) if row[7] is not None else None,
+            'last_vacuum': row[8],
+            'last_analyze': row[9]
         })
     
+    # 各テーブルの正確なレコード数（全件スキャンになるため明示的な指定時のみ）
+    if exact_counts:
+        for info in table_info:
+            cursor.execute(sql.SQL("SELECT COUNT(*) FROM {}").format(sql.Identifier(info['table'])))
+            info['count'] = cursor.fetchone()[0]
+    
     return lambda_response(200, {
         'message': 'Database tables checked',
         'tables': table_info,
-        'total_tables': len(tables)
-    })
\ No newline at end of file
+        'total_tables': len(table_info),
+        'exact_counts': exact_counts
+    })
@@ -0,0 +1,55 @@
+-- Vocabulary books and questions with their updated_at triggers
+
+CREATE TABLE IF NOT EXISTS vocabulary_books (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    description TEXT,
+    level VARCHAR(10) NOT NULL DEFAULT 'N4',
+    language_pair VARCHAR(10) NOT NULL DEFAULT 'JP-NP',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_vocab_books_level ON vocabulary_books (level);
+CREATE INDEX IF NOT EXISTS idx_vocab_books_language_pair ON vocabulary_books (language_pair);
+
+CREATE TABLE IF NOT EXISTS vocabulary_questions (
+    id SERIAL PRIMARY KEY,
+    book_id INTEGER NOT NULL,
+    ka INTEGER NOT NULL,
+    np1 VARCHAR(500) NOT NULL,
+    jp_kanji VARCHAR(500) NOT NULL,
+    jp_rubi VARCHAR(500) NOT NULL,
+    -- Optional fields
+    nepali_sentence TEXT DEFAULT '',
+    japanese_question TEXT DEFAULT '',
+    japanese_example TEXT DEFAULT '',
+    extra_data JSONB DEFAULT '{}',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    FOREIGN KEY (book_id) REFERENCES vocabulary_books(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_vocab_questions_book_ka ON vocabulary_questions (book_id, ka);
+CREATE INDEX IF NOT EXISTS idx_vocab_questions_ka ON vocabulary_questions (ka);
+CREATE INDEX IF NOT EXISTS idx_vocab_questions_jp_kanji ON vocabulary_questions (jp_kanji);
+CREATE INDEX IF NOT EXISTS idx_vocab_questions_np1 ON vocabulary_questions (np1);
+
+CREATE OR REPLACE FUNCTION update_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS update_vocabulary_books_updated_at ON vocabulary_books;
+CREATE TRIGGER update_vocabulary_books_updated_at
+    BEFORE UPDATE ON vocabulary_books
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+DROP TRIGGER IF EXISTS update_vocabulary_questions_updated_at ON vocabulary_questions;
+CREATE TRIGGER update_vocabulary_questions_updated_at
+    BEFORE UPDATE ON vocabulary_questions
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
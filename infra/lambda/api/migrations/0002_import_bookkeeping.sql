@@ -0,0 +1,50 @@
+-- Tables used by vocab-import.py: staging area, per-job checkpoints and the checksum registry
+
+-- UNLOGGED: no WAL, contents are disposable
+CREATE UNLOGGED TABLE IF NOT EXISTS vocab_import_staging (
+    import_source TEXT NOT NULL,
+    line_no INTEGER NOT NULL,
+    ka TEXT,
+    np1 TEXT,
+    jp_kanji TEXT,
+    jp_rubi TEXT,
+    nepali_sentence TEXT,
+    japanese_question TEXT,
+    japanese_example TEXT,
+    ka_num INTEGER,
+    is_valid BOOLEAN
+);
+
+-- Columns added after the first import deployments created the table
+ALTER TABLE vocab_import_staging ADD COLUMN IF NOT EXISTS tags_raw JSONB;
+ALTER TABLE vocab_import_staging ADD COLUMN IF NOT EXISTS extra_data JSONB;
+
+CREATE INDEX IF NOT EXISTS idx_vocab_import_staging_source ON vocab_import_staging (import_source, line_no);
+
+CREATE TABLE IF NOT EXISTS vocab_import_checkpoints (
+    job_id TEXT NOT NULL,
+    import_source TEXT NOT NULL,
+    source_path TEXT NOT NULL,
+    level VARCHAR(10) NOT NULL,
+    book_name VARCHAR(255) NOT NULL,
+    description TEXT,
+    byte_offset BIGINT NOT NULL DEFAULT 0,
+    rows_staged INTEGER NOT NULL DEFAULT 0,
+    rows_inserted INTEGER NOT NULL DEFAULT 0,
+    status VARCHAR(20) NOT NULL DEFAULT 'staging',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (job_id, import_source)
+);
+
+ALTER TABLE vocab_import_checkpoints ADD COLUMN IF NOT EXISTS checksum TEXT;
+
+CREATE TABLE IF NOT EXISTS vocab_import_registry (
+    import_source TEXT PRIMARY KEY,
+    source_path TEXT NOT NULL,
+    checksum TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    book_id INTEGER REFERENCES vocabulary_books(id) ON DELETE CASCADE,
+    imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,4 @@
+-- migrate:no-transaction
+-- Tag filters in get_vocab (extra_data @> '{"tags": [...]}')
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_vocab_questions_extra_data
+    ON vocabulary_questions USING GIN (extra_data jsonb_path_ops);
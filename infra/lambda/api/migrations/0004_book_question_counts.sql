@@ -0,0 +1,76 @@
+-- Per-book question counts maintained by statement-level triggers on vocabulary_questions
+-- (replaces COUNT(*) joins in the book listing and the small-book cleanup)
+
+ALTER TABLE vocabulary_books ADD COLUMN IF NOT EXISTS question_count INTEGER NOT NULL DEFAULT 0;
+
+-- Only metadata edits bump updated_at; count maintenance must not invalidate client caches
+DROP TRIGGER IF EXISTS update_vocabulary_books_updated_at ON vocabulary_books;
+CREATE TRIGGER update_vocabulary_books_updated_at
+    BEFORE UPDATE OF name, description, level, language_pair ON vocabulary_books
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- One function for all three triggers (transition tables allow a single event per trigger)
+CREATE OR REPLACE FUNCTION maintain_book_question_counts()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE vocabulary_books b
+        SET question_count = b.question_count + d.delta
+        FROM (SELECT book_id, COUNT(*) AS delta FROM new_rows GROUP BY book_id) d
+        WHERE b.id = d.book_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE vocabulary_books b
+        SET question_count = GREATEST(b.question_count - d.delta, 0)
+        FROM (SELECT book_id, COUNT(*) AS delta FROM old_rows GROUP BY book_id) d
+        WHERE b.id = d.book_id;
+    ELSE
+        -- Only questions moved to another book change the counts
+        UPDATE vocabulary_books b
+        SET question_count = GREATEST(b.question_count + d.delta, 0)
+        FROM (
+            SELECT book_id, SUM(delta) AS delta
+            FROM (
+                SELECT book_id, 1 AS delta FROM new_rows
+                UNION ALL
+                SELECT book_id, -1 AS delta FROM old_rows
+            ) moved
+            GROUP BY book_id
+            HAVING SUM(delta) <> 0
+        ) d
+        WHERE b.id = d.book_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS count_vocabulary_questions_insert ON vocabulary_questions;
+CREATE TRIGGER count_vocabulary_questions_insert
+    AFTER INSERT ON vocabulary_questions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_book_question_counts();
+
+DROP TRIGGER IF EXISTS count_vocabulary_questions_delete ON vocabulary_questions;
+CREATE TRIGGER count_vocabulary_questions_delete
+    AFTER DELETE ON vocabulary_questions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_book_question_counts();
+
+DROP TRIGGER IF EXISTS count_vocabulary_questions_update ON vocabulary_questions;
+CREATE TRIGGER count_vocabulary_questions_update
+    AFTER UPDATE ON vocabulary_questions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_book_question_counts();
+
+-- Backfill after the triggers exist; creating them locked out writers until this migration commits
+UPDATE vocabulary_books b
+SET question_count = COALESCE(c.question_count, 0)
+FROM vocabulary_books b2
+LEFT JOIN (
+    SELECT book_id, COUNT(*) AS question_count
+    FROM vocabulary_questions
+    GROUP BY book_id
+) c ON c.book_id = b2.id
+WHERE b.id = b2.id AND b.question_count IS DISTINCT FROM COALESCE(c.question_count, 0);
+
+-- Cleanup candidates are found by count, in id order
+CREATE INDEX IF NOT EXISTS idx_vocab_books_question_count ON vocabulary_books (question_count, id);
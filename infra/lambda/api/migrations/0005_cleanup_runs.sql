@@ -0,0 +1,15 @@
+-- Progress of cleanup_small_books runs, so a scheduled invocation resumes an unfinished run
+
+CREATE TABLE IF NOT EXISTS vocab_cleanup_runs (
+    run_id TEXT PRIMARY KEY,
+    min_questions INTEGER NOT NULL,
+    last_book_id INTEGER NOT NULL DEFAULT 0,
+    deleted_books INTEGER NOT NULL DEFAULT 0,
+    deleted_questions BIGINT NOT NULL DEFAULT 0,
+    lock_timeouts INTEGER NOT NULL DEFAULT 0,
+    status VARCHAR(20) NOT NULL DEFAULT 'running',
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_vocab_cleanup_runs_status ON vocab_cleanup_runs (status, min_questions, started_at);
@@ -0,0 +1,32 @@
+-- Archive tier: questions of inactive books move into one compressed row per book
+
+ALTER TABLE vocabulary_books ADD COLUMN IF NOT EXISTS archived_at TIMESTAMP;
+
+-- payload: zlib-compressed JSON array of question rows (see book_archive.py)
+CREATE TABLE IF NOT EXISTS vocabulary_book_archives (
+    book_id INTEGER PRIMARY KEY REFERENCES vocabulary_books(id) ON DELETE CASCADE,
+    payload BYTEA NOT NULL,
+    question_count INTEGER NOT NULL,
+    -- Original question ids, so updates addressed by question id can find (and restore) the book
+    question_ids INTEGER[] NOT NULL,
+    raw_bytes INTEGER NOT NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    restore_requested_at TIMESTAMP
+);
+
+ALTER TABLE vocabulary_book_archives ALTER COLUMN payload SET STORAGE EXTERNAL;
+
+CREATE INDEX IF NOT EXISTS idx_vocab_book_archives_restore
+    ON vocabulary_book_archives (restore_requested_at)
+    WHERE restore_requested_at IS NOT NULL;
+
+-- Last access per book, written at most once per book per day
+CREATE TABLE IF NOT EXISTS vocabulary_book_access (
+    book_id INTEGER PRIMARY KEY REFERENCES vocabulary_books(id) ON DELETE CASCADE,
+    last_accessed_on DATE NOT NULL
+);
+
+-- Start every existing book's inactivity clock at deployment rather than at its creation
+INSERT INTO vocabulary_book_access (book_id, last_accessed_on)
+SELECT id, CURRENT_DATE FROM vocabulary_books
+ON CONFLICT (book_id) DO NOTHING;
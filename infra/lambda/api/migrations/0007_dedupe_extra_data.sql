@@ -0,0 +1,7 @@
+-- nepali_sentence / japanese_question / japanese_example have their own columns;
+-- create_question used to copy them into extra_data as well. Strip the copies.
+-- The space is reusable after VACUUM (the migrate action "dedupe_extra_data" runs it and reports the bytes).
+
+UPDATE vocabulary_questions
+SET extra_data = extra_data - ARRAY['nepali_sentence', 'japanese_question', 'japanese_example']
+WHERE extra_data ?| ARRAY['nepali_sentence', 'japanese_question', 'japanese_example'];
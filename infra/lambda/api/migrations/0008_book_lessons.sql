@@ -0,0 +1,82 @@
+-- Per-lesson question counts, maintained by the same statement-level triggers as
+-- vocabulary_books.question_count (0004), so lesson pickers need not download whole books
+
+-- Keep writers out until the backfill commits; writes that started earlier would still run the old function
+LOCK TABLE vocabulary_questions IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE TABLE IF NOT EXISTS vocabulary_lessons (
+    book_id INTEGER NOT NULL REFERENCES vocabulary_books(id) ON DELETE CASCADE,
+    ka INTEGER NOT NULL,
+    question_count INTEGER NOT NULL,
+    PRIMARY KEY (book_id, ka)
+);
+
+CREATE OR REPLACE FUNCTION maintain_book_question_counts()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE vocabulary_books b
+        SET question_count = b.question_count + d.delta
+        FROM (SELECT book_id, COUNT(*) AS delta FROM new_rows GROUP BY book_id) d
+        WHERE b.id = d.book_id;
+
+        INSERT INTO vocabulary_lessons AS l (book_id, ka, question_count)
+        SELECT book_id, ka, COUNT(*) FROM new_rows GROUP BY book_id, ka
+        ORDER BY book_id, ka
+        ON CONFLICT (book_id, ka) DO UPDATE SET question_count = l.question_count + EXCLUDED.question_count;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE vocabulary_books b
+        SET question_count = GREATEST(b.question_count - d.delta, 0)
+        FROM (SELECT book_id, COUNT(*) AS delta FROM old_rows GROUP BY book_id) d
+        WHERE b.id = d.book_id;
+
+        -- When a whole book is deleted its lessons also go by their own CASCADE
+        UPDATE vocabulary_lessons l
+        SET question_count = l.question_count - d.delta
+        FROM (SELECT book_id, ka, COUNT(*) AS delta FROM old_rows GROUP BY book_id, ka) d
+        WHERE l.book_id = d.book_id AND l.ka = d.ka;
+
+        DELETE FROM vocabulary_lessons l
+        USING (SELECT DISTINCT book_id, ka FROM old_rows) d
+        WHERE l.book_id = d.book_id AND l.ka = d.ka AND l.question_count <= 0;
+    ELSE
+        -- Only questions moved to another book change the counts
+        UPDATE vocabulary_books b
+        SET question_count = GREATEST(b.question_count + d.delta, 0)
+        FROM (
+            SELECT book_id, SUM(delta) AS delta
+            FROM (
+                SELECT book_id, 1 AS delta FROM new_rows
+                UNION ALL
+                SELECT book_id, -1 AS delta FROM old_rows
+            ) moved
+            GROUP BY book_id
+            HAVING SUM(delta) <> 0
+        ) d
+        WHERE b.id = d.book_id;
+
+        -- Lessons change when questions move to another book or another ka
+        INSERT INTO vocabulary_lessons AS l (book_id, ka, question_count)
+        SELECT book_id, ka, SUM(delta)
+        FROM (
+            SELECT book_id, ka, 1 AS delta FROM new_rows
+            UNION ALL
+            SELECT book_id, ka, -1 AS delta FROM old_rows
+        ) moved
+        GROUP BY book_id, ka
+        HAVING SUM(delta) <> 0
+        ORDER BY book_id, ka
+        ON CONFLICT (book_id, ka) DO UPDATE SET question_count = l.question_count + EXCLUDED.question_count;
+
+        DELETE FROM vocabulary_lessons l
+        USING (SELECT DISTINCT book_id, ka FROM old_rows) d
+        WHERE l.book_id = d.book_id AND l.ka = d.ka AND l.question_count <= 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Backfill (archived books have no rows here; get_vocab reads their lessons from the archive)
+INSERT INTO vocabulary_lessons (book_id, ka, question_count)
+SELECT book_id, ka, COUNT(*) FROM vocabulary_questions GROUP BY book_id, ka
+ON CONFLICT (book_id, ka) DO UPDATE SET question_count = EXCLUDED.question_count;
@@ -0,0 +1,5 @@
+-- migrate:no-transaction
+-- update_vocab restores the archived book of a question it cannot find
+-- (question_ids @> ARRAY[id]); without this index that reads every archive row
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_vocab_book_archives_question_ids
+    ON vocabulary_book_archives USING GIN (question_ids);
@@ -0,0 +1,343 @@
+import time
+
+import psycopg2.errors
+
+# vocabulary_questions を book_id のハッシュでパーティション分割する（オプトイン）
+#
+# 手順（migrate Lambda の action "partition_questions" に step を指定して順に実行）:
+#   prepare  パーティションテーブルを作成し、旧テーブルへの書き込みを記録するトリガーを設置
+#   copy     book_id 順にバッチでコピー（時間制限付き・進捗を保存して再開可能）
+#   swap     短いロックの中で差分を再同期し、テーブル名を入れ替える
+#   drop_old 入れ替え後に旧テーブルを削除（ロールバック用に残しておく期間が過ぎてから）
+#   status   進捗の確認
+
+SOURCE_TABLE = 'vocabulary_questions'
+TARGET_TABLE = 'vocabulary_questions_partitioned'
+OLD_TABLE = 'vocabulary_questions_unpartitioned'
+
+DEFAULT_PARTITIONS = 16
+
+# 1バッチでコピーするブック数と、1回の呼び出しで copy に使う時間
+COPY_BATCH_BOOKS = 50
+DEFAULT_COPY_SECONDS = 240
+
+# swap でアクセス排他ロックを待つ上限（読み取りを長時間止めない）
+SWAP_LOCK_TIMEOUT = '5s'
+
+PROGRESS_SQL = """
+CREATE TABLE IF NOT EXISTS vocab_partition_progress (
+    id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    partitions INTEGER NOT NULL,
+    last_book_id INTEGER NOT NULL DEFAULT 0,
+    rows_copied BIGINT NOT NULL DEFAULT 0,
+    status VARCHAR(20) NOT NULL DEFAULT 'copying',
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+# コピー済みのブックに後から入った書き込みを swap 時に再同期するための記録
+DIRTY_BOOKS_SQL = """
+CREATE TABLE IF NOT EXISTS vocab_partition_dirty_books (
+    book_id INTEGER PRIMARY KEY
+);
+
+CREATE OR REPLACE FUNCTION record_partition_dirty_book()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO vocab_partition_dirty_books (book_id) VALUES (OLD.book_id) ON CONFLICT DO NOTHING;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO vocab_partition_dirty_books (book_id) VALUES (NEW.book_id) ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS record_partition_dirty_book ON vocabulary_questions;
+CREATE TRIGGER record_partition_dirty_book
+    AFTER INSERT OR UPDATE OR DELETE ON vocabulary_questions
+    FOR EACH ROW EXECUTE FUNCTION record_partition_dirty_book();
+"""
+
+COPY_BATCH_SQL = """
+WITH batch AS (
+    SELECT id FROM vocabulary_books
+    WHERE id > %(last_book_id)s
+    ORDER BY id
+    LIMIT %(batch_books)s
+), copied AS (
+    INSERT INTO vocabulary_questions_partitioned
+    SELECT q.* FROM vocabulary_questions q
+    WHERE q.book_id IN (SELECT id FROM batch)
+    RETURNING 1
+)
+SELECT (SELECT MAX(id) FROM batch), (SELECT COUNT(*) FROM copied)
+"""
+
+RESYNC_DIRTY_BOOKS_SQL = """
+WITH cleared AS (
+    DELETE FROM vocabulary_questions_partitioned
+    WHERE book_id IN (SELECT book_id FROM vocab_partition_dirty_books)
+)
+INSERT INTO vocabulary_questions_partitioned
+SELECT q.* FROM vocabulary_questions q
+WHERE q.book_id IN (SELECT book_id FROM vocab_partition_dirty_books)
+"""
+
+
+def is_partitioned(cursor):
+    cursor.execute("""
+        SELECT c.relkind = 'p'
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = current_schema() AND c.relname = %s
+    """, (SOURCE_TABLE,))
+    row = cursor.fetchone()
+    return bool(row and row[0])
+
+
+def table_exists(cursor, table):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+    return cursor.fetchone()[0]
+
+
+def get_progress(cursor):
+    if not table_exists(cursor, 'vocab_partition_progress'):
+        return None
+    cursor.execute("""
+        SELECT partitions, last_book_id, rows_copied, status, started_at, updated_at
+        FROM vocab_partition_progress WHERE id = 1
+    """)
+    row = cursor.fetchone()
+    if not row:
+        return None
+    return {
+        'partitions': row[0],
+        'last_book_id': row[1],
+        'rows_copied': row[2],
+        'status': row[3],
+        'started_at': row[4],
+        'updated_at': row[5]
+    }
+
+
+def source_indexes(cursor):
+    """旧テーブルの主キー以外のインデックス定義 [(name, definition, is_unique)]"""
+    cursor.execute("""
+        SELECT c.relname, pg_get_indexdef(i.indexrelid), i.indisunique
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = %s::regclass AND NOT i.indisprimary
+        ORDER BY c.relname
+    """, (SOURCE_TABLE,))
+    return cursor.fetchall()
+
+
+def source_triggers(cursor):
+    """旧テーブルのトリガー定義（移行用の記録トリガーは除く）"""
+    cursor.execute("""
+        SELECT tgname, pg_get_triggerdef(oid)
+        FROM pg_trigger
+        WHERE tgrelid = %s::regclass AND NOT tgisinternal AND tgname <> 'record_partition_dirty_book'
+        ORDER BY tgname
+    """, (SOURCE_TABLE,))
+    return cursor.fetchall()
+
+
+def prepare_partitions(conn, partitions):
+    """パーティションテーブル（空）を作成し、旧テーブルと同じインデックスを付ける（トリガーは swap で付ける）"""
+    cursor = conn.cursor()
+    if is_partitioned(cursor):
+        return {'step': 'prepare', 'status': 'already_partitioned'}
+
+    conn.autocommit = False
+    try:
+        cursor.execute(PROGRESS_SQL)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {TARGET_TABLE} (
+                LIKE {SOURCE_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+                PRIMARY KEY (id, book_id),
+                FOREIGN KEY (book_id) REFERENCES vocabulary_books(id) ON DELETE CASCADE
+            ) PARTITION BY HASH (book_id)
+        """)
+        for remainder in range(partitions):
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {SOURCE_TABLE}_p{remainder:02d}
+                PARTITION OF {TARGET_TABLE}
+                FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})
+            """)
+
+        # インデックスは親に作ると各パーティションに作られる（空のうちに作っておく）
+        skipped_indexes = []
+        for name, definition, is_unique in source_indexes(cursor):
+            if is_unique:
+                # パーティションキーを含まない一意インデックスは作れない
+                skipped_indexes.append(name)
+                continue
+            definition = definition.replace(f' INDEX {name} ON ', f' INDEX IF NOT EXISTS {name}_part ON ', 1)
+            definition = definition.replace(f' ON public.{SOURCE_TABLE} ', f' ON public.{TARGET_TABLE} ', 1)
+            definition = definition.replace(f' ON ONLY public.{SOURCE_TABLE} ', f' ON public.{TARGET_TABLE} ', 1)
+            cursor.execute(definition)
+
+        cursor.execute(DIRTY_BOOKS_SQL)
+        cursor.execute("""
+            INSERT INTO vocab_partition_progress (id, partitions) VALUES (1, %s)
+            ON CONFLICT (id) DO NOTHING
+        """, (partitions,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.autocommit = True
+
+    return {
+        'step': 'prepare',
+        'status': 'prepared',
+        'partitions': partitions,
+        'skipped_unique_indexes': skipped_indexes
+    }
+
+
+def copy_batches(conn, max_seconds=DEFAULT_COPY_SECONDS, batch_books=COPY_BATCH_BOOKS):
+    """book_id 順にバッチでコピー。バッチごとにコミットし、時間切れなら途中の進捗を返す"""
+    cursor = conn.cursor()
+    progress = get_progress(cursor)
+    if not progress:
+        raise ValueError("Run the prepare step first")
+    if progress['status'] != 'copying':
+        return {'step': 'copy', **progress}
+
+    deadline = time.monotonic() + max_seconds
+    conn.autocommit = False
+    try:
+        while time.monotonic() < deadline:
+            cursor.execute(COPY_BATCH_SQL, {
+                'last_book_id': progress['last_book_id'],
+                'batch_books': batch_books
+            })
+            last_book_id, copied = cursor.fetchone()
+            if last_book_id is None:
+                cursor.execute("""
+                    UPDATE vocab_partition_progress
+                    SET status = 'copied', updated_at = CURRENT_TIMESTAMP
+                    WHERE id = 1
+                """)
+                conn.commit()
+                progress['status'] = 'copied'
+                break
+
+            # 記録済みのブックは消さない（コピーと記録の間に入った書き込みを取りこぼさないため）
+            cursor.execute("""
+                UPDATE vocab_partition_progress
+                SET last_book_id = %s, rows_copied = rows_copied + %s, updated_at = CURRENT_TIMESTAMP
+                WHERE id = 1
+            """, (last_book_id, copied))
+            conn.commit()
+            progress['last_book_id'] = last_book_id
+            progress['rows_copied'] += copied
+            print(f"Copied books up to {last_book_id} ({progress['rows_copied']} rows)")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.autocommit = True
+
+    return {'step': 'copy', **progress}
+
+
+def swap_tables(conn):
+    """差分を再同期してテーブル名を入れ替える（ロック取得できなければ何も変えずに失敗）"""
+    cursor = conn.cursor()
+    progress = get_progress(cursor)
+    if not progress or progress['status'] != 'copied':
+        raise ValueError("The copy step has not finished")
+
+    conn.autocommit = False
+    try:
+        cursor.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'")
+        cursor.execute(f"LOCK TABLE {SOURCE_TABLE} IN ACCESS EXCLUSIVE MODE")
+
+        # copy 中にコピー済みブックへ入った書き込みと、copy 後に作られたブックを取り込む
+        cursor.execute("""
+            INSERT INTO vocab_partition_dirty_books (book_id)
+            SELECT id FROM vocabulary_books WHERE id > %s
+            ON CONFLICT DO NOTHING
+        """, (progress['last_book_id'],))
+        cursor.execute(RESYNC_DIRTY_BOOKS_SQL)
+        resynced = cursor.rowcount
+
+        # トリガーはコピーが終わってから付ける（件数を保守するトリガーがコピー分を二重に数えないように）
+        for name, definition in source_triggers(cursor):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name} ON {TARGET_TABLE}")
+            cursor.execute(definition.replace(f' ON public.{SOURCE_TABLE} ', f' ON public.{TARGET_TABLE} ', 1))
+
+        cursor.execute(f"DROP TRIGGER IF EXISTS record_partition_dirty_book ON {SOURCE_TABLE}")
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", (SOURCE_TABLE,))
+        sequence = cursor.fetchone()[0]
+
+        # インデックス名を元の名前に揃える（旧テーブル側は _old を付けて残す）
+        for name, _, is_unique in source_indexes(cursor):
+            cursor.execute(f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_old")
+            if not is_unique:
+                cursor.execute(f"ALTER INDEX IF EXISTS {name}_part RENAME TO {name}")
+        cursor.execute(f"ALTER TABLE {SOURCE_TABLE} RENAME CONSTRAINT {SOURCE_TABLE}_pkey TO {OLD_TABLE}_pkey")
+        cursor.execute(f"ALTER TABLE {SOURCE_TABLE} RENAME TO {OLD_TABLE}")
+        cursor.execute(f"ALTER TABLE {TARGET_TABLE} RENAME TO {SOURCE_TABLE}")
+        cursor.execute(f"ALTER TABLE {SOURCE_TABLE} RENAME CONSTRAINT {TARGET_TABLE}_pkey TO {SOURCE_TABLE}_pkey")
+        # 旧テーブルを削除しても id のシーケンスが消えないよう所有者を移す
+        if sequence:
+            cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {SOURCE_TABLE}.id")
+
+        cursor.execute("""
+            UPDATE vocab_partition_progress
+            SET status = 'swapped', updated_at = CURRENT_TIMESTAMP
+            WHERE id = 1
+        """)
+        cursor.execute("DROP TABLE vocab_partition_dirty_books")
+        cursor.execute("DROP FUNCTION IF EXISTS record_partition_dirty_book()")
+        conn.commit()
+    except psycopg2.errors.LockNotAvailable:
+        conn.rollback()
+        return {'step': 'swap', 'status': 'lock_timeout', 'message': 'Retry when traffic is lower'}
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.autocommit = True
+
+    cursor.execute(f"ANALYZE {SOURCE_TABLE}")
+    return {'step': 'swap', 'status': 'swapped', 'resynced_rows': resynced}
+
+
+def drop_old_table(conn):
+    """入れ替え後に残した旧テーブルを削除"""
+    cursor = conn.cursor()
+    progress = get_progress(cursor)
+    if not progress or progress['status'] != 'swapped':
+        raise ValueError("The swap step has not finished")
+    cursor.execute(f"DROP TABLE IF EXISTS {OLD_TABLE}")
+    cursor.execute("DROP TABLE vocab_partition_progress")
+    return {'step': 'drop_old', 'status': 'done'}
+
+
+def partition_questions(conn, step, partitions=DEFAULT_PARTITIONS, max_seconds=DEFAULT_COPY_SECONDS):
+    """パーティション移行の1ステップを実行して結果を返す"""
+    if step == 'prepare':
+        return prepare_partitions(conn, partitions)
+    if step == 'copy':
+        return copy_batches(conn, max_seconds=max_seconds)
+    if step == 'swap':
+        return swap_tables(conn)
+    if step == 'drop_old':
+        return drop_old_table(conn)
+    if step == 'status':
+        cursor = conn.cursor()
+        return {
+            'step': 'status',
+            'partitioned': is_partitioned(cursor),
+            'progress': get_progress(cursor)
+        }
+    raise ValueError("step must be prepare, copy, swap, drop_old or status")
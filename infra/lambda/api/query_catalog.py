@@ -0,0 +1,58 @@
+from get_vocab import LIST_BOOKS_SQL, GET_BOOK_SQL, LIST_LESSONS_SQL, AVAILABLE_FIELDS_SQL, build_questions_query
+from create_vocab import INSERT_BOOK_SQL, BOOK_EXISTS_SQL, INSERT_QUESTION_SQL
+from update_vocab import UPDATE_BOOK_SQL, UPDATE_QUESTION_SQL
+from book_archive import RECORD_ACCESS_SQL, GET_ARCHIVE_SQL, FIND_ARCHIVE_FOR_QUESTION_SQL
+
+
+def sample_values(cursor):
+    """EXPLAIN用のサンプル値（質問を持つ実在のブック・質問ID）"""
+    cursor.execute("SELECT book_id, id FROM vocabulary_questions ORDER BY id DESC LIMIT 1")
+    row = cursor.fetchone()
+    if not row:
+        return {'book_id': 1, 'question_id': 1}
+
+    return {'book_id': row[0], 'question_id': row[1]}
+
+
+def handler_queries(cursor):
+    """
+    API ハンドラー（get_vocab / create_vocab / update_vocab）が発行するSQLの一覧
+    各要素: name, handler, sql, params, writes（書き込み文はANALYZE時にロールバックが必要）
+    """
+    sample = sample_values(cursor)
+    book_id = sample['book_id']
+    question_id = sample['question_id']
+
+    list_questions_sql, list_questions_params = build_questions_query(book_id, [], 50, 0)
+    tagged_questions_sql, tagged_questions_params = build_questions_query(book_id, ['S3'], 50, 0)
+
+    return [
+        {'name': 'list_books', 'handler': 'get_vocab', 'writes': False,
+         'sql': LIST_BOOKS_SQL, 'params': (50, 0)},
+        {'name': 'get_book', 'handler': 'get_vocab', 'writes': False,
+         'sql': GET_BOOK_SQL, 'params': (book_id,)},
+        {'name': 'list_questions', 'handler': 'get_vocab', 'writes': False,
+         'sql': list_questions_sql, 'params': list_questions_params},
+        {'name': 'list_questions_by_tag', 'handler': 'get_vocab', 'writes': False,
+         'sql': tagged_questions_sql, 'params': tagged_questions_params},
+        {'name': 'list_lessons', 'handler': 'get_vocab', 'writes': False,
+         'sql': LIST_LESSONS_SQL, 'params': (book_id,)},
+        {'name': 'available_fields', 'handler': 'get_vocab', 'writes': False,
+         'sql': AVAILABLE_FIELDS_SQL, 'params': (book_id,)},
+        {'name': 'get_archive', 'handler': 'get_vocab', 'writes': False,
+         'sql': GET_ARCHIVE_SQL, 'params': (book_id,)},
+        {'name': 'record_access', 'handler': 'get_vocab', 'writes': True,
+         'sql': RECORD_ACCESS_SQL, 'params': (book_id,)},
+        {'name': 'create_book', 'handler': 'create_vocab', 'writes': True,
+         'sql': INSERT_BOOK_SQL, 'params': ('plan check', '', 'N4', 'JP-NP')},
+        {'name': 'book_exists', 'handler': 'create_vocab', 'writes': False,
+         'sql': BOOK_EXISTS_SQL, 'params': (book_id,)},
+        {'name': 'create_question', 'handler': 'create_vocab', 'writes': True,
+         'sql': INSERT_QUESTION_SQL, 'params': (book_id, 1, 'घर', '家', 'いえ', '', '', '', '{}')},
+        {'name': 'update_book', 'handler': 'update_vocab', 'writes': True,
+         'sql': UPDATE_BOOK_SQL.format(assignments='description = %s'), 'params': ('plan check', book_id)},
+        {'name': 'update_question', 'handler': 'update_vocab', 'writes': True,
+         'sql': UPDATE_QUESTION_SQL.format(assignments='np1 = %s'), 'params': ('घर', question_id)},
+        {'name': 'find_archive_for_question', 'handler': 'update_vocab', 'writes': False,
+         'sql': FIND_ARCHIVE_FOR_QUESTION_SQL, 'params': (question_id,)},
+    ]
@@ -0,0 +1,280 @@
+import hashlib
+import os
+import re
+import time
+from collections import namedtuple
+
+import psycopg2
+import psycopg2.errors
+
+# マイグレーションファイル: migrations/NNNN_name.sql（番号順に適用）
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d{4})_([a-z0-9_]+)\.sql$')
+
+# ファイル先頭にこの行があるとトランザクション外で実行（CREATE INDEX CONCURRENTLY 用）
+# パーティション化されたテーブルには CONCURRENTLY で作れないので、親に ON ONLY で作ってから
+# 各パーティションに CONCURRENTLY で作って ATTACH する（build_partitioned_index）
+NO_TRANSACTION_DIRECTIVE = '-- migrate:no-transaction'
+
+# 複数の実行者（migrate Lambda, import Lambda, ローカルスクリプト）を直列化するアドバイザリロックのキー
+ADVISORY_LOCK_KEY = 4242031
+
+# ロック待ちで本番の読み取りを詰まらせないよう、短いlock_timeoutで諦めてリトライする
+LOCK_TIMEOUT = '3s'
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF_SECONDS = 2
+
+CONCURRENT_INDEX_PATTERN = re.compile(
+    r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)',
+    re.IGNORECASE
+)
+
+# CREATE [UNIQUE] INDEX CONCURRENTLY [IF NOT EXISTS] name ON [ONLY] table 以降（USING・列・WHERE など）
+CONCURRENT_INDEX_STATEMENT = re.compile(
+    r'CREATE\s+(UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s+'
+    r'ON\s+(?:ONLY\s+)?(\w+)\s+(.*?);?\s*$',
+    re.IGNORECASE | re.DOTALL
+)
+
+# PostgreSQL の識別子の最大長
+MAX_IDENTIFIER_LENGTH = 63
+
+LEDGER_SQL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    checksum TEXT NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    duration_ms INTEGER
+)
+"""
+
+Migration = namedtuple('Migration', ['version', 'name', 'sql', 'transactional', 'checksum'])
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """マイグレーションファイルを番号順に読み込む"""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+            sql = f.read()
+        transactional = not sql.lstrip().startswith(NO_TRANSACTION_DIRECTIVE)
+        if not transactional:
+            check_single_statement(filename, sql)
+        migrations.append(Migration(
+            version=int(match.group(1)),
+            name=match.group(2),
+            sql=sql,
+            transactional=transactional,
+            checksum=hashlib.sha256(sql.encode('utf-8')).hexdigest()
+        ))
+
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+def check_single_statement(filename, sql):
+    """トランザクション外のマイグレーションは1ファイル1文（複数文は暗黙のトランザクションになるため）"""
+    body = '\n'.join(line for line in sql.splitlines() if not line.strip().startswith('--'))
+    if ';' in body.strip().rstrip(';'):
+        raise ValueError(f"{filename}: no-transaction migrations must contain a single statement")
+
+
+def applied_migrations(cursor):
+    """適用済みマイグレーション {version: checksum}"""
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return dict(cursor.fetchall())
+
+
+def acquire_migration_lock(cursor):
+    """他の実行者が終わるのを待ってアドバイザリロックを取得"""
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", (ADVISORY_LOCK_KEY,))
+        if cursor.fetchone()[0]:
+            return
+        print(f"⏳ Another migration run holds the lock (attempt {attempt}/{MAX_ATTEMPTS})")
+        time.sleep(RETRY_BACKOFF_SECONDS * attempt)
+    raise RuntimeError("Another migration run is in progress")
+
+
+def drop_invalid_concurrent_index(cursor, sql):
+    """失敗したCREATE INDEX CONCURRENTLYが残したINVALIDインデックスを削除（IF NOT EXISTSで素通りされるため）"""
+    match = CONCURRENT_INDEX_PATTERN.search(sql)
+    if not match:
+        return
+    index_name = match.group(1)
+    cursor.execute("""
+        SELECT 1
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relname = %s AND n.nspname = current_schema() AND NOT i.indisvalid
+    """, (index_name,))
+    if cursor.fetchone():
+        print(f"🧹 Dropping invalid index {index_name} left by an earlier attempt")
+        cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}"')
+
+
+def partitions_of(cursor, table):
+    """パーティション化されたテーブルなら直下のパーティション [(名前, パーティション化されているか)]、そうでなければ None"""
+    cursor.execute("""
+        SELECT c.relkind = 'p'
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relname = %s AND n.nspname = current_schema()
+    """, (table,))
+    row = cursor.fetchone()
+    if not row or not row[0]:
+        return None
+    cursor.execute("""
+        SELECT child.relname, child.relkind = 'p'
+        FROM pg_inherits inh
+        JOIN pg_class child ON child.oid = inh.inhrelid
+        WHERE inh.inhparent = %s::regclass
+        ORDER BY child.relname
+    """, (table,))
+    return cursor.fetchall()
+
+
+def build_partitioned_index(cursor, unique, index_name, table, definition):
+    """
+    パーティション化されたテーブルへの CREATE INDEX CONCURRENTLY の代わり
+    親に ON ONLY でインデックスを作り（一瞬で終わる・全パーティションがつながるまで INVALID）、
+    各パーティションに CONCURRENTLY で作って ATTACH する。どの手順も繰り返し実行できる
+    """
+    kind = 'UNIQUE INDEX' if unique else 'INDEX'
+    cursor.execute(f'CREATE {kind} IF NOT EXISTS "{index_name}" ON ONLY "{table}" {definition}')
+    for partition, is_partitioned in partitions_of(cursor, table):
+        partition_index = f"{partition}_{index_name}"[:MAX_IDENTIFIER_LENGTH]
+        if is_partitioned:
+            # サブパーティションを持つパーティションは同じ手順で下から作る
+            build_partitioned_index(cursor, unique, partition_index, partition, definition)
+        else:
+            drop_invalid_concurrent_index(cursor, f"CREATE INDEX CONCURRENTLY {partition_index}")
+            cursor.execute(
+                f'CREATE {kind} CONCURRENTLY IF NOT EXISTS "{partition_index}" ON "{partition}" {definition}'
+            )
+        # すでにつながっていれば何もしない
+        cursor.execute(f'ALTER INDEX "{index_name}" ATTACH PARTITION "{partition_index}"')
+
+
+def run_concurrent_index(cursor, sql):
+    """CREATE INDEX CONCURRENTLY を実行（対象がパーティション化されていればパーティションごとに作る）"""
+    body = '\n'.join(line for line in sql.splitlines() if not line.strip().startswith('--'))
+    match = CONCURRENT_INDEX_STATEMENT.search(body)
+    if match and partitions_of(cursor, match.group(3)) is not None:
+        unique, index_name, table, definition = match.groups()
+        print(f"🧩 {table} is partitioned: building {index_name} partition by partition")
+        build_partitioned_index(cursor, bool(unique), index_name, table, definition)
+        return
+    drop_invalid_concurrent_index(cursor, sql)
+    cursor.execute(sql)
+
+
+def record_migration(cursor, migration, duration_ms):
+    cursor.execute("""
+        INSERT INTO schema_migrations (version, name, checksum, duration_ms)
+        VALUES (%s, %s, %s, %s)
+    """, (migration.version, migration.name, migration.checksum, duration_ms))
+
+
+def run_migration(conn, migration):
+    """1つのマイグレーションを実行。ロック取得に失敗したらバックオフしてリトライ"""
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        started = time.monotonic()
+        try:
+            if migration.transactional:
+                # DDLとレジャー記録を同じトランザクションでコミット
+                conn.autocommit = False
+                cursor = conn.cursor()
+                cursor.execute(migration.sql)
+                record_migration(cursor, migration, int((time.monotonic() - started) * 1000))
+                conn.commit()
+            else:
+                conn.autocommit = True
+                cursor = conn.cursor()
+                run_concurrent_index(cursor, migration.sql)
+                record_migration(cursor, migration, int((time.monotonic() - started) * 1000))
+            return int((time.monotonic() - started) * 1000)
+        except psycopg2.errors.LockNotAvailable:
+            if not conn.autocommit:
+                conn.rollback()
+            if attempt == MAX_ATTEMPTS:
+                raise
+            print(f"🔒 {migration.version:04d}_{migration.name}: lock_timeout hit, "
+                  f"retrying ({attempt}/{MAX_ATTEMPTS})")
+            time.sleep(RETRY_BACKOFF_SECONDS * attempt)
+        except Exception:
+            if not conn.autocommit:
+                conn.rollback()
+            raise
+        finally:
+            conn.autocommit = True
+
+
+def apply_migrations(conn, migrations=None):
+    """未適用のマイグレーションを番号順に適用し、適用したものを返す"""
+    migrations = migrations if migrations is not None else load_migrations()
+    original_autocommit = conn.autocommit
+    conn.autocommit = True
+    cursor = conn.cursor()
+    applied = []
+
+    try:
+        cursor.execute(f"SET lock_timeout = '{LOCK_TIMEOUT}'")
+        acquire_migration_lock(cursor)
+        try:
+            cursor.execute(LEDGER_SQL)
+            done = applied_migrations(cursor)
+            for migration in migrations:
+                if migration.version in done:
+                    if done[migration.version] != migration.checksum:
+                        print(f"⚠️ {migration.version:04d}_{migration.name} changed after it was applied")
+                    continue
+                duration_ms = run_migration(conn, migration)
+                print(f"✓ Applied {migration.version:04d}_{migration.name} ({duration_ms} ms)")
+                applied.append({
+                    'version': migration.version,
+                    'name': migration.name,
+                    'transactional': migration.transactional,
+                    'duration_ms': duration_ms
+                })
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (ADVISORY_LOCK_KEY,))
+            cursor.execute("RESET lock_timeout")
+    finally:
+        conn.autocommit = original_autocommit
+
+    return applied
+
+
+def migration_status(conn, migrations=None):
+    """各マイグレーションの適用状況（未適用・適用後の変更も含む）"""
+    migrations = migrations if migrations is not None else load_migrations()
+    cursor = conn.cursor()
+    cursor.execute(LEDGER_SQL)
+    cursor.execute("SELECT version, checksum, applied_at, duration_ms FROM schema_migrations")
+    ledger = {row[0]: row[1:] for row in cursor.fetchall()}
+
+    status = []
+    for migration in migrations:
+        entry = {
+            'version': migration.version,
+            'name': migration.name,
+            'transactional': migration.transactional,
+            'applied': migration.version in ledger
+        }
+        if migration.version in ledger:
+            checksum, applied_at, duration_ms = ledger[migration.version]
+            entry.update({
+                'applied_at': applied_at,
+                'duration_ms': duration_ms,
+                'modified_since_applied': checksum != migration.checksum
+            })
+        status.append(entry)
+    return status
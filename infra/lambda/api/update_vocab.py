@@ -1,13 +1,75 @@
 import json
+import time
 import psycopg2
-from db_utils import get_db_connection, lambda_response, handle_db_error
+from db_utils import get_db_connection, lambda_response, handle_db_error, transaction
+from book_archive import restore_book_for_question, restore_books
+
+# ハンドラーが発行するSQL（{assignments} は更新対象フィールドから組み立てる）
+UPDATE_BOOK_SQL = """
+    UPDATE vocabulary_books 
+    SET {assignments}, updated_at = CURRENT_TIMESTAMP
+    WHERE id = %s
+    RETURNING id, name, description, level, language_pair, created_at, updated_at
+"""
+
+UPDATE_QUESTION_SQL = """
+    UPDATE vocabulary_questions 
+    SET {assignments}, updated_at = CURRENT_TIMESTAMP
+    WHERE id = %s
+    RETURNING id, book_id, ka, np1, jp_kanji, jp_rubi,
+              nepali_sentence, japanese_question, japanese_example, extra_data, created_at, updated_at
+"""
+
+# 一括操作の対象ブックをID順にロック（同時に実行される統合・削除とのデッドロックを避ける）
+LOCK_BOOKS_SQL = """
+    SELECT id FROM vocabulary_books
+    WHERE id = ANY(%s)
+    ORDER BY id
+    FOR UPDATE
+"""
+
+MAX_KA_SQL = "SELECT COALESCE(MAX(ka), 0) FROM vocabulary_questions WHERE book_id = %s"
+
+# 統合: 質問を統合先へ1文で移動（件数はトリガーが移動元・統合先の両方で調整する）
+MERGE_QUESTIONS_SQL = """
+    UPDATE vocabulary_questions
+    SET book_id = %s, ka = ka + %s
+    WHERE book_id = %s
+"""
+
+DELETE_BOOKS_SQL = "DELETE FROM vocabulary_books WHERE id = ANY(%s)"
+
+# 課番号の移動: 範囲内の課を一律にずらす
+SHIFT_LESSONS_SQL = """
+    UPDATE vocabulary_questions
+    SET ka = ka + %s
+    WHERE book_id = %s AND ka BETWEEN %s AND %s
+"""
+
+# 課番号の詰め直し: 範囲内の課を ka_from からの連番にする（変わらない行は更新しない）
+COMPACT_LESSONS_SQL = """
+    UPDATE vocabulary_questions q
+    SET ka = r.new_ka
+    FROM (
+        SELECT ka, %s - 1 + dense_rank() OVER (ORDER BY ka) AS new_ka
+        FROM (
+            SELECT DISTINCT ka FROM vocabulary_questions
+            WHERE book_id = %s AND ka BETWEEN %s AND %s
+        ) lessons
+    ) r
+    WHERE q.book_id = %s AND q.ka = r.ka AND q.ka <> r.new_ka
+"""
+
+# 課の範囲を省略したときの上下限（ka は INTEGER）
+KA_MIN = 0
+KA_MAX = 2147483647
 
 def lambda_handler(event, context):
     """
     語彙データ更新テスト用Lambda関数
     PUT /vocab
     {
-        "action": "update_book" | "update_question" | "update_scores",
+        "action": "update_book" | "update_question" | "merge_books" | "renumber_lessons",
         "data": {...}
     }
     """
@@ -37,12 +99,16 @@ def lambda_handler(event, context):
             return update_vocabulary_book(cursor, data)
         elif action == 'update_question':
             return update_vocabulary_question(cursor, data)
+        elif action == 'merge_books':
+            return merge_vocabulary_books(cursor, data)
+        elif action == 'renumber_lessons':
+            return renumber_lessons(cursor, data)
         elif action == 'test_update':
             return test_database_update(cursor)
         else:
             return lambda_response(400, {
                 'error': 'Invalid action',
-                'message': 'Action must be update_book, update_question, or test_update'
+                'message': 'Action must be update_book, update_question, merge_books, renumber_lessons, or test_update'
             })
     
     except psycopg2.Error as e:
@@ -88,12 +154,7 @@ def update_vocabulary_book(cursor, data):
     
     update_values.append(book_id)
     
-    cursor.execute(f"""
-        UPDATE vocabulary_books 
-        SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP
-        WHERE id = %s
-        RETURNING id, name, description, level, language_pair, created_at, updated_at
-    """, update_values)
+    cursor.execute(UPDATE_BOOK_SQL.format(assignments=', '.join(update_fields)), update_values)
     
     row = cursor.fetchone()
     if not row:
@@ -148,15 +209,14 @@ def update_vocabulary_question(cursor, data):
     
     update_values.append(question_id)
     
-    cursor.execute(f"""
-        UPDATE vocabulary_questions 
-        SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP
-        WHERE id = %s
-        RETURNING id, book_id, ka, np1, jp_kanji, jp_rubi,
-                  nepali_sentence, japanese_question, japanese_example, extra_data, created_at, updated_at
-    """, update_values)
+    cursor.execute(UPDATE_QUESTION_SQL.format(assignments=', '.join(update_fields)), update_values)
     
     row = cursor.fetchone()
+    if not row and restore_book_for_question(cursor.connection, question_id):
+        # アーカイブ済みブックの質問だった場合は復元してから更新し直す
+        cursor.execute(UPDATE_QUESTION_SQL.format(assignments=', '.join(update_fields)), update_values)
+        row = cursor.fetchone()
+    
     if not row:
         return lambda_response(404, {
             'error': 'Question not found',
@@ -184,6 +244,156 @@ def update_vocabulary_question(cursor, data):
     })
 
 
+def merge_vocabulary_books(cursor, data):
+    """
+    語彙ブックを統合（移動元ごとに UPDATE 1文、1トランザクション内で実行）
+    {
+        "target_book_id": 1,
+        "source_book_ids": [2, 3],
+        "append_lessons": true,   (移動元の課番号を統合先の最後の課の後ろに付け足す。省略時はそのまま)
+        "delete_sources": true    (空になった移動元ブックを削除。省略時は削除する)
+    }
+    """
+    target_book_id = data.get('target_book_id')
+    source_book_ids = data.get('source_book_ids') or []
+    if not target_book_id or not source_book_ids:
+        return lambda_response(400, {
+            'error': 'Missing required fields',
+            'message': 'Required fields: target_book_id, source_book_ids'
+        })
+    
+    try:
+        target_book_id = int(target_book_id)
+        source_book_ids = list(dict.fromkeys(int(book_id) for book_id in source_book_ids))
+    except (TypeError, ValueError):
+        return lambda_response(400, {
+            'error': 'Invalid books',
+            'message': 'target_book_id and source_book_ids must be integers'
+        })
+    if target_book_id in source_book_ids:
+        return lambda_response(400, {
+            'error': 'Invalid books',
+            'message': 'target_book_id must not be one of source_book_ids'
+        })
+    
+    append_lessons = bool(data.get('append_lessons', False))
+    delete_sources = bool(data.get('delete_sources', True))
+    book_ids = [target_book_id] + source_book_ids
+    
+    started = time.perf_counter()
+    
+    # アーカイブ済みのブックは先に復元する
+    restore_books(cursor.connection, book_ids)
+    
+    with transaction(cursor.connection) as tx:
+        tx.execute(LOCK_BOOKS_SQL, (book_ids,))
+        missing = sorted(set(book_ids) - {row[0] for row in tx.fetchall()})
+        if missing:
+            return lambda_response(404, {
+                'error': 'Book not found',
+                'message': f'Vocabulary books with ids {missing} do not exist'
+            })
+        
+        sources = []
+        for source_book_id in source_book_ids:
+            ka_offset = 0
+            if append_lessons:
+                tx.execute(MAX_KA_SQL, (target_book_id,))
+                ka_offset = tx.fetchone()[0]
+            tx.execute(MERGE_QUESTIONS_SQL, (target_book_id, ka_offset, source_book_id))
+            sources.append({
+                'book_id': source_book_id,
+                'moved_questions': tx.rowcount,
+                'ka_offset': ka_offset
+            })
+        
+        if delete_sources:
+            tx.execute(DELETE_BOOKS_SQL, (source_book_ids,))
+    
+    return lambda_response(200, {
+        'message': 'Vocabulary books merged successfully',
+        'target_book_id': target_book_id,
+        'sources': sources,
+        'moved_questions': sum(source['moved_questions'] for source in sources),
+        'deleted_books': source_book_ids if delete_sources else [],
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    })
+
+def renumber_lessons(cursor, data):
+    """
+    課番号を一括で振り直す（UPDATE 1文）
+    {
+        "book_id": 1,
+        "ka_from": 5, "ka_to": 10,   (省略時は全課)
+        "shift": 2                    (指定時: 範囲内の課を shift だけずらす / 省略時: ka_from からの連番に詰める)
+    }
+    """
+    book_id = data.get('book_id')
+    if not book_id:
+        return lambda_response(400, {
+            'error': 'Missing required field',
+            'message': 'book_id is required'
+        })
+    
+    try:
+        book_id = int(book_id)
+        ka_from = int(data.get('ka_from') or KA_MIN)
+        ka_to = int(data.get('ka_to') or KA_MAX)
+        shift = data.get('shift')
+        if shift is not None:
+            shift = int(shift)
+    except (TypeError, ValueError):
+        return lambda_response(400, {
+            'error': 'Invalid field',
+            'message': 'book_id, ka_from, ka_to and shift must be integers'
+        })
+    if ka_from > ka_to:
+        return lambda_response(400, {
+            'error': 'Invalid lesson range',
+            'message': 'ka_from must not be greater than ka_to'
+        })
+    
+    started = time.perf_counter()
+    
+    # アーカイブ済みのブックは先に復元する
+    restore_books(cursor.connection, [book_id])
+    
+    with transaction(cursor.connection) as tx:
+        tx.execute(LOCK_BOOKS_SQL, ([book_id],))
+        if not tx.fetchone():
+            return lambda_response(404, {
+                'error': 'Book not found',
+                'message': f'Vocabulary book with id {book_id} does not exist'
+            })
+        
+        if shift is not None:
+            tx.execute("""
+                SELECT MIN(ka) FROM vocabulary_questions
+                WHERE book_id = %s AND ka BETWEEN %s AND %s
+            """, (book_id, ka_from, ka_to))
+            lowest_ka = tx.fetchone()[0]
+            if lowest_ka is not None and lowest_ka + shift < 1:
+                return lambda_response(400, {
+                    'error': 'Invalid shift',
+                    'message': f'Lesson {lowest_ka} would be renumbered to {lowest_ka + shift}'
+                })
+            tx.execute(SHIFT_LESSONS_SQL, (shift, book_id, ka_from, ka_to))
+        else:
+            tx.execute(COMPACT_LESSONS_SQL, (max(ka_from, 1), book_id, ka_from, ka_to, book_id))
+        updated_questions = tx.rowcount
+    
+    return lambda_response(200, {
+        'message': 'Lessons renumbered successfully',
+        'book_id': book_id,
+        'mode': 'shift' if shift is not None else 'compact',
+        'ka_from': data.get('ka_from'),
+        'ka_to': data.get('ka_to'),
+        'shift': shift,
+        'updated_questions': updated_questions,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    })
+
+
 def test_database_update(cursor):
     """データベース更新のテスト"""
     # 最新の語彙ブックを取得
@@ -1,118 +1,261 @@
 import json
+import os
+import sys
+import time
+import uuid
+
 import psycopg2
+import psycopg2.errors
 import boto3
 
-def lambda_handler(event, context):
-    print("🧹 Starting cleanup of vocabulary books with fewer than 5 questions...")
-    
-    # Get database credentials from Secrets Manager
+# The schema migrations live with the API Lambdas (lambda/api), which this asset also contains
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+from schema_migrations import apply_migrations
+
+# Books deleted per transaction, and the budgets one run may spend before handing over to the next run
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_MAX_ROWS = 50000
+DEFAULT_MAX_SECONDS = 60
+
+# Give up on a batch rather than queue behind API writers holding row locks
+DEFAULT_LOCK_TIMEOUT_MS = 2000
+
+# Statement text is kept at module level so perf/plan_regression.py can EXPLAIN exactly what runs here.
+# Candidates come from the maintained vocabulary_books.question_count (migration 0004), in id order.
+# Archived books (0006) are left alone: their questions live in the archive, not in the hot table
+CANDIDATES_SQL = """
+    SELECT id, name, description, level, question_count
+    FROM vocabulary_books
+    WHERE question_count < %s AND id > %s AND archived_at IS NULL
+    ORDER BY id
+    LIMIT %s
+"""
+
+# Lock the batch without waiting on rows an API request is editing; the count is re-checked under the lock
+LOCK_BATCH_SQL = """
+    SELECT id, question_count
+    FROM vocabulary_books
+    WHERE id = ANY(%s) AND question_count < %s AND archived_at IS NULL
+    ORDER BY id
+    FOR UPDATE SKIP LOCKED
+"""
+
+DELETE_BOOKS_SQL = """
+    DELETE FROM vocabulary_books
+    WHERE id = ANY(%s)
+"""
+
+RESUMABLE_RUN_SQL = """
+    SELECT run_id, last_book_id, deleted_books, deleted_questions, lock_timeouts
+    FROM vocab_cleanup_runs
+    WHERE status = 'running' AND min_questions = %s
+    ORDER BY started_at DESC
+    LIMIT 1
+"""
+
+RECORD_PROGRESS_SQL = """
+    UPDATE vocab_cleanup_runs
+    SET last_book_id = %s, deleted_books = %s, deleted_questions = %s,
+        lock_timeouts = %s, status = %s, updated_at = CURRENT_TIMESTAMP
+    WHERE run_id = %s
+"""
+
+REMAINING_COUNTS_SQL = """
+    SELECT COUNT(*), COALESCE(SUM(question_count), 0) FROM vocabulary_books
+"""
+
+
+def connect_from_secret(secret_arn):
+    """Connect to the database using credentials from Secrets Manager"""
     secrets_client = boto3.client('secretsmanager')
-    secret_arn = event['secret_arn']
+    secret_response = secrets_client.get_secret_value(SecretId=secret_arn)
+    secret = json.loads(secret_response['SecretString'])
+
+    return psycopg2.connect(
+        host=secret['host'],
+        database=secret['dbname'],
+        user=secret['username'],
+        password=secret['password'],
+        port=secret['port']
+    )
+
+
+def start_or_resume_run(conn, min_questions, run_id=None):
+    """Resume the given run, or the latest unfinished run for this threshold, or start a new one"""
+    cursor = conn.cursor()
+    if run_id:
+        cursor.execute("""
+            SELECT run_id, last_book_id, deleted_books, deleted_questions, lock_timeouts
+            FROM vocab_cleanup_runs WHERE run_id = %s
+        """, (run_id,))
+    else:
+        cursor.execute(RESUMABLE_RUN_SQL, (min_questions,))
+    row = cursor.fetchone()
+
+    if row is None:
+        run_id = run_id or uuid.uuid4().hex
+        cursor.execute(
+            "INSERT INTO vocab_cleanup_runs (run_id, min_questions) VALUES (%s, %s)",
+            (run_id, min_questions)
+        )
+        row = (run_id, 0, 0, 0, 0)
+    conn.commit()
+
+    return dict(zip(['run_id', 'last_book_id', 'deleted_books', 'deleted_questions', 'lock_timeouts'], row))
+
+
+def record_progress(conn, run, status):
+    cursor = conn.cursor()
+    cursor.execute(RECORD_PROGRESS_SQL, (
+        run['last_book_id'], run['deleted_books'], run['deleted_questions'],
+        run['lock_timeouts'], status, run['run_id']
+    ))
+
+
+def find_candidates(conn, min_questions, after_book_id, limit):
+    cursor = conn.cursor()
+    cursor.execute(CANDIDATES_SQL, (min_questions, after_book_id, limit))
+    columns = ['id', 'name', 'description', 'level', 'question_count']
+    candidates = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    conn.commit()
+    return candidates
+
+
+def fit_row_budget(candidates, rows_left):
+    """Take candidates in order while their questions fit in the remaining row budget (at least one)"""
+    batch = []
+    rows = 0
+    for book in candidates:
+        if batch and rows + book['question_count'] > rows_left:
+            break
+        batch.append(book)
+        rows += book['question_count']
+    return batch
+
+
+def delete_batch(conn, run, batch, min_questions, lock_timeout_ms):
+    """Delete one batch in its own short transaction; returns the books actually deleted"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SET LOCAL lock_timeout = '{int(lock_timeout_ms)}ms'")
+        cursor.execute(LOCK_BATCH_SQL, ([book['id'] for book in batch], min_questions))
+        locked = dict(cursor.fetchall())
+
+        # Books that grew past the threshold since they were listed, or are locked by a writer, are skipped
+        deleted = [dict(book, question_count=locked[book['id']]) for book in batch if book['id'] in locked]
+        if deleted:
+            # CASCADE removes the questions; batches keep that work (and its locks) small
+            cursor.execute(DELETE_BOOKS_SQL, ([book['id'] for book in deleted],))
+
+        run['last_book_id'] = batch[-1]['id']
+        run['deleted_books'] += len(deleted)
+        run['deleted_questions'] += sum(book['question_count'] for book in deleted)
+        record_progress(conn, run, 'running')
+        conn.commit()
+        return deleted
+    except psycopg2.errors.LockNotAvailable:
+        conn.rollback()
+        run['lock_timeouts'] += 1
+        print(f"🔒 Batch after book {run['last_book_id']} hit lock_timeout, leaving it for the next run")
+        return None
+    except Exception:
+        # Release the batch's row locks instead of holding them in an aborted transaction
+        conn.rollback()
+        raise
+
+
+def lambda_handler(event, context):
     min_questions = event.get('min_questions', 5)  # Default to 5, can be overridden
-    
+    dry_run = event.get('dry_run', False)
+    batch_size = int(event.get('batch_size', DEFAULT_BATCH_SIZE))
+    max_rows = int(event.get('max_rows', DEFAULT_MAX_ROWS))
+    max_seconds = float(event.get('max_seconds', DEFAULT_MAX_SECONDS))
+    lock_timeout_ms = int(event.get('lock_timeout_ms', DEFAULT_LOCK_TIMEOUT_MS))
+
+    print(f"🧹 Starting cleanup of vocabulary books with fewer than {min_questions} questions...")
+
     try:
-        secret_response = secrets_client.get_secret_value(SecretId=secret_arn)
-        secret = json.loads(secret_response['SecretString'])
-        
-        # Connect to database
-        conn = psycopg2.connect(
-            host=secret['host'],
-            database=secret['dbname'],
-            user=secret['username'],
-            password=secret['password'],
-            port=secret['port']
-        )
-        cursor = conn.cursor()
-        
-        # Get books with question counts
-        cursor.execute("""
-            SELECT 
-                vb.id, 
-                vb.name, 
-                vb.description,
-                vb.level,
-                COUNT(vq.id) as question_count
-            FROM vocabulary_books vb
-            LEFT JOIN vocabulary_questions vq ON vb.id = vq.book_id
-            GROUP BY vb.id, vb.name, vb.description, vb.level
-            HAVING COUNT(vq.id) < %s
-            ORDER BY COUNT(vq.id) ASC, vb.name ASC
-        """, (min_questions,))
-        
-        books_to_delete = cursor.fetchall()
-        
-        if not books_to_delete:
-            print(f"✅ No books found with fewer than {min_questions} questions")
-            conn.close()
-            return {
-                'statusCode': 200,
-                'body': json.dumps({
-                    'message': f'No books found with fewer than {min_questions} questions',
-                    'deleted_books': [],
-                    'deleted_count': 0
-                })
-            }
-        
-        print(f"📊 Found {len(books_to_delete)} books with fewer than {min_questions} questions:")
-        deleted_books = []
-        
-        for book_id, name, description, level, question_count in books_to_delete:
-            print(f"   - ID {book_id}: '{name}' ({level}) - {question_count} questions")
-            deleted_books.append({
-                'id': book_id,
-                'name': name,
-                'description': description,
-                'level': level,
-                'question_count': question_count
-            })
-        
-        # If dry_run is specified, don't actually delete
-        if event.get('dry_run', False):
+        # Get database credentials from Secrets Manager and connect
+        conn = connect_from_secret(event['secret_arn'])
+
+        # Maintained question counts (0004) and the run table (0005) come from the migrations
+        apply_migrations(conn)
+
+        # If dry_run is specified, only list what the next run would delete
+        if dry_run:
+            candidates = find_candidates(conn, min_questions, 0, int(event.get('limit', 1000)))
+            for book in candidates:
+                print(f"   - ID {book['id']}: '{book['name']}' ({book['level']}) - {book['question_count']} questions")
             print("🔍 DRY RUN: Would delete the above books (no actual deletion performed)")
             conn.close()
             return {
                 'statusCode': 200,
                 'body': json.dumps({
-                    'message': f'DRY RUN: Found {len(books_to_delete)} books that would be deleted',
-                    'books_to_delete': deleted_books,
+                    'message': f'DRY RUN: Found {len(candidates)} books that would be deleted',
+                    'books_to_delete': candidates,
                     'deleted_count': 0,
                     'dry_run': True
                 })
             }
-        
-        # Delete the books (CASCADE will automatically delete associated questions)
-        book_ids = [book[0] for book in books_to_delete]
-        cursor.execute("""
-            DELETE FROM vocabulary_books 
-            WHERE id = ANY(%s)
-        """, (book_ids,))
-        
-        deleted_count = cursor.rowcount
+
+        run = start_or_resume_run(conn, min_questions, event.get('run_id'))
+        print(f"🧾 Cleanup run {run['run_id']} from book {run['last_book_id']}")
+
+        deadline = time.monotonic() + max_seconds
+        rows_left = max_rows
+        deleted_books = []
+        finished = False
+
+        while True:
+            if time.monotonic() >= deadline or rows_left <= 0:
+                print("⏳ Run budget reached, the next run resumes from here")
+                break
+
+            candidates = find_candidates(conn, min_questions, run['last_book_id'], batch_size)
+            if not candidates:
+                finished = True
+                break
+
+            batch = fit_row_budget(candidates, rows_left)
+            deleted = delete_batch(conn, run, batch, min_questions, lock_timeout_ms)
+            if deleted is None:
+                # Lock contention: stop and let the next scheduled run retry this batch
+                break
+
+            for book in deleted:
+                print(f"🗑️ ID {book['id']}: '{book['name']}' ({book['level']}) - {book['question_count']} questions")
+            deleted_books.extend(deleted)
+            rows_left -= sum(book['question_count'] for book in deleted)
+
+        record_progress(conn, run, 'done' if finished else 'running')
         conn.commit()
-        
-        print(f"🗑️ Successfully deleted {deleted_count} vocabulary books")
-        
-        # Get remaining books count
-        cursor.execute("SELECT COUNT(*) FROM vocabulary_books")
-        remaining_books = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM vocabulary_questions")
-        remaining_questions = cursor.fetchone()[0]
-        
+
+        cursor = conn.cursor()
+        cursor.execute(REMAINING_COUNTS_SQL)
+        remaining_books, remaining_questions = cursor.fetchone()
         conn.close()
-        
+
+        print(f"✅ Deleted {len(deleted_books)} books in this invocation "
+              f"({run['deleted_books']} in run {run['run_id']}, {'finished' if finished else 'to be resumed'})")
+
         return {
             'statusCode': 200,
             'body': json.dumps({
-                'message': f'Successfully deleted {deleted_count} vocabulary books with fewer than {min_questions} questions',
+                'message': f'Deleted {len(deleted_books)} vocabulary books with fewer than {min_questions} questions',
+                'run_id': run['run_id'],
+                'finished': finished,
                 'deleted_books': deleted_books,
-                'deleted_count': deleted_count,
+                'deleted_count': len(deleted_books),
+                'deleted_questions': sum(book['question_count'] for book in deleted_books),
+                'run_deleted_count': run['deleted_books'],
+                'run_deleted_questions': run['deleted_questions'],
+                'lock_timeouts': run['lock_timeouts'],
                 'remaining_books': remaining_books,
                 'remaining_questions': remaining_questions,
                 'min_questions_threshold': min_questions
             })
         }
-        
+
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         return {
@@ -120,4 +263,4 @@ def lambda_handler(event, context):
             'body': json.dumps({
                 'error': str(e)
             })
-        }
\ No newline at end of file
+        }
@@ -1,8 +1,8 @@
 import json
 import traceback
 from room_utils import (
-    table, generate_room_code, calculate_ttl, get_current_iso_time,
-    create_response, validate_quiz_config, validate_questions
+    put_room_with_new_code, RoomCodeExhaustedError, calculate_ttl, get_current_iso_time,
+    create_response, validate_quiz_config, validate_questions, MAX_ROOM_QUESTIONS, MAX_ROOM_TTL_HOURS
 )
 
 def lambda_handler(event, context):
@@ -14,7 +14,7 @@ def lambda_handler(event, context):
         "config": QuizConfig,
         "questions": QuizQuestion[],
         "createdBy": string,
-        "ttlHours": number (optional, default: 24)
+        "ttlHours": number (optional, default: 24, at most MAX_ROOM_TTL_HOURS)
     }
     
     Response:
@@ -59,13 +59,23 @@ def lambda_handler(event, context):
                 'error': 'Invalid quiz configuration'
             })
         
+        if isinstance(questions, list) and len(questions) > MAX_ROOM_QUESTIONS:
+            return create_response(400, {
+                'error': f'Too many questions (at most {MAX_ROOM_QUESTIONS} per room)'
+            })
+        
         if not validate_questions(questions):
             return create_response(400, {
                 'error': 'Invalid quiz questions'
             })
         
-        # Generate unique room code
-        room_code = generate_room_code()
+        # Roster items are written with the longest room lifetime as their TTL
+        if isinstance(ttl_hours, bool) or not isinstance(ttl_hours, (int, float)) \
+                or not 0 < ttl_hours <= MAX_ROOM_TTL_HOURS:
+            return create_response(400, {
+                'error': f'ttlHours must be between 0 and {MAX_ROOM_TTL_HOURS}'
+            })
+        
         current_time = get_current_iso_time()
         ttl = calculate_ttl(ttl_hours)
         
@@ -73,20 +83,25 @@ def lambda_handler(event, context):
         from datetime import datetime, timedelta
         expires_at = (datetime.utcnow() + timedelta(hours=ttl_hours)).isoformat() + 'Z'
         
-        # Create room item
+        # Create room metadata item (the room code is assigned when it is stored;
+        # the questions are stored as separate chunk items)
         room_item = {
-            'roomCode': room_code,
             'config': config,
-            'questions': questions,
             'createdAt': current_time,
             'expiresAt': expires_at,
             'createdBy': created_by,
-            'studentsJoined': [],
+            'studentsCount': 0,
             'ttl': ttl
         }
         
-        # Save to DynamoDB
-        table.put_item(Item=room_item)
+        # Save to DynamoDB under a code no other room holds
+        try:
+            room_code = put_room_with_new_code(room_item, questions)
+        except RoomCodeExhaustedError as e:
+            print(f"Error allocating room code: {e}")
+            return create_response(503, {
+                'error': 'Could not allocate a room code, please retry'
+            })
         
         return create_response(200, {
             'roomCode': room_code,
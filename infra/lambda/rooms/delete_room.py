@@ -1,7 +1,8 @@
 import json
 import traceback
 from room_utils import (
-    table, validate_room_code, create_response, get_room_item
+    table, room_key, validate_room_code, create_response, get_room_item,
+    invalidate_room_cache, delete_room_items
 )
 
 def lambda_handler(event, context):
@@ -52,23 +53,28 @@ def lambda_handler(event, context):
                 'error': 'Missing or empty createdBy'
             })
         
-        # Get room from DynamoDB
-        room_item = get_room_item(room_code)
-        
-        if not room_item:
-            return create_response(404, {
-                'error': 'Room not found'
-            })
-        
-        # Check if the user is authorized to delete the room
-        room_created_by = room_item.get('createdBy', '')
-        if room_created_by != created_by:
+        # Delete the room metadata in one conditional write; only the creator may delete it.
+        # Without it the room is gone for every reader, so the rest of the partition is cleared after.
+        try:
+            table.delete_item(
+                Key=room_key(room_code),
+                ConditionExpression='attribute_exists(roomCode) AND createdBy = :c',
+                ExpressionAttributeValues={':c': created_by}
+            )
+            invalidate_room_cache(room_code)
+        except table.meta.client.exceptions.ConditionalCheckFailedException:
+            # Only a failed condition reads the room, to tell not-found from not-authorized
+            if not get_room_item(room_code, ['createdBy']):
+                return create_response(404, {
+                    'error': 'Room not found'
+                })
             return create_response(403, {
                 'error': 'Not authorized to delete this room'
             })
         
-        # Delete room from DynamoDB
-        table.delete_item(Key={'roomCode': room_code})
+        # Question chunks, roster items and answer counters; whatever a failure here leaves
+        # behind is unreachable and still expires with its TTL
+        delete_room_items(room_code)
         
         return create_response(200, {
             'message': 'Room deleted successfully'
@@ -1,7 +1,8 @@
 import json
 import traceback
 from room_utils import (
-    validate_room_code, create_response, get_room_item, is_room_expired
+    validate_room_code, create_response, get_room_item, get_room_questions, is_room_expired,
+    get_cached_room_item, get_cached_room_questions
 )
 
 def lambda_handler(event, context):
@@ -9,10 +10,14 @@ def lambda_handler(event, context):
     Get quiz room by room code.
     
     Path parameter: roomCode
+    Query parameters:
+        page (optional) - return only that page of questions
+        view (optional) - "student": may be served from the container cache (a few seconds stale)
+        hideAnswers (optional) - "1" with view=student: omit correctAnswer (graded by POST .../answers)
     
     Response:
     {
-        "room": QuizRoom
+        "room": QuizRoom (with "questionPages"; "questionPage" when a page was requested)
     }
     """
     try:
@@ -32,8 +37,20 @@ def lambda_handler(event, context):
                 'error': 'Invalid room code format'
             })
         
-        # Get room from DynamoDB
-        room_item = get_room_item(room_code)
+        query_params = event.get('queryStringParameters') or {}
+        page = query_params.get('page')
+        if page is not None:
+            if not page.isdigit():
+                return create_response(400, {
+                    'error': 'Invalid page parameter'
+                })
+            page = int(page)
+        
+        # A class opening a shared code reads the same room at once; students get cached reads
+        student_view = query_params.get('view') == 'student'
+        
+        # Get room metadata from DynamoDB
+        room_item = get_cached_room_item(room_code) if student_view else get_room_item(room_code)
         
         if not room_item:
             return create_response(404, {
@@ -46,10 +63,25 @@ def lambda_handler(event, context):
                 'error': 'Room expired'
             })
         
-        # Remove TTL field from response (internal use only)
+        # Remove internal fields from response (TTL and sort key)
         response_room = dict(room_item)
-        if 'ttl' in response_room:
-            del response_room['ttl']
+        for field in ('ttl', 'sk'):
+            response_room.pop(field, None)
+        
+        # Questions are stored as chunk items; fetch all of them or just the requested page
+        if student_view:
+            questions = get_cached_room_questions(room_code, page)
+            if query_params.get('hideAnswers') == '1':
+                # Copies: the cached questions are shared with later requests
+                questions = [
+                    {field: value for field, value in question.items() if field != 'correctAnswer'}
+                    for question in questions
+                ]
+            response_room['questions'] = questions
+        else:
+            response_room['questions'] = get_room_questions(room_code, page)
+        if page is not None:
+            response_room['questionPage'] = page
         
         return create_response(200, {
             'room': response_room
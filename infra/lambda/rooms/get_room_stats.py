@@ -1,9 +1,12 @@
 import json
 import traceback
 from room_utils import (
-    validate_room_code, create_response, get_room_item, is_room_expired
+    validate_room_code, create_response, get_room_item, get_room_roster, get_answer_stats, is_room_expired
 )
 
+# The only metadata attributes this handler reads (the roster is read from the STUDENT# items)
+STATS_ATTRIBUTES = ['studentsCount', 'expiresAt', 'ttl']
+
 def lambda_handler(event, context):
     """
     Get quiz room statistics.
@@ -14,6 +17,8 @@ def lambda_handler(event, context):
     {
         "studentsCount": number,
         "studentsJoined": string[],
+        "scores": {studentName: {"score": number, "answered": number}} (students who submitted),
+        "answers": {"submissions", "answered", "correct", "questions": {questionId: {"attempts", "correct"}}},
         "expiresAt": string
     }
     """
@@ -35,7 +40,7 @@ def lambda_handler(event, context):
             })
         
         # Get room from DynamoDB
-        room_item = get_room_item(room_code)
+        room_item = get_room_item(room_code, STATS_ATTRIBUTES)
         
         if not room_item:
             return create_response(404, {
@@ -49,12 +54,17 @@ def lambda_handler(event, context):
             })
         
         # Extract statistics
-        students_joined = room_item.get('studentsJoined', [])
+        roster = get_room_roster(room_code)
         expires_at = room_item.get('expiresAt', '')
         
         return create_response(200, {
-            'studentsCount': len(students_joined),
-            'studentsJoined': students_joined,
+            'studentsCount': room_item.get('studentsCount', 0),
+            'studentsJoined': [student['studentName'] for student in roster],
+            'scores': {
+                student['studentName']: {'score': student['score'], 'answered': student.get('answered', 0)}
+                for student in roster if 'score' in student
+            },
+            'answers': get_answer_stats(room_code),
             'expiresAt': expires_at
         })
         
@@ -0,0 +1,91 @@
+import json
+import traceback
+from room_utils import (
+    validate_room_code, create_response, batch_get_room_items, is_room_expired
+)
+
+# Metadata attributes read per room (roomCode ties each item back to its request)
+BATCH_STATS_ATTRIBUTES = ['roomCode', 'studentsCount', 'expiresAt', 'ttl']
+
+MAX_ROOMS = 100
+
+def lambda_handler(event, context):
+    """
+    Get statistics of many quiz rooms in one request (teacher dashboards).
+    
+    Request body:
+    {
+        "roomCodes": string[] (at most 100)
+    }
+    
+    Response:
+    {
+        "rooms": {roomCode: {"studentsCount": number, "expiresAt": string}},
+        "notFound": string[] (missing or expired),
+        "unprocessed": string[] (throttled even after retries; ask again)
+    }
+    
+    Student names are not included; GET /room/{roomCode}/stats returns a room's roster.
+    """
+    try:
+        # Parse request body
+        if not event.get('body'):
+            return create_response(400, {
+                'error': 'Missing request body'
+            })
+        
+        try:
+            body = json.loads(event['body'])
+        except json.JSONDecodeError:
+            return create_response(400, {
+                'error': 'Invalid JSON in request body'
+            })
+        
+        room_codes = body.get('roomCodes')
+        if not isinstance(room_codes, list) or not room_codes or not all(isinstance(code, str) for code in room_codes):
+            return create_response(400, {
+                'error': 'roomCodes must be a non-empty list of room codes'
+            })
+        
+        # BatchGetItem rejects duplicate keys
+        room_codes = list(dict.fromkeys(code.upper() for code in room_codes))
+        if len(room_codes) > MAX_ROOMS:
+            return create_response(400, {
+                'error': f'At most {MAX_ROOMS} room codes per request'
+            })
+        
+        invalid = [code for code in room_codes if not validate_room_code(code)]
+        if invalid:
+            return create_response(400, {
+                'error': 'Invalid room code format',
+                'roomCodes': invalid
+            })
+        
+        items, unprocessed = batch_get_room_items(room_codes, BATCH_STATS_ATTRIBUTES)
+        
+        rooms = {}
+        not_found = []
+        for code in room_codes:
+            if code in unprocessed:
+                continue
+            room_item = items.get(code)
+            if not room_item or is_room_expired(room_item):
+                not_found.append(code)
+                continue
+            rooms[code] = {
+                'studentsCount': room_item.get('studentsCount', 0),
+                'expiresAt': room_item.get('expiresAt', '')
+            }
+        
+        return create_response(200, {
+            'rooms': rooms,
+            'notFound': not_found,
+            'unprocessed': unprocessed
+        })
+        
+    except Exception as e:
+        print(f"Error getting rooms stats: {e}")
+        print(f"Traceback: {traceback.format_exc()}")
+        return create_response(500, {
+            'error': 'Internal server error'
+        })
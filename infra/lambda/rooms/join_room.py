@@ -1,8 +1,8 @@
 import json
 import traceback
-from boto3.dynamodb.conditions import Key
 from room_utils import (
-    table, validate_room_code, create_response, get_room_item, is_room_expired
+    validate_room_code, create_response, invalidate_room_cache,
+    add_student, RoomNotFoundError, RoomExpiredError, MAX_STUDENT_NAME_LENGTH
 )
 
 def lambda_handler(event, context):
@@ -53,39 +53,30 @@ def lambda_handler(event, context):
                 'error': 'Missing or empty studentName'
             })
         
-        # Get room from DynamoDB
-        room_item = get_room_item(room_code)
-        
-        if not room_item:
-            return create_response(404, {
-                'error': 'Room not found'
+        if len(student_name) > MAX_STUDENT_NAME_LENGTH:
+            return create_response(400, {
+                'error': f'studentName must be at most {MAX_STUDENT_NAME_LENGTH} characters'
             })
         
-        # Check if room is expired
-        if is_room_expired(room_item):
+        # The student's roster item and the room's counter are written together, on condition that the
+        # room exists and has not expired; a student who already joined is rejected by the roster
+        # item's key (rejoining is not an error)
+        try:
+            joined = add_student(room_code, student_name)
+        except RoomExpiredError:
             return create_response(404, {
                 'error': 'Room expired'
             })
+        except RoomNotFoundError:
+            return create_response(404, {
+                'error': 'Room not found'
+            })
         
-        # Get current students list
-        students_joined = room_item.get('studentsJoined', [])
-        
-        # Add student if not already in the list
-        if student_name not in students_joined:
-            students_joined.append(student_name)
-            
-            # Update room in DynamoDB
-            table.update_item(
-                Key={'roomCode': room_code},
-                UpdateExpression='SET studentsJoined = :students',
-                ExpressionAttributeValues={
-                    ':students': students_joined
-                }
-            )
+        if joined:
+            invalidate_room_cache(room_code)
         
         return create_response(200, {
-            'message': 'Successfully joined room',
-            'studentsJoined': students_joined
+            'message': 'Successfully joined room' if joined else 'Already joined room'
         })
         
     except Exception as e:
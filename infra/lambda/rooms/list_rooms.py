@@ -0,0 +1,85 @@
+import time
+import traceback
+from boto3.dynamodb.conditions import Key, Attr
+from room_utils import (
+    table, CREATED_BY_INDEX, create_response, projection, encode_page_token, decode_page_token
+)
+
+# Attributes returned per room; the index holds only metadata items, so no question is read
+LIST_ATTRIBUTES = ['roomCode', 'config', 'createdAt', 'expiresAt', 'studentsCount', 'questionCount']
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+def lambda_handler(event, context):
+    """
+    List a teacher's live rooms, newest first.
+    
+    Query parameters:
+        createdBy (required)
+        limit (optional, default 20, max 100)
+        nextToken (optional) - from the previous page
+    
+    Response:
+    {
+        "rooms": [{roomCode, config, createdAt, expiresAt, studentsCount, questionCount}],
+        "nextToken": string | null
+    }
+    """
+    try:
+        query_params = event.get('queryStringParameters') or {}
+        created_by = (query_params.get('createdBy') or '').strip()
+        
+        if not created_by:
+            return create_response(400, {
+                'error': 'Missing createdBy query parameter'
+            })
+        
+        limit = query_params.get('limit', str(DEFAULT_LIMIT))
+        if not limit.isdigit() or not 1 <= int(limit) <= MAX_LIMIT:
+            return create_response(400, {
+                'error': f'limit must be between 1 and {MAX_LIMIT}'
+            })
+        limit = int(limit)
+        
+        kwargs = {
+            'IndexName': CREATED_BY_INDEX,
+            'KeyConditionExpression': Key('createdBy').eq(created_by),
+            # Expired rooms linger until TTL deletion gets to them
+            'FilterExpression': Attr('ttl').gt(int(time.time())),
+            **projection(LIST_ATTRIBUTES),
+            'ScanIndexForward': False
+        }
+        
+        next_token = query_params.get('nextToken')
+        if next_token:
+            start_key = decode_page_token(next_token)
+            # A token only continues the listing it came from
+            if not start_key or start_key.get('createdBy') != created_by:
+                return create_response(400, {
+                    'error': 'Invalid nextToken'
+                })
+            kwargs['ExclusiveStartKey'] = start_key
+        
+        # The filter is applied after Limit, so keep reading until the page is full or the index ends
+        rooms = []
+        last_evaluated_key = None
+        while True:
+            response = table.query(Limit=limit - len(rooms), **kwargs)
+            rooms.extend(response.get('Items', []))
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key or len(rooms) >= limit:
+                break
+            kwargs['ExclusiveStartKey'] = last_evaluated_key
+        
+        return create_response(200, {
+            'rooms': rooms,
+            'nextToken': encode_page_token(last_evaluated_key)
+        })
+        
+    except Exception as e:
+        print(f"Error listing rooms: {e}")
+        print(f"Traceback: {traceback.format_exc()}")
+        return create_response(500, {
+            'error': 'Internal server error'
+        })
@@ -1,30 +1,463 @@
+import base64
 import json
 import os
 import boto3
 import time
 import random
+import re
 import string
+import zlib
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from decimal import Decimal
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeSerializer
 
 # DynamoDB client
 dynamodb = boto3.resource('dynamodb')
 table_name = os.environ['QUIZ_ROOMS_TABLE']
 table = dynamodb.Table(table_name)
 
+# Table layout: one partition per room (roomCode), items told apart by the sort key (sk)
+#   META       config, roster and expiry; small, read by every handler
+#   Q#0000...  the questions in chunks of QUESTIONS_PER_CHUNK; read only by get_room
+#   STUDENT#.. one item per joined student; META keeps the count (studentsCount)
+#   ANSWERS    answer counters: room totals and attempts#<id>/correct#<id> per question
+META_SK = 'META'
+QUESTION_CHUNK_PREFIX = 'Q#'
+QUESTIONS_PER_CHUNK = 20
+STUDENT_PREFIX = 'STUDENT#'
+ANSWERS_SK = 'ANSWERS'
+ATTEMPTS_PREFIX = 'attempts#'
+CORRECT_PREFIX = 'correct#'
+
+# One submission updates up to two counters per answer in a single expression (4 KB at most)
+MAX_ANSWERS_PER_SUBMISSION = 100
+
+# A room is created in one TransactWriteItems (at most 100 items: META plus the question chunks),
+# and a student's single submission must be able to answer every question
+MAX_TRANSACT_ITEMS = 100
+MAX_ROOM_QUESTIONS = min((MAX_TRANSACT_ITEMS - 1) * QUESTIONS_PER_CHUNK, MAX_ANSWERS_PER_SUBMISSION)
+
+# Student names are part of a sort key (at most 1 KB)
+MAX_STUDENT_NAME_LENGTH = 100
+
+# Longest a room may live; roster items are written with this TTL so joining needs no read of the room
+MAX_ROOM_TTL_HOURS = 24 * 7
+
+# GSI over the metadata items (the only items with createdBy), newest room last
+CREATED_BY_INDEX = 'CreatedByIndex'
+
+# BatchGetItem takes at most 100 keys per call; unprocessed keys are retried with backoff
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_MAX_ATTEMPTS = 5
+BATCH_GET_BASE_DELAY_SECONDS = 0.05
+
+# How question chunks are written. 'zlib' stores each chunk as one compressed JSON binary attribute
+# (the field names repeated in every question compress away); 'map' stores plain DynamoDB maps.
+# Readers handle both, so the setting can be changed while rooms are live
+QUESTION_ENCODING = os.environ.get('ROOM_QUESTION_ENCODING', 'zlib')
+QUESTION_COMPRESSION_LEVEL = 6
+ZLIB_JSON = 'zlib-json'
+
+_serializer = TypeSerializer()
+
+# Room code format. As room volume grows, codes can be made longer (ROOM_CODE_LENGTH), switched to
+# an alphabet without look-alike characters, or given a trailing check character that catches typos
+ROOM_CODE_ALPHABETS = {
+    'alnum': string.ascii_uppercase + string.digits,
+    'unambiguous': '23456789ABCDEFGHJKMNPQRSTUVWXYZ',  # no 0/O, 1/I/L
+}
+ROOM_CODE_ALPHABET = ROOM_CODE_ALPHABETS[os.environ.get('ROOM_CODE_ALPHABET', 'alnum')]
+ROOM_CODE_LENGTH = int(os.environ.get('ROOM_CODE_LENGTH', '6'))
+ROOM_CODE_CHECKSUM = os.environ.get('ROOM_CODE_CHECKSUM', 'false').lower() == 'true'
+
+# Codes already handed out keep working after the format changes (rooms live for a day)
+MIN_ROOM_CODE_LENGTH = 6
+MAX_ROOM_CODE_LENGTH = 12
+
+MAX_ROOM_CODE_ATTEMPTS = 10
+
+METRICS_NAMESPACE = 'VocabApp/Rooms'
+
+# Per-container cache of student-view room reads. When a teacher shares a code the whole class opens
+# it within seconds, and mistyped codes are retried; both are served from here for ROOM_CACHE_SECONDS.
+# Unknown codes are cached as None. Joins and deletes drop the room's entries in the container that
+# made them; every handler is its own function, so elsewhere (get_room) they show once entries expire
+ROOM_CACHE_SECONDS = float(os.environ.get('ROOM_CACHE_SECONDS', '5'))
+ROOM_CACHE_MAX_ENTRIES = 512
+
+# (roomCode, sk, page) -> (monotonic expiry, value)
+_room_cache: Dict[tuple, tuple] = {}
+
+class RoomCodeExhaustedError(Exception):
+    """No free room code was found within MAX_ROOM_CODE_ATTEMPTS."""
+
+class RoomNotFoundError(Exception):
+    """The room's metadata item does not exist (never created, or deleted)."""
+
+class RoomExpiredError(RoomNotFoundError):
+    """The room's metadata item still exists but its TTL has passed (not yet removed by DynamoDB)."""
+
+class StudentNotJoinedError(Exception):
+    """The student has no roster item in the room."""
+
+class AnswersAlreadySubmittedError(Exception):
+    """The student's answers were already recorded."""
+
+def room_key(room_code: str, sk: str = META_SK) -> Dict[str, str]:
+    """Primary key of an item in a room's partition (the metadata item by default)."""
+    return {'roomCode': room_code, 'sk': sk}
+
+def question_chunk_sk(page: int) -> str:
+    """Sort key of a question chunk (zero-padded so chunks sort in order)."""
+    return f'{QUESTION_CHUNK_PREFIX}{page:04d}'
+
+def student_sk(student_name: str) -> str:
+    """Sort key of a student's roster item."""
+    return f'{STUDENT_PREFIX}{student_name}'
+
+def room_code_check_char(body: str) -> str:
+    """Luhn mod N check character over ROOM_CODE_ALPHABET."""
+    n = len(ROOM_CODE_ALPHABET)
+    total = 0
+    for position, char in enumerate(reversed(body)):
+        value = ROOM_CODE_ALPHABET.index(char)
+        if position % 2 == 0:
+            value *= 2
+            value = value // n + value % n
+        total += value
+    return ROOM_CODE_ALPHABET[(n - total % n) % n]
+
 def generate_room_code() -> str:
-    """Generate a unique 6-character room code."""
-    chars = string.ascii_uppercase + string.digits
+    """Generate a random room code candidate (uniqueness is enforced by the conditional put)."""
+    code = ''.join(random.SystemRandom().choices(ROOM_CODE_ALPHABET, k=ROOM_CODE_LENGTH))
+    if ROOM_CODE_CHECKSUM:
+        code += room_code_check_char(code)
+    return code
+
+def put_metrics(metrics: Dict[str, float], unit: str = 'Count') -> None:
+    """Emit CloudWatch metrics as an Embedded Metric Format log line."""
+    print(json.dumps({
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [['Environment']],
+                'Metrics': [{'Name': name, 'Unit': unit} for name in metrics]
+            }]
+        },
+        'Environment': os.environ.get('ENVIRONMENT', 'dev'),
+        **metrics
+    }))
+
+def put_room_with_new_code(room_item: Dict[str, Any], questions: List[Dict[str, Any]]) -> str:
+    """
+    Store a new room (metadata item + question chunks) under a fresh random code and return the code.
+    All items are written in one transaction that only succeeds if no room holds the code;
+    a collision retries with a new candidate.
+    """
+    chunks = [questions[i:i + QUESTIONS_PER_CHUNK] for i in range(0, len(questions), QUESTIONS_PER_CHUNK)]
+    meta_item = {**room_item, 'sk': META_SK, 'questionCount': len(questions), 'questionPages': len(chunks)}
+
+    attempts = 0
+    collisions = 0
+    try:
+        for _ in range(MAX_ROOM_CODE_ATTEMPTS):
+            attempts += 1
+            room_code = generate_room_code()
+            items = [{**meta_item, 'roomCode': room_code}] + [
+                {
+                    'roomCode': room_code, 'sk': question_chunk_sk(page),
+                    **encode_question_chunk(chunk), 'ttl': room_item['ttl']
+                }
+                for page, chunk in enumerate(chunks)
+            ]
+            try:
+                table.meta.client.transact_write_items(TransactItems=[
+                    {
+                        'Put': {
+                            'TableName': table_name,
+                            'Item': {name: _serializer.serialize(value) for name, value in item.items()},
+                            'ConditionExpression': 'attribute_not_exists(roomCode)'
+                        }
+                    }
+                    for item in items
+                ])
+                return room_code
+            except table.meta.client.exceptions.TransactionCanceledException as e:
+                reasons = e.response.get('CancellationReasons', [])
+                if not any(reason.get('Code') == 'ConditionalCheckFailed' for reason in reasons):
+                    raise
+                collisions += 1
+        raise RoomCodeExhaustedError(f"No free room code after {MAX_ROOM_CODE_ATTEMPTS} attempts")
+    finally:
+        # Collision rate = RoomCodeCollisions / RoomCodeAttempts
+        put_metrics({
+            'RoomCodeAttempts': attempts,
+            'RoomCodeCollisions': collisions
+        })
+
+def add_student(room_code: str, student_name: str) -> bool:
+    """
+    Add a student's roster item and count them on the metadata item, in one transaction.
+    The metadata item's condition checks the room exists and has not expired, so no read comes first;
+    the roster item's TTL is the longest a room can live (it never outlives its room's reads, which
+    go through the metadata item, and delete_room removes it with the partition).
+    Returns False if the student had already joined (the roster item's key already exists);
+    raises RoomExpiredError if the room's TTL has passed, RoomNotFoundError if it is gone.
+    """
+    try:
+        table.meta.client.transact_write_items(TransactItems=[
+            {
+                'Put': {
+                    'TableName': table_name,
+                    'Item': {name: _serializer.serialize(value) for name, value in {
+                        **room_key(room_code, student_sk(student_name)),
+                        'studentName': student_name,
+                        'joinedAt': get_current_iso_time(),
+                        'ttl': calculate_ttl(MAX_ROOM_TTL_HOURS)
+                    }.items()},
+                    'ConditionExpression': 'attribute_not_exists(roomCode)'
+                }
+            },
+            {
+                'Update': {
+                    'TableName': table_name,
+                    'Key': {name: _serializer.serialize(value) for name, value in room_key(room_code).items()},
+                    'UpdateExpression': 'ADD studentsCount :one',
+                    'ConditionExpression': 'attribute_exists(roomCode) AND #ttl > :now',
+                    'ExpressionAttributeNames': {'#ttl': 'ttl'},
+                    'ExpressionAttributeValues': {
+                        ':one': {'N': '1'},
+                        ':now': {'N': str(int(time.time()))}
+                    },
+                    # Tells an expired room (item returned) from a missing one
+                    'ReturnValuesOnConditionCheckFailure': 'ALL_OLD'
+                }
+            }
+        ])
+        return True
+    except table.meta.client.exceptions.TransactionCanceledException as e:
+        # One reason per action, in order: [roster item, metadata item]
+        reasons = e.response.get('CancellationReasons', [])
+        codes = [reason.get('Code') for reason in reasons]
+        if len(codes) == 2 and codes[1] == 'ConditionalCheckFailed':
+            if reasons[1].get('Item'):
+                raise RoomExpiredError(room_code)
+            raise RoomNotFoundError(room_code)
+        if len(codes) == 2 and codes[0] == 'ConditionalCheckFailed':
+            return False
+        raise
+
+def delete_room_items(room_code: str) -> int:
+    """
+    Delete every remaining item in a room's partition (question chunks, roster, answer counters),
+    page by page in batches of 25. Returns the number of items deleted.
+    """
+    deleted = 0
+    kwargs = {
+        'KeyConditionExpression': Key('roomCode').eq(room_code),
+        **projection(['roomCode', 'sk'])
+    }
+    # batch_writer sends 25 deletes per BatchWriteItem and resends unprocessed ones
+    with table.batch_writer() as batch:
+        while True:
+            response = table.query(**kwargs)
+            for item in response.get('Items', []):
+                batch.delete_item(Key=room_key(room_code, item['sk']))
+                deleted += 1
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return deleted
+
+def get_room_roster(room_code: str, consistent_read: bool = False) -> List[Dict[str, Any]]:
+    """
+    Roster items of a room (studentName, joinedAt; score and answered once submitted),
+    read page by page, in join order.
+    """
+    students = []
+    kwargs = {
+        'KeyConditionExpression': Key('roomCode').eq(room_code) & Key('sk').begins_with(STUDENT_PREFIX),
+        **projection(['studentName', 'joinedAt', 'score', 'answered']),
+        'ConsistentRead': consistent_read
+    }
     while True:
-        code = ''.join(random.choices(chars, k=6))
-        # Check if code already exists
-        try:
-            response = table.get_item(Key={'roomCode': code})
-            if 'Item' not in response:
-                return code
-        except Exception:
-            return code
+        response = table.query(**kwargs)
+        students.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            break
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    # Items come back in name order
+    students.sort(key=lambda student: student.get('joinedAt', ''))
+    return students
+
+def record_answers(room_code: str, student_name: str, graded: List[tuple], ttl: int) -> None:
+    """
+    Record a student's graded answers [(questionId, correct)] in one transaction: the score on the
+    student's roster item (only once per student) and ADDs to the room's answer counters.
+    Raises StudentNotJoinedError or AnswersAlreadySubmittedError when the roster item rules it out.
+    """
+    correct_count = sum(1 for _, correct in graded if correct)
+    # Every attribute name is escaped, so none can collide with a reserved word
+    names = {'#ttl': 'ttl', '#submissions': 'submissions', '#answered': 'answered', '#correct': 'correct'}
+    additions = ['#submissions :one', '#answered :answered', '#correct :correct']
+    for i, (question_id, correct) in enumerate(graded):
+        names[f'#a{i}'] = f'{ATTEMPTS_PREFIX}{question_id}'
+        additions.append(f'#a{i} :one')
+        # Only correct answers touch correct#<id>; a missing counter reads as 0
+        if correct:
+            names[f'#c{i}'] = f'{CORRECT_PREFIX}{question_id}'
+            additions.append(f'#c{i} :one')
+
+    try:
+        table.meta.client.transact_write_items(TransactItems=[
+            {
+                'Update': {
+                    'TableName': table_name,
+                    'Key': {name: _serializer.serialize(value) for name, value in
+                            room_key(room_code, student_sk(student_name)).items()},
+                    'UpdateExpression': 'SET #submittedAt = :now, #score = :correct, #answered = :answered',
+                    'ConditionExpression': 'attribute_exists(roomCode) AND attribute_not_exists(#submittedAt)',
+                    'ExpressionAttributeNames': {
+                        '#submittedAt': 'submittedAt', '#score': 'score', '#answered': 'answered'
+                    },
+                    'ExpressionAttributeValues': {
+                        ':now': _serializer.serialize(get_current_iso_time()),
+                        ':correct': _serializer.serialize(correct_count),
+                        ':answered': _serializer.serialize(len(graded))
+                    },
+                    'ReturnValuesOnConditionCheckFailure': 'ALL_OLD'
+                }
+            },
+            {
+                'Update': {
+                    'TableName': table_name,
+                    'Key': {name: _serializer.serialize(value) for name, value in
+                            room_key(room_code, ANSWERS_SK).items()},
+                    'UpdateExpression': f"SET #ttl = if_not_exists(#ttl, :ttl) ADD {', '.join(additions)}",
+                    'ExpressionAttributeNames': names,
+                    'ExpressionAttributeValues': {
+                        ':ttl': _serializer.serialize(ttl),
+                        ':one': _serializer.serialize(1),
+                        ':correct': _serializer.serialize(correct_count),
+                        ':answered': _serializer.serialize(len(graded))
+                    }
+                }
+            }
+        ])
+    except table.meta.client.exceptions.TransactionCanceledException as e:
+        reasons = e.response.get('CancellationReasons', [])
+        if reasons and reasons[0].get('Code') == 'ConditionalCheckFailed':
+            # The roster item came back: it already has submittedAt
+            if reasons[0].get('Item'):
+                raise AnswersAlreadySubmittedError(student_name)
+            raise StudentNotJoinedError(student_name)
+        raise
+
+def get_answer_stats(room_code: str) -> Dict[str, Any]:
+    """The room's answer counters: totals and {questionId: {attempts, correct}}."""
+    item = table.get_item(Key=room_key(room_code, ANSWERS_SK)).get('Item') or {}
+    questions = {}
+    for name, value in item.items():
+        for prefix, field in ((ATTEMPTS_PREFIX, 'attempts'), (CORRECT_PREFIX, 'correct')):
+            if name.startswith(prefix):
+                questions.setdefault(name[len(prefix):], {'attempts': 0, 'correct': 0})[field] = value
+    return {
+        'submissions': item.get('submissions', 0),
+        'answered': item.get('answered', 0),
+        'correct': item.get('correct', 0),
+        'questions': questions
+    }
+
+def encode_question_chunk(questions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Attributes that store one chunk of questions, in QUESTION_ENCODING."""
+    if QUESTION_ENCODING == 'map':
+        return {'questions': questions}
+    raw = json.dumps(questions, ensure_ascii=False, separators=(',', ':'), default=decimal_serializer)
+    return {'payload': zlib.compress(raw.encode('utf-8'), QUESTION_COMPRESSION_LEVEL), 'encoding': ZLIB_JSON}
+
+def decode_question_chunk(item: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Questions of a chunk item, whichever encoding it was written in."""
+    if item.get('encoding') == ZLIB_JSON:
+        payload = item['payload']
+        # boto3 wraps binary attributes in Binary
+        payload = getattr(payload, 'value', payload)
+        return json.loads(zlib.decompress(payload).decode('utf-8'))
+    return item.get('questions', [])
+
+def get_room_questions(room_code: str, page: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Questions of a room: one chunk (page) by key, or every chunk with a paginated query."""
+    if page is not None:
+        response = table.get_item(Key=room_key(room_code, question_chunk_sk(page)))
+        return decode_question_chunk(response.get('Item', {}))
+
+    questions = []
+    kwargs = {
+        'KeyConditionExpression': Key('roomCode').eq(room_code) & Key('sk').begins_with(QUESTION_CHUNK_PREFIX)
+    }
+    while True:
+        response = table.query(**kwargs)
+        for item in response.get('Items', []):
+            questions.extend(decode_question_chunk(item))
+        if 'LastEvaluatedKey' not in response:
+            return questions
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def _cached(key: tuple, load):
+    """Return the cached value for key, or load() it and cache the result (None included)."""
+    now = time.monotonic()
+    entry = _room_cache.get(key)
+    if entry and entry[0] > now:
+        return entry[1]
+
+    # Errors propagate from load() and are never cached
+    value = load()
+    if len(_room_cache) >= ROOM_CACHE_MAX_ENTRIES:
+        for stale_key in [k for k, (expires, _) in _room_cache.items() if expires <= now]:
+            del _room_cache[stale_key]
+        # Still full: drop the oldest entries (dicts keep insertion order)
+        while len(_room_cache) >= ROOM_CACHE_MAX_ENTRIES:
+            del _room_cache[next(iter(_room_cache))]
+    _room_cache[key] = (now + ROOM_CACHE_SECONDS, value)
+    return value
+
+def get_cached_room_item(room_code: str) -> Optional[Dict[str, Any]]:
+    """Room metadata item, at most ROOM_CACHE_SECONDS old (None for unknown codes)."""
+    return _cached(
+        (room_code, META_SK, None),
+        lambda: table.get_item(Key=room_key(room_code)).get('Item')
+    )
+
+def get_cached_room_questions(room_code: str, page: Optional[int] = None) -> List[Dict[str, Any]]:
+    """get_room_questions, at most ROOM_CACHE_SECONDS old."""
+    return _cached(
+        (room_code, QUESTION_CHUNK_PREFIX, page),
+        lambda: get_room_questions(room_code, page)
+    )
+
+def invalidate_room_cache(room_code: str) -> None:
+    """Drop every cached read of a room (after this container changed it)."""
+    for key in [key for key in _room_cache if key[0] == room_code]:
+        del _room_cache[key]
+
+def encode_page_token(last_evaluated_key: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Opaque pagination token for a LastEvaluatedKey (None when there are no more pages)."""
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(last_evaluated_key, separators=(',', ':'), default=decimal_serializer)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_page_token(token: str) -> Optional[Dict[str, Any]]:
+    """ExclusiveStartKey from a pagination token, or None if the token is malformed."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+    except (ValueError, UnicodeError):
+        return None
+    if not isinstance(key, dict) or not all(isinstance(value, str) for value in key.values()):
+        return None
+    return key
 
 def calculate_ttl(hours: int = 24) -> int:
     """Calculate TTL timestamp for DynamoDB."""
@@ -35,8 +468,15 @@ def get_current_iso_time() -> str:
     return datetime.utcnow().isoformat() + 'Z'
 
 def validate_room_code(room_code: str) -> bool:
-    """Validate room code format."""
-    return len(room_code) == 6 and room_code.isalnum() and room_code.isupper()
+    """Validate room code format (and the check character of checksummed codes)."""
+    if not re.fullmatch(f'[A-Z0-9]{{{MIN_ROOM_CODE_LENGTH},{MAX_ROOM_CODE_LENGTH}}}', room_code):
+        return False
+    if ROOM_CODE_CHECKSUM and len(room_code) == ROOM_CODE_LENGTH + 1:
+        body = room_code[:-1]
+        if any(char not in ROOM_CODE_ALPHABET for char in body):
+            return False
+        return room_code_check_char(body) == room_code[-1]
+    return True
 
 def decimal_serializer(obj):
     """JSON serializer for DynamoDB Decimal types."""
@@ -91,6 +531,9 @@ def validate_questions(questions: List[Dict[str, Any]]) -> bool:
     if not isinstance(questions, list) or len(questions) == 0:
         return False
     
+    if len(questions) > MAX_ROOM_QUESTIONS:
+        return False
+    
     for question in questions:
         required_fields = ['id', 'type', 'questionText', 'correctAnswer', 'options']
         if not all(field in question for field in required_fields):
@@ -108,10 +551,20 @@ def validate_questions(questions: List[Dict[str, Any]]) -> bool:
     
     return True
 
-def get_room_item(room_code: str) -> Optional[Dict[str, Any]]:
-    """Get room item from DynamoDB."""
+def projection(attributes: List[str]) -> Dict[str, Any]:
+    """ProjectionExpression arguments for the given attributes (names escaped, e.g. ttl)."""
+    return {
+        'ProjectionExpression': ', '.join(f'#a{i}' for i in range(len(attributes))),
+        'ExpressionAttributeNames': {f'#a{i}': name for i, name in enumerate(attributes)}
+    }
+
+def get_room_item(room_code: str, attributes: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """Get the room metadata item from DynamoDB, optionally only the given attributes."""
     try:
-        response = table.get_item(Key={'roomCode': room_code})
+        kwargs = {'Key': room_key(room_code)}
+        if attributes:
+            kwargs.update(projection(attributes))
+        response = table.get_item(**kwargs)
         return response.get('Item')
     except Exception as e:
         print(f"Error getting room item: {e}")
@@ -121,4 +574,30 @@ def is_room_expired(room_item: Dict[str, Any]) -> bool:
     """Check if room is expired based on TTL."""
     ttl = room_item.get('ttl', 0)
     current_time = int(time.time())
-    return current_time >= ttl
\ No newline at end of file
+    return current_time >= ttl
+
+def batch_get_room_items(room_codes: List[str], attributes: List[str]) -> tuple:
+    """
+    Metadata items of many rooms with BatchGetItem, only the given attributes (include roomCode).
+    Returns ({roomCode: item} for rooms that exist, [codes still unprocessed after retries]).
+    """
+    items = {}
+    unprocessed = []
+    for start in range(0, len(room_codes), BATCH_GET_MAX_KEYS):
+        request = {table_name: {
+            'Keys': [room_key(code) for code in room_codes[start:start + BATCH_GET_MAX_KEYS]],
+            **projection(attributes)
+        }}
+        for attempt in range(BATCH_GET_MAX_ATTEMPTS):
+            response = dynamodb.batch_get_item(RequestItems=request)
+            for item in response.get('Responses', {}).get(table_name, []):
+                items[item['roomCode']] = item
+            request = response.get('UnprocessedKeys') or {}
+            if not request:
+                break
+            if attempt + 1 < BATCH_GET_MAX_ATTEMPTS:
+                # Exponential backoff with full jitter; throttled keys come back here
+                time.sleep(random.uniform(0, BATCH_GET_BASE_DELAY_SECONDS * 2 ** attempt))
+        if request:
+            unprocessed.extend(key['roomCode'] for key in request[table_name]['Keys'])
+    return items, unprocessed
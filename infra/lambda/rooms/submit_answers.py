@@ -0,0 +1,143 @@
+import json
+import traceback
+from room_utils import (
+    validate_room_code, create_response, get_room_item, get_cached_room_questions, is_room_expired,
+    record_answers, StudentNotJoinedError, AnswersAlreadySubmittedError, MAX_ANSWERS_PER_SUBMISSION
+)
+
+def lambda_handler(event, context):
+    """
+    Submit a student's answers (once per student), graded against the room's questions.
+    
+    Path parameter: roomCode
+    Request body:
+    {
+        "studentName": string,
+        "answers": [{"questionId": string, "answer": string}]
+    }
+    
+    Response:
+    {
+        "score": number,
+        "answered": number,
+        "totalQuestions": number,
+        "results": [{"questionId": string, "correct": boolean, "correctAnswer": string}]
+    }
+    """
+    try:
+        # Get room code from path parameters
+        path_params = event.get('pathParameters', {})
+        room_code = path_params.get('roomCode')
+        
+        if not room_code:
+            return create_response(400, {
+                'error': 'Missing roomCode path parameter'
+            })
+        
+        # Validate room code format
+        room_code = room_code.upper()
+        if not validate_room_code(room_code):
+            return create_response(400, {
+                'error': 'Invalid room code format'
+            })
+        
+        # Parse request body
+        if not event.get('body'):
+            return create_response(400, {
+                'error': 'Missing request body'
+            })
+        
+        try:
+            body = json.loads(event['body'])
+        except json.JSONDecodeError:
+            return create_response(400, {
+                'error': 'Invalid JSON in request body'
+            })
+        
+        student_name = body.get('studentName', '').strip()
+        if not student_name:
+            return create_response(400, {
+                'error': 'Missing or empty studentName'
+            })
+        
+        answers = body.get('answers')
+        if not isinstance(answers, list) or not all(
+            isinstance(a, dict) and isinstance(a.get('questionId'), str) and isinstance(a.get('answer'), str)
+            for a in answers
+        ):
+            return create_response(400, {
+                'error': 'answers must be a list of {questionId, answer}'
+            })
+        
+        # Students submit once, so an empty submission would use up their only one
+        if not answers:
+            return create_response(400, {
+                'error': 'answers must not be empty'
+            })
+        
+        if len(answers) > MAX_ANSWERS_PER_SUBMISSION:
+            return create_response(400, {
+                'error': f'At most {MAX_ANSWERS_PER_SUBMISSION} answers per submission'
+            })
+        
+        question_ids = [a['questionId'] for a in answers]
+        if len(set(question_ids)) != len(question_ids):
+            return create_response(400, {
+                'error': 'Each question can be answered only once'
+            })
+        
+        # The room's expiry is also the answer counters' TTL
+        room_item = get_room_item(room_code, ['ttl'])
+        
+        if not room_item:
+            return create_response(404, {
+                'error': 'Room not found'
+            })
+        
+        if is_room_expired(room_item):
+            return create_response(404, {
+                'error': 'Room expired'
+            })
+        
+        # Grade on the server; questions never change, so the cached read is exact
+        questions = {q['id']: q for q in get_cached_room_questions(room_code)}
+        unknown = [question_id for question_id in question_ids if question_id not in questions]
+        if unknown:
+            return create_response(400, {
+                'error': 'Unknown questionId',
+                'questionIds': unknown
+            })
+        
+        graded = [(a['questionId'], a['answer'] == questions[a['questionId']]['correctAnswer']) for a in answers]
+        
+        try:
+            record_answers(room_code, student_name, graded, int(room_item['ttl']))
+        except StudentNotJoinedError:
+            return create_response(403, {
+                'error': 'Student has not joined this room'
+            })
+        except AnswersAlreadySubmittedError:
+            return create_response(409, {
+                'error': 'Answers already submitted'
+            })
+        
+        return create_response(200, {
+            'score': sum(1 for _, correct in graded if correct),
+            'answered': len(graded),
+            'totalQuestions': len(questions),
+            'results': [
+                {
+                    'questionId': question_id,
+                    'correct': correct,
+                    'correctAnswer': questions[question_id]['correctAnswer']
+                }
+                for question_id, correct in graded
+            ]
+        })
+        
+    except Exception as e:
+        print(f"Error submitting answers: {e}")
+        print(f"Traceback: {traceback.format_exc()}")
+        return create_response(500, {
+            'error': 'Internal server error'
+        })
@@ -2,237 +2,612 @@ import json
 import psycopg2
 import boto3
 import csv
+import hashlib
 import io
 import os
+import sys
+import uuid
 import urllib.request
-from psycopg2.extras import execute_values
 
-def lambda_handler(event, context):
-    print("🚀 Starting vocabulary data import...")
-    
-    # Get database credentials from Secrets Manager
+# The schema migrations live with the API Lambdas (lambda/api), which this asset also contains
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+from schema_migrations import apply_migrations
+
+# Books imported by this Lambda: (event key for the CSV path, default path, level, book name, description)
+BOOK_SOURCES = [
+    ('n4_csv_path', './N4_vocab.csv', 'N4', 'N4語彙',
+     'JLPT N4レベルの語彙集（日本語・ネパール語対照）'),
+    ('n3_csv_path', './N3_vocab.csv', 'N3', 'N3語彙',
+     'JLPT N3レベルの語彙集（日本語・ネパール語対照）'),
+    ('minnichi_csv_path', './みん日1.csv', 'みん日', 'みん日',
+     'みんなの日本語初級の語彙集（日本語・ネパール語対照）'),
+]
+
+# Rows staged per committed chunk (overridable per event with 'chunk_rows')
+DEFAULT_CHUNK_ROWS = 5000
+
+# Stop and hand over to a fresh invocation when less than this much time remains
+REINVOKE_MARGIN_MS = 90 * 1000
+
+# Guard against a job that re-invokes itself forever without finishing
+MAX_INVOCATIONS = 50
+
+# A merge that would leave a book with less than this share of its questions is refused
+# (a truncated or mis-encoded source), unless the event sets 'allow_shrink'
+MIN_MERGE_FRACTION = 0.5
+
+# Staging columns and the CSV headers that feed them (different CSVs use different names)
+STAGING_COLUMNS = [
+    ('ka', ['ka']),
+    ('np1', ['NP1', 'english']),
+    ('jp_kanji', ['JP-kanji', 'jp_kanji']),
+    ('jp_rubi', ['JP-rubi', 'jp_rubi']),
+    ('nepali_sentence', ['NP-sentence', 'EN-sentence']),
+    ('japanese_question', ['JP-question', 'jp_question']),
+    ('japanese_example', ['exa', 'japanese_example']),
+]
+
+# Tag columns carried into extra_data ({"renban": 12, "tags": ["S0", "S3"]})
+TAG_COLUMNS = ['renban', 'S0', 'S1', 'S2', 'S3', 'S4', 'S5', 'S7', 'N2', 'N4', 'N6', 'N8']
+
+# Normalize staged rows in place: trim, Unicode NFC (NFKC for lesson numbers), flag rows that cannot be imported
+NORMALIZE_STAGING_SQL = """
+UPDATE vocab_import_staging
+SET np1 = normalize(btrim(COALESCE(np1, '')), NFC),
+    jp_kanji = normalize(btrim(COALESCE(jp_kanji, '')), NFC),
+    jp_rubi = normalize(btrim(COALESCE(jp_rubi, '')), NFC),
+    nepali_sentence = normalize(btrim(COALESCE(nepali_sentence, '')), NFC),
+    japanese_question = normalize(btrim(COALESCE(japanese_question, '')), NFC),
+    japanese_example = normalize(btrim(COALESCE(japanese_example, '')), NFC),
+    ka_num = CASE
+        WHEN normalize(btrim(COALESCE(ka, '')), NFKC) ~ '^[0-9]{1,9}$'
+        THEN normalize(btrim(ka), NFKC)::integer
+        ELSE 1
+    END,
+    extra_data = jsonb_strip_nulls(jsonb_build_object(
+        'renban', CASE
+            WHEN normalize(btrim(COALESCE(tags_raw->>'renban', '')), NFKC) ~ '^[0-9]{1,9}$'
+            THEN normalize(btrim(tags_raw->>'renban'), NFKC)::integer
+        END,
+        'tags', (
+            SELECT jsonb_agg(tag.key ORDER BY tag.key)
+            FROM jsonb_each_text(COALESCE(tags_raw, '{}'::jsonb)) AS tag
+            WHERE tag.key <> 'renban' AND normalize(btrim(tag.value), NFKC) NOT IN ('', '0')
+        )
+    ))
+WHERE import_source = %s AND line_no BETWEEN %s AND %s
+"""
+
+VALIDATE_STAGING_SQL = """
+UPDATE vocab_import_staging
+SET is_valid = (np1 <> '' OR jp_kanji <> '' OR jp_rubi <> '')
+           AND char_length(np1) <= 500
+           AND char_length(jp_kanji) <= 500
+           AND char_length(jp_rubi) <= 500
+WHERE import_source = %s AND line_no BETWEEN %s AND %s
+"""
+
+# Replace a book's questions with the validated staged rows in a single statement
+MERGE_STAGING_SQL = """
+WITH cleared AS (
+    DELETE FROM vocabulary_questions WHERE book_id = %(book_id)s
+)
+INSERT INTO vocabulary_questions (
+    book_id, ka, np1, jp_kanji, jp_rubi,
+    nepali_sentence, japanese_question, japanese_example, extra_data
+)
+SELECT %(book_id)s, ka_num, np1, jp_kanji, jp_rubi,
+       nepali_sentence, japanese_question, japanese_example, COALESCE(extra_data, '{}'::jsonb)
+FROM vocab_import_staging
+WHERE import_source = %(source)s AND is_valid
+ORDER BY line_no
+"""
+
+# Valid staged rows against the book's current size, checked before MERGE_STAGING_SQL replaces it
+MERGE_GUARD_SQL = """
+SELECT (SELECT COUNT(*) FROM vocab_import_staging WHERE import_source = %s AND is_valid),
+       (SELECT question_count FROM vocabulary_books WHERE name = %s)
+"""
+
+# Statement text is kept at module level so perf/plan_regression.py can EXPLAIN exactly what runs here
+STAGED_COUNTS_SQL = """
+SELECT COUNT(*) FILTER (WHERE is_valid), COUNT(*) FILTER (WHERE NOT is_valid)
+FROM vocab_import_staging
+WHERE import_source = %s AND line_no BETWEEN %s AND %s
+"""
+
+# Lock the existing row so concurrent imports of the same book serialize here
+LOCK_BOOK_SQL = "SELECT id FROM vocabulary_books WHERE name = %s FOR UPDATE"
+
+REFRESH_BOOK_SQL = """
+UPDATE vocabulary_books
+SET description = %s, level = %s, updated_at = CURRENT_TIMESTAMP
+WHERE id = %s
+"""
+
+INSERT_BOOK_SQL = """
+INSERT INTO vocabulary_books (name, description, level, language_pair)
+VALUES (%s, %s, %s, %s)
+RETURNING id
+"""
+
+ADVANCE_CHECKPOINT_SQL = """
+UPDATE vocab_import_checkpoints
+SET byte_offset = %s, rows_staged = %s, updated_at = CURRENT_TIMESTAMP
+WHERE job_id = %s AND import_source = %s
+"""
+
+CLEAR_STAGING_SQL = "DELETE FROM vocab_import_staging WHERE import_source = %s"
+
+IMPORT_STATS_SQL = """
+SELECT (SELECT COUNT(*) FROM vocabulary_books), (SELECT COUNT(*) FROM vocabulary_questions)
+"""
+
+
+def connect_from_secret(secret_arn):
+    """Connect to the database using credentials from Secrets Manager"""
     secrets_client = boto3.client('secretsmanager')
-    secret_arn = event['secret_arn']
-    
+    secret_response = secrets_client.get_secret_value(SecretId=secret_arn)
+    secret = json.loads(secret_response['SecretString'])
+
+    return psycopg2.connect(
+        host=secret['host'],
+        database=secret['dbname'],
+        user=secret['username'],
+        password=secret['password'],
+        port=secret['port']
+    )
+
+
+def open_csv_stream(csv_path, level):
+    """Open a CSV source as a binary stream from file path or URL"""
+    # Try to read from local file first (for Lambda with mounted volumes)
+    if os.path.exists(csv_path):
+        return open(csv_path, 'rb')
+
+    # Try to download from URL if it's a URL
+    if csv_path.startswith('http'):
+        return urllib.request.urlopen(csv_path)
+
+    # Default embedded content for N4 (fallback)
+    if level == 'N4':
+        content = """ka,NP1,JP-kanji,JP-rubi,NP-sentence,JP-question,exa,renban,S0,S3,S5,S7,S2,S4,N2,N4,N6,N8
+1,शौक,趣味,しゅみ,मेरो शौक चलचित्र हेर्ने हो,私の（　）は、映画をみることです,私の趣味は、映画をみることです,1,1"""
+        return io.BytesIO(content.encode('utf-8'))
+
+    raise FileNotFoundError(f"CSV file not found: {csv_path}")
+
+
+def source_checksum(csv_path, level):
+    """SHA-256 of the raw source bytes, or None when the source cannot be read"""
+    digest = hashlib.sha256()
+    try:
+        stream = open_csv_stream(csv_path, level)
+    except Exception as e:
+        print(f"❌ Error loading CSV from {csv_path}: {str(e)}")
+        return None
     try:
-        secret_response = secrets_client.get_secret_value(SecretId=secret_arn)
-        secret = json.loads(secret_response['SecretString'])
-        
-        # Connect to database
-        conn = psycopg2.connect(
-            host=secret['host'],
-            database=secret['dbname'],
-            user=secret['username'],
-            password=secret['password'],
-            port=secret['port']
+        for block in iter(lambda: stream.read(1 << 20), b''):
+            digest.update(block)
+    finally:
+        stream.close()
+    return digest.hexdigest()
+
+
+def read_csv_header(stream):
+    """Read the header line; returns (column names, byte offset of the first data row)"""
+    raw = stream.readline()
+    # utf-8-sig strips the BOM so the first header is 'ka', not '\ufeffka'
+    header = next(csv.reader([raw.decode('utf-8-sig')]), [])
+    return header, len(raw)
+
+
+def skip_to_offset(stream, current, offset):
+    """Advance a stream to a byte offset, seeking when possible (files) and reading otherwise (URLs)"""
+    if offset <= current:
+        return
+    if stream.seekable():
+        stream.seek(offset)
+        return
+    remaining = offset - current
+    while remaining > 0:
+        skipped = len(stream.read(min(remaining, 1 << 20)))
+        if not skipped:
+            break
+        remaining -= skipped
+
+
+def iter_csv_rows(stream, header, offset):
+    """Yield (row dict, byte offset just past the row) so a chunk boundary can be checkpointed"""
+    position = {'offset': offset}
+
+    def lines():
+        for raw in iter(stream.readline, b''):
+            position['offset'] += len(raw)
+            yield raw.decode('utf-8')
+
+    # csv.reader never reads ahead of the record it returns, so the offset is exact
+    for values in csv.reader(lines()):
+        if not any(values):
+            continue
+        yield dict(zip(header, values)), position['offset']
+
+
+def pick_column(row, aliases):
+    """Return the first non-empty value among the CSV column aliases"""
+    for alias in aliases:
+        value = row.get(alias)
+        if value:
+            return value
+    return ''
+
+
+def copy_rows_to_staging(cursor, staging_key, rows, first_line_no):
+    """Stream CSV rows into the staging table with COPY (raw text, no validation yet)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for line_no, row in enumerate(rows, start=first_line_no):
+        tags = {column: row[column] for column in TAG_COLUMNS if row.get(column)}
+        writer.writerow(
+            [staging_key, line_no]
+            + [pick_column(row, aliases) for _, aliases in STAGING_COLUMNS]
+            + [json.dumps(tags, ensure_ascii=False)]
         )
-        cursor = conn.cursor()
-        
-        # Create tables if they don't exist and add missing constraints
-        create_tables_sql = """
-        -- Create vocabulary books table
-        CREATE TABLE IF NOT EXISTS vocabulary_books (
-            id SERIAL PRIMARY KEY,
-            name VARCHAR(255) NOT NULL,
-            description TEXT,
-            level VARCHAR(10) NOT NULL DEFAULT 'N4',
-            language_pair VARCHAR(10) NOT NULL DEFAULT 'JP-NP',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        -- Create vocabulary questions table
-        CREATE TABLE IF NOT EXISTS vocabulary_questions (
-            id SERIAL PRIMARY KEY,
-            book_id INTEGER NOT NULL,
-            ka INTEGER NOT NULL,
-            np1 VARCHAR(500) NOT NULL,
-            jp_kanji VARCHAR(500) NOT NULL,
-            jp_rubi VARCHAR(500) NOT NULL,
-            nepali_sentence TEXT DEFAULT '',
-            japanese_question TEXT DEFAULT '',
-            japanese_example TEXT DEFAULT '',
-            extra_data JSONB DEFAULT '{}',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            
-            FOREIGN KEY (book_id) REFERENCES vocabulary_books(id) ON DELETE CASCADE
-        );
-        
-        
-        -- Create indexes for performance
-        CREATE INDEX IF NOT EXISTS idx_vocab_questions_book_id ON vocabulary_questions(book_id);
-        CREATE INDEX IF NOT EXISTS idx_vocab_questions_ka ON vocabulary_questions(ka);
-        """
-        
-        cursor.execute(create_tables_sql)
+    buffer.seek(0)
+
+    columns = ', '.join(['import_source', 'line_no'] + [name for name, _ in STAGING_COLUMNS] + ['tags_raw'])
+    cursor.copy_expert(
+        f"COPY vocab_import_staging ({columns}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+    return len(rows)
+
+
+def prepare_staging(cursor, staging_key, first_line_no, last_line_no):
+    """Normalize and validate a range of staged rows with SQL; returns (valid, invalid) counts"""
+    line_range = (staging_key, first_line_no, last_line_no)
+    cursor.execute(NORMALIZE_STAGING_SQL, line_range)
+    cursor.execute(VALIDATE_STAGING_SQL, line_range)
+    cursor.execute(STAGED_COUNTS_SQL, line_range)
+    return cursor.fetchone()
+
+
+def upsert_book(cursor, book_name, level, description):
+    """Insert or update the vocabulary book row and return its id"""
+    cursor.execute(LOCK_BOOK_SQL, (book_name,))
+    result = cursor.fetchone()
+
+    if result:
+        book_id = result[0]
+        # Update existing book
+        cursor.execute(REFRESH_BOOK_SQL, (description, level, book_id))
+    else:
+        # Insert new book
+        cursor.execute(INSERT_BOOK_SQL, (book_name, description, level, "JP-NP"))
+        book_id = cursor.fetchone()[0]
+
+    return book_id
+
+
+def staging_key_for(checkpoint):
+    """Staging rows are keyed per job so a new job never picks up an abandoned job's rows"""
+    return f"{checkpoint['job_id']}:{checkpoint['import_source']}"
+
+
+def register_import(cursor, checkpoint, book_id, inserted):
+    """Remember the checksum of a merged source so the next import can skip it if unchanged"""
+    cursor.execute("""
+        INSERT INTO vocab_import_registry (import_source, source_path, checksum, row_count, book_id)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (import_source) DO UPDATE
+        SET source_path = EXCLUDED.source_path,
+            checksum = EXCLUDED.checksum,
+            row_count = EXCLUDED.row_count,
+            book_id = EXCLUDED.book_id,
+            imported_at = CURRENT_TIMESTAMP
+    """, (checkpoint['import_source'], checkpoint['source_path'], checkpoint['checksum'], inserted, book_id))
+
+
+def mark_checkpoint_merged(conn, checkpoint, inserted):
+    """Record a source as finished; commits together with the merge when called inside it"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE vocab_import_checkpoints
+        SET status = 'merged', rows_inserted = %s, updated_at = CURRENT_TIMESTAMP
+        WHERE job_id = %s AND import_source = %s
+    """, (inserted, checkpoint['job_id'], checkpoint['import_source']))
+    conn.commit()
+
+
+def mark_checkpoint_failed(conn, checkpoint):
+    """Record a source whose merge was refused; the book keeps its questions and the staged rows are dropped"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE vocab_import_checkpoints
+        SET status = 'failed', updated_at = CURRENT_TIMESTAMP
+        WHERE job_id = %s AND import_source = %s
+    """, (checkpoint['job_id'], checkpoint['import_source']))
+    cursor.execute(CLEAR_STAGING_SQL, (staging_key_for(checkpoint),))
+    conn.commit()
+    checkpoint['status'] = 'failed'
+
+
+def merge_staging_into_book(conn, checkpoint, allow_shrink=False):
+    """Swap the book's questions for the staged rows in one short transaction
+
+    Returns None (and fails the checkpoint) instead of merging when no staged row is valid, or when
+    the book would shrink below MIN_MERGE_FRACTION of its current size and allow_shrink is not set.
+    """
+    staging_key = staging_key_for(checkpoint)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(MERGE_GUARD_SQL, (staging_key, checkpoint['book_name']))
+        valid_count, current_count = cursor.fetchone()
+        if valid_count == 0 or (
+            not allow_shrink and current_count and valid_count < current_count * MIN_MERGE_FRACTION
+        ):
+            conn.rollback()
+            print(f"❌ Refusing to replace {current_count or 0} questions of {checkpoint['book_name']} "
+                  f"with {valid_count} valid rows")
+            mark_checkpoint_failed(conn, checkpoint)
+            return None
+
+        cursor.execute("SET LOCAL lock_timeout = '5s'")
+        book_id = upsert_book(cursor, checkpoint['book_name'], checkpoint['level'], checkpoint['description'])
+        cursor.execute(MERGE_STAGING_SQL, {'book_id': book_id, 'source': staging_key})
+        inserted = cursor.rowcount
+        if checkpoint['checksum']:
+            register_import(cursor, checkpoint, book_id, inserted)
+        mark_checkpoint_merged(conn, checkpoint, inserted)
+    except Exception:
+        conn.rollback()
+        raise
+
+    # Staging rows are no longer needed once merged
+    cursor.execute(CLEAR_STAGING_SQL, (staging_key,))
+    conn.commit()
+    return inserted
+
+
+def stage_next_chunk(conn, checkpoint, rows, end_offset):
+    """Stage one chunk and advance the checkpoint in the same transaction"""
+    cursor = conn.cursor()
+    staging_key = staging_key_for(checkpoint)
+    first_line_no = checkpoint['rows_staged'] + 1
+    try:
+        staged = copy_rows_to_staging(cursor, staging_key, rows, first_line_no)
+        last_line_no = first_line_no + staged - 1
+        valid_count, invalid_count = prepare_staging(cursor, staging_key, first_line_no, last_line_no)
+        cursor.execute(ADVANCE_CHECKPOINT_SQL, (
+            end_offset, last_line_no, checkpoint['job_id'], checkpoint['import_source']
+        ))
         conn.commit()
-        print("✅ Tables created/verified")
-        
-        # Load vocabulary data from CSV files
-        def load_csv_from_s3_or_url(csv_path, level):
-            """Load CSV data efficiently from file path or URL"""
-            try:
-                # Try to read from local file first (for Lambda with mounted volumes)
-                if os.path.exists(csv_path):
-                    with open(csv_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                else:
-                    # Try to download from URL if it's a URL
-                    if csv_path.startswith('http'):
-                        with urllib.request.urlopen(csv_path) as response:
-                            content = response.read().decode('utf-8')
-                    else:
-                        # Default embedded content for N4 (fallback)
-                        if level == 'N4':
-                            content = """ka,NP1,JP-kanji,JP-rubi,NP-sentence,JP-question,exa,renban,S0,S3,S5,S7,S2,S4,N2,N4,N6,N8
-1,शौक,趣味,しゅみ,मेरो शौक चलचित्र हेर्ने हो,私の（　）は、映画をみることです,私の趣味は、映画をみることです,1,1"""
-                        else:
-                            raise FileNotFoundError(f"CSV file not found: {csv_path}")
-                
-                # Parse CSV efficiently
-                csv_reader = csv.DictReader(io.StringIO(content))
-                return list(csv_reader)
-                
-            except Exception as e:
-                print(f"❌ Error loading CSV from {csv_path}: {str(e)}")
-                return []
-
-        def bulk_insert_vocab_book_and_questions(vocab_data, level, book_name, description):
-            """Efficiently insert vocabulary book and questions using bulk operations"""
-            if not vocab_data:
-                print(f"⚠️ No data to insert for {level}")
-                return 0
-                
-            # Insert or get vocabulary book - first try to get existing
-            cursor.execute("SELECT id FROM vocabulary_books WHERE name = %s", (book_name,))
-            result = cursor.fetchone()
-            
-            if result:
-                book_id = result[0]
-                # Update existing book
-                cursor.execute("""
-                    UPDATE vocabulary_books 
-                    SET description = %s, level = %s, updated_at = CURRENT_TIMESTAMP
-                    WHERE id = %s
-                """, (description, level, book_id))
-            else:
-                # Insert new book
-                cursor.execute("""
-                    INSERT INTO vocabulary_books (name, description, level, language_pair)
-                    VALUES (%s, %s, %s, %s)
-                    RETURNING id
-                """, (book_name, description, level, "JP-NP"))
-                book_id = cursor.fetchone()[0]
-            
-            # Clear existing questions for this book to avoid duplicates
-            cursor.execute("DELETE FROM vocabulary_questions WHERE book_id = %s", (book_id,))
-            
-            # Prepare data for bulk insert - handle different CSV formats
-            questions_data = []
-            for row in vocab_data:
-                # Handle different CSV column naming conventions
-                ka = row.get('ka', '1')
-                np1 = row.get('NP1', '') or row.get('english', '') or ''
-                jp_kanji = row.get('JP-kanji', '') or row.get('jp_kanji', '') or ''
-                jp_rubi = row.get('JP-rubi', '') or row.get('jp_rubi', '') or ''
-                np_sentence = row.get('NP-sentence', '') or row.get('EN-sentence', '') or ''
-                jp_question = row.get('JP-question', '') or row.get('jp_question', '') or ''
-                jp_example = row.get('exa', '') or row.get('japanese_example', '') or ''
-                
-                questions_data.append((
-                    book_id,
-                    int(ka) if ka and ka.isdigit() else 1,
-                    np1,
-                    jp_kanji,
-                    jp_rubi,
-                    np_sentence,
-                    jp_question,
-                    jp_example
-                ))
-            
-            # Bulk insert using execute_values for maximum efficiency
-            if questions_data:
-                execute_values(
-                    cursor,
-                    """
-                    INSERT INTO vocabulary_questions (
-                        book_id, ka, np1, jp_kanji, jp_rubi,
-                        nepali_sentence, japanese_question, japanese_example
-                    ) VALUES %s
-                    """,
-                    questions_data,
-                    template=None,
-                    page_size=1000  # Process in chunks of 1000 for optimal performance
-                )
-                print(f"✅ Bulk inserted {len(questions_data)} questions for {level}")
-                return len(questions_data)
-            
-            return 0
-
-        # Load and process N4 vocabulary
-        n4_csv_path = event.get('n4_csv_path', './N4_vocab.csv')
-        n4_data = load_csv_from_s3_or_url(n4_csv_path, 'N4')
-        n4_inserted = bulk_insert_vocab_book_and_questions(
-            n4_data, 
-            'N4', 
-            'N4語彙', 
-            'JLPT N4レベルの語彙集（日本語・ネパール語対照）'
-        )
+    except Exception:
+        conn.rollback()
+        raise
 
-        # Load and process N3 vocabulary
-        n3_csv_path = event.get('n3_csv_path', './N3_vocab.csv')
-        n3_data = load_csv_from_s3_or_url(n3_csv_path, 'N3')
-        n3_inserted = bulk_insert_vocab_book_and_questions(
-            n3_data, 
-            'N3', 
-            'N3語彙', 
-            'JLPT N3レベルの語彙集（日本語・ネパール語対照）'
-        )
+    checkpoint['byte_offset'] = end_offset
+    checkpoint['rows_staged'] = last_line_no
+    print(f"📥 Staged rows {first_line_no}-{last_line_no} for {checkpoint['level']} "
+          f"({valid_count} valid, {invalid_count} skipped), offset {end_offset}")
+
+
+def import_source(conn, checkpoint, chunk_rows, out_of_time, allow_shrink=False):
+    """Stage a source chunk by chunk from its checkpoint, then merge it; returns False if time ran out"""
+    try:
+        stream = open_csv_stream(checkpoint['source_path'], checkpoint['level'])
+    except Exception as e:
+        print(f"❌ Error loading CSV from {checkpoint['source_path']}: {str(e)}")
+        stream = io.BytesIO(b'')
+
+    try:
+        header, data_offset = read_csv_header(stream)
+        offset = max(checkpoint['byte_offset'], data_offset)
+        skip_to_offset(stream, data_offset, offset)
+
+        chunk = []
+        for row, end_offset in iter_csv_rows(stream, header, offset):
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                stage_next_chunk(conn, checkpoint, chunk, end_offset)
+                chunk = []
+                if out_of_time():
+                    return False
+        if chunk:
+            stage_next_chunk(conn, checkpoint, chunk, end_offset)
+    finally:
+        stream.close()
+
+    if checkpoint['rows_staged'] == 0:
+        # Leave the existing book untouched rather than replacing it with nothing
+        print(f"❌ No data to insert for {checkpoint['level']}")
+        mark_checkpoint_failed(conn, checkpoint)
+        return True
+
+    inserted = merge_staging_into_book(conn, checkpoint, allow_shrink)
+    if inserted is None:
+        return True
+    checkpoint['rows_inserted'] = inserted
+    checkpoint['status'] = 'merged'
+    print(f"✅ Merged {inserted} questions for {checkpoint['level']}")
+    return True
+
+
+def resolve_sources(event):
+    """Sources for this job: the built-in books, or an explicit 'sources' list"""
+    if event.get('sources'):
+        return [
+            (source['path'], source.get('level', 'N4'), source['book_name'], source.get('description', ''))
+            for source in event['sources']
+        ]
+    return [
+        (event.get(event_key, default_path), level, book_name, description)
+        for event_key, default_path, level, book_name, description in BOOK_SOURCES
+    ]
+
+
+def load_checkpoints(conn, job_id, sources, force=False):
+    """Create checkpoints for a new job or load the existing ones, in source order
 
-        # Load and process みん日 vocabulary
-        minnichi_csv_path = event.get('minnichi_csv_path', './みん日1.csv')
-        minnichi_data = load_csv_from_s3_or_url(minnichi_csv_path, 'みん日')
-        minnichi_inserted = bulk_insert_vocab_book_and_questions(
-            minnichi_data, 
-            'みん日', 
-            'みん日', 
-            'みんなの日本語初級の語彙集（日本語・ネパール語対照）'
+    A new checkpoint whose source checksum matches the registry starts as 'unchanged'
+    (unless force is set), so the book is neither staged nor rewritten.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT import_source FROM vocab_import_checkpoints WHERE job_id = %s", (job_id,))
+    existing = {row[0] for row in cursor.fetchall()}
+
+    for source_path, level, book_name, description in sources:
+        if book_name in existing:
+            continue
+
+        checksum = source_checksum(source_path, level)
+        cursor.execute("SELECT checksum FROM vocab_import_registry WHERE import_source = %s", (book_name,))
+        registered = cursor.fetchone()
+        unchanged = not force and checksum is not None and registered is not None and registered[0] == checksum
+        if unchanged:
+            print(f"⏭️ {book_name} unchanged since last import (checksum {checksum[:12]}), skipping")
+
+        cursor.execute("""
+            INSERT INTO vocab_import_checkpoints
+            (job_id, import_source, source_path, level, book_name, description, checksum, status)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (job_id, import_source) DO NOTHING
+        """, (job_id, book_name, source_path, level, book_name, description, checksum,
+              'unchanged' if unchanged else 'staging'))
+    conn.commit()
+
+    cursor.execute("""
+        SELECT job_id, import_source, source_path, level, book_name, description,
+               byte_offset, rows_staged, rows_inserted, status, checksum
+        FROM vocab_import_checkpoints
+        WHERE job_id = %s
+    """, (job_id,))
+    columns = [column[0] for column in cursor.description]
+    by_source = {row[1]: dict(zip(columns, row)) for row in cursor.fetchall()}
+    return [by_source[book_name] for _, _, book_name, _ in sources]
+
+
+def purge_stale_import_state(conn):
+    """Drop week-old checkpoints and any staging rows no longer owned by an active job"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        DELETE FROM vocab_import_checkpoints
+        WHERE updated_at < CURRENT_TIMESTAMP - INTERVAL '7 days'
+    """)
+    cursor.execute("""
+        DELETE FROM vocab_import_staging s
+        WHERE NOT EXISTS (
+            SELECT 1 FROM vocab_import_checkpoints c
+            WHERE c.status = 'staging' AND c.job_id || ':' || c.import_source = s.import_source
         )
+    """)
+    conn.commit()
+
+
+def reinvoke(context, event):
+    """Hand the job over to a fresh asynchronous invocation of this function"""
+    lambda_client = boto3.client('lambda')
+    lambda_client.invoke(
+        FunctionName=context.function_name,
+        InvocationType='Event',
+        Payload=json.dumps(event).encode('utf-8')
+    )
+
+
+def lambda_handler(event, context):
+    print("🚀 Starting vocabulary data import...")
+
+    job_id = event.get('job_id') or uuid.uuid4().hex
+    invocation = event.get('invocation', 1)
+    chunk_rows = int(event.get('chunk_rows', DEFAULT_CHUNK_ROWS))
+
+    def out_of_time():
+        # Local runs pass no context and have no deadline
+        return context is not None and context.get_remaining_time_in_millis() < REINVOKE_MARGIN_MS
+
+    try:
+        conn = connect_from_secret(event['secret_arn'])
+        cursor = conn.cursor()
+
+        # Bring the schema up to date (staging, checkpoint and registry tables included)
+        applied = apply_migrations(conn)
+        print(f"✅ Schema up to date ({len(applied)} migrations applied)")
+
+        if 'job_id' not in event:
+            purge_stale_import_state(conn)
+        print(f"🧾 Import job {job_id}, invocation {invocation}")
+
+        checkpoints = load_checkpoints(conn, job_id, resolve_sources(event), force=event.get('force', False))
+        finished = True
+        for checkpoint in checkpoints:
+            if checkpoint['status'] in ('merged', 'unchanged', 'failed'):
+                continue
+            if not import_source(conn, checkpoint, chunk_rows, out_of_time, event.get('allow_shrink', False)):
+                finished = False
+                break
+
+        if not finished:
+            conn.close()
+            if invocation >= MAX_INVOCATIONS:
+                raise RuntimeError(f"Import job {job_id} did not finish within {MAX_INVOCATIONS} invocations")
+            reinvoke(context, dict(event, job_id=job_id, invocation=invocation + 1))
+            print(f"⏳ Time budget reached, continuing job {job_id} in invocation {invocation + 1}")
+            return {
+                'statusCode': 202,
+                'body': json.dumps({
+                    'message': 'Vocabulary import in progress, continuing in a new invocation',
+                    'job_id': job_id,
+                    'invocation': invocation,
+                    'progress': {
+                        c['book_name']: {'status': c['status'], 'rows_staged': c['rows_staged']}
+                        for c in checkpoints
+                    }
+                }, ensure_ascii=False)
+            }
+
+        inserted_by_book = {c['book_name']: c['rows_inserted'] for c in checkpoints}
+        # Only changed books were rewritten (and had updated_at bumped); clients caching the others stay valid
+        changed_books = [c['book_name'] for c in checkpoints if c['status'] == 'merged' and c['rows_inserted']]
+        unchanged_books = [c['book_name'] for c in checkpoints if c['status'] == 'unchanged']
+        # Sources whose merge was refused; their books were left as they were
+        failed_books = [c['book_name'] for c in checkpoints if c['status'] == 'failed']
+        total_inserted = sum(inserted_by_book.values())
 
-        total_inserted = n4_inserted + n3_inserted + minnichi_inserted
-        conn.commit()
-        
         # Get stats
-        cursor.execute("SELECT COUNT(*) FROM vocabulary_books")
-        book_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM vocabulary_questions")
-        question_count = cursor.fetchone()[0]
-        
+        cursor.execute(IMPORT_STATS_SQL)
+        book_count, question_count = cursor.fetchone()
+
         conn.close()
-        
-        print(f"✅ Data import completed: {total_inserted} questions inserted ({n4_inserted} N4, {n3_inserted} N3, {minnichi_inserted} みん日)")
-        
+
+        print(f"✅ Data import completed: {total_inserted} questions inserted {inserted_by_book}")
+
         return {
             'statusCode': 200,
             'body': json.dumps({
-                'message': 'Vocabulary data imported successfully using bulk operations',
+                'message': 'Vocabulary data imported successfully using staging tables' if not failed_books
+                           else 'Vocabulary import finished; some sources were refused and left unchanged',
+                'job_id': job_id,
+                'invocations': invocation,
                 'books': book_count,
                 'questions': question_count,
                 'inserted': total_inserted,
-                'n4_inserted': n4_inserted,
-                'n3_inserted': n3_inserted,
-                'minnichi_inserted': minnichi_inserted,
-                'optimization': 'Used execute_values bulk insert with 1000-row chunks'
-            })
+                'inserted_by_book': inserted_by_book,
+                'changed_books': changed_books,
+                'unchanged_books': unchanged_books,
+                'failed_books': failed_books,
+                'n4_inserted': inserted_by_book.get('N4語彙', 0),
+                'n3_inserted': inserted_by_book.get('N3語彙', 0),
+                'minnichi_inserted': inserted_by_book.get('みん日', 0),
+                'optimization': 'Checkpointed COPY into UNLOGGED staging table, SQL normalization, single-statement merge'
+            }, ensure_ascii=False)
         }
-        
+
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         return {
             'statusCode': 500,
             'body': json.dumps({
-                'error': str(e)
+                'error': str(e),
+                'job_id': job_id
             })
-        }
\ No newline at end of file
+        }
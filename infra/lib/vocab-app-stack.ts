@@ -10,6 +10,8 @@ import * as s3 from 'aws-cdk-lib/aws-s3';
 import * as cloudfront from 'aws-cdk-lib/aws-cloudfront';
 import * as origins from 'aws-cdk-lib/aws-cloudfront-origins';
 import * as s3deploy from 'aws-cdk-lib/aws-s3-deployment';
+import * as events from 'aws-cdk-lib/aws-events';
+import * as targets from 'aws-cdk-lib/aws-events-targets';
 import { Construct } from 'constructs';
 
 export interface VocabAppStackProps extends cdk.StackProps {
@@ -130,8 +132,10 @@ export class VocabAppStack extends cdk.Stack {
       maxIdleConnectionsPercent: 10,
     });
 
-    // DynamoDB Table for Quiz Rooms
-    const quizRoomsTable = new dynamodb.Table(this, `VocabApp-QuizRooms-${environment}`, {
+    // Previous single-item-per-room table. Nothing reads or writes it any more: right after deploying,
+    // copy_legacy_rooms.py copies its live rooms (same codes) into the partitioned table below. It is
+    // kept until the rooms it still holds have expired (their TTL) and can then be removed.
+    const legacyQuizRoomsTable = new dynamodb.Table(this, `VocabApp-QuizRooms-${environment}`, {
       tableName: `VocabApp-QuizRooms-${environment}`,
       partitionKey: {
         name: 'roomCode',
@@ -145,7 +149,40 @@ export class VocabAppStack extends cdk.Stack {
       stream: dynamodb.StreamViewType.NEW_AND_OLD_IMAGES,
     });
 
-    // GSI for querying by createdBy (teacher)
+    legacyQuizRoomsTable.addGlobalSecondaryIndex({
+      indexName: 'CreatedByIndex',
+      partitionKey: {
+        name: 'createdBy',
+        type: dynamodb.AttributeType.STRING,
+      },
+      sortKey: {
+        name: 'createdAt',
+        type: dynamodb.AttributeType.STRING,
+      },
+    });
+
+    // DynamoDB Table for Quiz Rooms: one partition per room, items told apart by the sort key
+    // (sk = "META" for config/roster/expiry, "Q#0000"... for question chunks), so that only
+    // get_room reads the questions and rooms are not capped by the 400 KB item limit
+    const quizRoomsTable = new dynamodb.Table(this, `VocabApp-QuizRoomItems-${environment}`, {
+      tableName: `VocabApp-QuizRoomItems-${environment}`,
+      partitionKey: {
+        name: 'roomCode',
+        type: dynamodb.AttributeType.STRING,
+      },
+      sortKey: {
+        name: 'sk',
+        type: dynamodb.AttributeType.STRING,
+      },
+      billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+      timeToLiveAttribute: 'ttl',
+      removalPolicy: environment === 'prod' ? cdk.RemovalPolicy.RETAIN : cdk.RemovalPolicy.DESTROY,
+      pointInTimeRecovery: environment === 'prod',
+      encryption: dynamodb.TableEncryption.AWS_MANAGED,
+      stream: dynamodb.StreamViewType.NEW_AND_OLD_IMAGES,
+    });
+
+    // GSI for querying by createdBy (teacher); only metadata items carry createdBy
     quizRoomsTable.addGlobalSecondaryIndex({
       indexName: 'CreatedByIndex',
       partitionKey: {
@@ -251,6 +288,41 @@ export class VocabAppStack extends cdk.Stack {
       timeout: cdk.Duration.minutes(5),
     });
 
+    // Archive tier: inactive books are packed into one compressed row, restored on first access
+    const archiveLambda = new lambda.Function(this, `VocabApp-Archive-${environment}`, {
+      ...lambdaConfig,
+      handler: 'book_archive.lambda_handler',
+      code: lambda.Code.fromAsset('lambda/api'),
+      description: 'Archive inactive vocabulary books and restore requested ones',
+      timeout: cdk.Duration.minutes(5),
+    });
+
+    new events.Rule(this, `VocabApp-Archive-Schedule-${environment}`, {
+      schedule: events.Schedule.cron({ minute: '0', hour: '19' }),
+      description: 'Archive vocabulary books not accessed for a year',
+      targets: [
+        new targets.LambdaFunction(archiveLambda, {
+          event: events.RuleTargetInput.fromObject({ action: 'archive', max_seconds: 240 }),
+          retryAttempts: 0,
+        }),
+      ],
+    });
+
+    // Picks up restore requests whose asynchronous invocation from get_vocab failed
+    new events.Rule(this, `VocabApp-Restore-Schedule-${environment}`, {
+      schedule: events.Schedule.rate(cdk.Duration.minutes(10)),
+      description: 'Restore archived vocabulary books that were accessed again',
+      targets: [
+        new targets.LambdaFunction(archiveLambda, {
+          event: events.RuleTargetInput.fromObject({ action: 'restore', max_seconds: 240 }),
+          retryAttempts: 0,
+        }),
+      ],
+    });
+
+    getVocabLambda.addEnvironment('ARCHIVE_FUNCTION_NAME', archiveLambda.functionName);
+    archiveLambda.grantInvoke(getVocabLambda);
+
     // Data import Lambda (for dev environment)
     if (environment === 'dev') {
       const importLambda = new lambda.Function(this, `VocabApp-Import-Lambda-${environment}`, {
@@ -264,6 +336,20 @@ export class VocabAppStack extends cdk.Stack {
 
       dbSecret.grantRead(importLambda);
 
+      // Long imports checkpoint their progress and re-invoke themselves before the 15-minute limit.
+      // The ARN is built from the stack name to avoid a dependency cycle between the function and its own role.
+      importLambda.addToRolePolicy(new iam.PolicyStatement({
+        actions: ['lambda:InvokeFunction'],
+        resources: [
+          cdk.Stack.of(this).formatArn({
+            service: 'lambda',
+            resource: 'function',
+            resourceName: `${cdk.Stack.of(this).stackName}-VocabAppImportLambda*`,
+            arnFormat: cdk.ArnFormat.COLON_RESOURCE_NAME,
+          }),
+        ],
+      }));
+
       new cdk.CfnOutput(this, `ImportLambdaName`, {
         value: importLambda.functionName,
         description: `Import Lambda function name for ${environment}`,
@@ -281,6 +367,23 @@ export class VocabAppStack extends cdk.Stack {
 
       dbSecret.grantRead(cleanupLambda);
 
+      // Nightly cleanup in small, time-boxed batches; an unfinished run is resumed by the next invocation
+      new events.Rule(this, `VocabApp-Cleanup-Schedule-${environment}`, {
+        schedule: events.Schedule.cron({ minute: '30', hour: '18' }),
+        description: 'Delete vocabulary books with few questions in bounded batches',
+        targets: [
+          new targets.LambdaFunction(cleanupLambda, {
+            event: events.RuleTargetInput.fromObject({
+              secret_arn: dbSecret.secretArn,
+              min_questions: 5,
+              max_rows: 50000,
+              max_seconds: 240,
+            }),
+            retryAttempts: 0,
+          }),
+        ],
+      });
+
       new cdk.CfnOutput(this, `CleanupLambdaName`, {
         value: cleanupLambda.functionName,
         description: `Cleanup Lambda function name for ${environment}`,
@@ -333,14 +436,38 @@ export class VocabAppStack extends cdk.Stack {
       description: 'Get quiz room statistics',
     });
 
+    const listRoomsLambda = new lambda.Function(this, `VocabApp-ListRooms-${environment}`, {
+      ...roomCodeLambdaConfig,
+      handler: 'list_rooms.lambda_handler',
+      code: lambda.Code.fromAsset('lambda/rooms'),
+      description: 'List quiz rooms created by a teacher',
+    });
+
+    const getRoomsStatsLambda = new lambda.Function(this, `VocabApp-GetRoomsStats-${environment}`, {
+      ...roomCodeLambdaConfig,
+      handler: 'get_rooms_stats.lambda_handler',
+      code: lambda.Code.fromAsset('lambda/rooms'),
+      description: 'Get statistics of many quiz rooms at once',
+    });
+
+    const submitAnswersLambda = new lambda.Function(this, `VocabApp-SubmitAnswers-${environment}`, {
+      ...roomCodeLambdaConfig,
+      handler: 'submit_answers.lambda_handler',
+      code: lambda.Code.fromAsset('lambda/rooms'),
+      description: 'Grade and record quiz room answers',
+    });
+
     // Grant DynamoDB permissions to room Lambda functions
-    const roomLambdas = [createRoomLambda, getRoomLambda, joinRoomLambda, deleteRoomLambda, getRoomStatsLambda];
+    const roomLambdas = [
+      createRoomLambda, getRoomLambda, joinRoomLambda, deleteRoomLambda, getRoomStatsLambda, listRoomsLambda,
+      getRoomsStatsLambda, submitAnswersLambda,
+    ];
     roomLambdas.forEach(fn => {
       quizRoomsTable.grantReadWriteData(fn);
     });
 
     // Grant Lambda functions access to the database secret
-    [getVocabLambda, createVocabLambda, updateVocabLambda, migrateLambda].forEach(fn => {
+    [getVocabLambda, createVocabLambda, updateVocabLambda, migrateLambda, archiveLambda].forEach(fn => {
       dbSecret.grantRead(fn);
     });
 
@@ -364,6 +491,11 @@ export class VocabAppStack extends cdk.Stack {
       description: `Migrate Lambda function name for ${environment}`,
     });
 
+    new cdk.CfnOutput(this, `ArchiveLambdaName`, {
+      value: archiveLambda.functionName,
+      description: `Archive Lambda function name for ${environment}`,
+    });
+
     // API Gateway REST API
     const api = new apigateway.RestApi(this, `VocabApp-API-${environment}`, {
       restApiName: `VocabApp API (${environment})`,
@@ -416,6 +548,18 @@ export class VocabAppStack extends cdk.Stack {
       proxy: true,
     });
 
+    const listRoomsIntegration = new apigateway.LambdaIntegration(listRoomsLambda, {
+      proxy: true,
+    });
+
+    const getRoomsStatsIntegration = new apigateway.LambdaIntegration(getRoomsStatsLambda, {
+      proxy: true,
+    });
+
+    const submitAnswersIntegration = new apigateway.LambdaIntegration(submitAnswersLambda, {
+      proxy: true,
+    });
+
     // API Routes
     const vocabResource = api.root.addResource('vocab');
     
@@ -453,6 +597,18 @@ export class VocabAppStack extends cdk.Stack {
     const roomStatsResource = roomCodeResource.addResource('stats');
     roomStatsResource.addMethod('GET', getRoomStatsIntegration);
 
+    // POST /room/{roomCode}/answers - Submit and grade a student's answers
+    const roomAnswersResource = roomCodeResource.addResource('answers');
+    roomAnswersResource.addMethod('POST', submitAnswersIntegration);
+
+    // GET /rooms?createdBy= - List a teacher's rooms (CreatedByIndex)
+    const roomsResource = api.root.addResource('rooms');
+    roomsResource.addMethod('GET', listRoomsIntegration);
+
+    // POST /rooms/stats - Stats of many rooms in one request (BatchGetItem)
+    const roomsStatsResource = roomsResource.addResource('stats');
+    roomsStatsResource.addMethod('POST', getRoomsStatsIntegration);
+
     // API Gateway outputs
     new cdk.CfnOutput(this, `APIGatewayURL`, {
       value: api.url,
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Size and speed benchmark for the question chunk encodings in room_utils
+For rooms of 20, 50 and 100 questions, encodes every chunk both as plain DynamoDB maps ('map') and as
+compressed JSON ('zlib'), and reports the stored item size, the write/read capacity those sizes are
+billed at and the encode/decode time per room. Sizes follow DynamoDB's item size rules, so no table
+is needed; with AWS_ENDPOINT_URL_DYNAMODB set, --measure also writes and reads the chunks in a
+throwaway table and reports the ConsumedCapacity DynamoDB returned.
+
+Usage:
+    python perf/room_codec_benchmark.py --questions 20 50 100
+    AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000 python perf/room_codec_benchmark.py --measure
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from decimal import Decimal
+
+from room_join_stress import prepare_environment, create_table
+
+ENCODINGS = ['map', 'zlib']
+REPEATS = 50
+
+WORDS_JP = ['家', '水', '本', '学校', '先生', '友達', '電車', '天気', '料理', '仕事', '病院', '映画']
+WORDS_NP = ['घर', 'पानी', 'किताब', 'विद्यालय', 'शिक्षक', 'साथी', 'रेल', 'मौसम', 'खाना', 'काम', 'अस्पताल', 'चलचित्र']
+
+
+def sample_questions(count, seed=0):
+    """Questions shaped like the ones the teacher view generates, with varied text"""
+    rng = random.Random(seed)
+    questions = []
+    for i in range(count):
+        answer = rng.randrange(len(WORDS_NP))
+        options = rng.sample([j for j in range(len(WORDS_NP)) if j != answer], 3) + [answer]
+        rng.shuffle(options)
+        questions.append({
+            'id': f'q{i}-{rng.randrange(10 ** 6)}',
+            'type': rng.choice(['jp_to_np', 'np_to_jp', 'fill_blank']),
+            'questionText': f"私の{WORDS_JP[answer]}は（　　）です。{rng.choice(WORDS_JP)}と{rng.choice(WORDS_JP)}。",
+            'correctAnswer': WORDS_NP[answer],
+            'options': [WORDS_NP[j] for j in options],
+            'lesson': rng.randint(1, 50)
+        })
+    return questions
+
+
+def attribute_size(value):
+    """Bytes DynamoDB counts for one serialized attribute value"""
+    (kind, inner), = value.items()
+    if kind == 'S':
+        return len(inner.encode('utf-8'))
+    if kind == 'N':
+        digits = len(inner.lstrip('-').replace('.', '').strip('0')) or 1
+        return math.ceil(digits / 2) + 1 + (1 if inner.startswith('-') else 0)
+    if kind == 'B':
+        return len(inner)
+    if kind in ('BOOL', 'NULL'):
+        return 1
+    if kind == 'L':
+        return 3 + sum(1 + attribute_size(v) for v in inner)
+    if kind == 'M':
+        return 3 + sum(len(k.encode('utf-8')) + 1 + attribute_size(v) for k, v in inner.items())
+    raise ValueError(f"Unsupported attribute type {kind}")
+
+
+def item_size(serialized):
+    return sum(len(name.encode('utf-8')) + attribute_size(value) for name, value in serialized.items())
+
+
+def timed(function, repeats=REPEATS):
+    """Median milliseconds per call"""
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def chunk_items(questions):
+    import room_utils
+
+    ttl = int(time.time()) + 3600
+    return [
+        {
+            **room_utils.room_key('BENCH01', room_utils.question_chunk_sk(page)),
+            **room_utils.encode_question_chunk(questions[start:start + room_utils.QUESTIONS_PER_CHUNK]),
+            'ttl': ttl
+        }
+        for page, start in enumerate(range(0, len(questions), room_utils.QUESTIONS_PER_CHUNK))
+    ]
+
+
+def bench_encoding(encoding, questions):
+    """Sizes and timings of one room's chunks in one encoding, as written and read by the Lambdas"""
+    import room_utils
+    from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
+
+    room_utils.QUESTION_ENCODING = encoding
+    serializer = TypeSerializer()
+    deserializer = TypeDeserializer()
+
+    items = chunk_items(questions)
+    serialized = [{k: serializer.serialize(v) for k, v in item.items()} for item in items]
+    sizes = [item_size(item) for item in serialized]
+
+    # Encode = Python questions to the wire format; decode = wire format back to questions
+    def encode():
+        for item in chunk_items(questions):
+            {k: serializer.serialize(v) for k, v in item.items()}
+
+    def decode():
+        for item in serialized:
+            room_utils.decode_question_chunk({k: deserializer.deserialize(v) for k, v in item.items()})
+
+    decoded = []
+    for item in serialized:
+        decoded.extend(room_utils.decode_question_chunk({k: deserializer.deserialize(v) for k, v in item.items()}))
+    assert json.loads(json.dumps(decoded, default=int)) == questions, f"{encoding} did not round-trip"
+
+    return {
+        'item_bytes': sum(sizes),
+        'largest_chunk_bytes': max(sizes),
+        # Capacity is billed per item: writes in 1 KB units, strongly consistent reads in 4 KB units
+        'wcu': sum(math.ceil(size / 1024) for size in sizes),
+        'rcu': sum(math.ceil(size / 4096) for size in sizes),
+        'encode_ms': round(timed(encode), 3),
+        'decode_ms': round(timed(decode), 3)
+    }
+
+
+def measure_capacity(encoding, questions):
+    """ConsumedCapacity reported by DynamoDB for writing and reading the room's chunks"""
+    import room_utils
+
+    room_utils.QUESTION_ENCODING = encoding
+    write_units = 0.0
+    for item in chunk_items(questions):
+        response = room_utils.table.put_item(Item=item, ReturnConsumedCapacity='TOTAL')
+        write_units += float(response['ConsumedCapacity']['CapacityUnits'])
+    read_units = 0.0
+    for page in range(math.ceil(len(questions) / room_utils.QUESTIONS_PER_CHUNK)):
+        response = room_utils.table.get_item(
+            Key=room_utils.room_key('BENCH01', room_utils.question_chunk_sk(page)),
+            ConsistentRead=True,
+            ReturnConsumedCapacity='TOTAL'
+        )
+        read_units += float(response['ConsumedCapacity']['CapacityUnits'])
+    return {'measured_wcu': write_units, 'measured_rcu': read_units}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare question chunk encodings')
+    parser.add_argument('--questions', type=int, nargs='+', default=[20, 50, 100])
+    parser.add_argument('--measure', action='store_true',
+                        help='also write/read the chunks in a local DynamoDB and report ConsumedCapacity')
+    parser.add_argument('--json', help='also write results to this file')
+    args = parser.parse_args()
+
+    if args.measure and not os.environ.get('AWS_ENDPOINT_URL_DYNAMODB'):
+        print("❌ Set AWS_ENDPOINT_URL_DYNAMODB to a local DynamoDB stand-in (never run this against AWS)")
+        sys.exit(1)
+
+    table_name = f"room-codec-bench-{uuid.uuid4().hex[:8]}"
+    prepare_environment(table_name)
+
+    if args.measure:
+        import boto3
+        client = boto3.client('dynamodb')
+        create_table(client, table_name)
+
+    results = {}
+    try:
+        for question_count in args.questions:
+            questions = sample_questions(question_count)
+            results[question_count] = {}
+            for encoding in ENCODINGS:
+                result = bench_encoding(encoding, questions)
+                if args.measure:
+                    result.update(measure_capacity(encoding, questions))
+                results[question_count][encoding] = result
+    finally:
+        if args.measure:
+            client.delete_table(TableName=table_name)
+
+    print(f"\n{'questions':<11}{'encoding':<10}{'bytes':>9}{'largest':>9}{'WCU':>6}{'RCU':>6}"
+          f"{'encode ms':>11}{'decode ms':>11}")
+    print('-' * 73)
+    for question_count, encodings in results.items():
+        for encoding, r in encodings.items():
+            print(f"{question_count:<11}{encoding:<10}{r['item_bytes']:>9}{r['largest_chunk_bytes']:>9}"
+                  f"{r['wcu']:>6}{r['rcu']:>6}{r['encode_ms']:>11}{r['decode_ms']:>11}")
+            if 'measured_wcu' in r:
+                print(f"{'':<21}measured: {r['measured_wcu']} WCU, {r['measured_rcu']} RCU")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, default=lambda o: float(o) if isinstance(o, Decimal) else str(o))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for joining quiz rooms
+Creates a throwaway rooms table in a local DynamoDB stand-in (DynamoDB Local, LocalStack or a
+moto server), then has many students join the same room at once through join_room.lambda_handler.
+Every join must end up in the roster (one STUDENT# item per student) exactly once, and the room's
+studentsCount must match it. --legacy runs the old read-modify-write join on a roster list for
+comparison, which loses joins under the same load.
+
+Usage:
+    docker run -p 8000:8000 amazon/dynamodb-local
+    AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000 python perf/room_join_stress.py --students 40 --rounds 20
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+
+ROOMS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'rooms')
+
+
+def prepare_environment(table_name):
+    """room_utils reads the table name and creates its client at import time"""
+    os.environ['QUIZ_ROOMS_TABLE'] = table_name
+    # DynamoDB Local accepts any credentials, but boto3 still needs some
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'ap-northeast-1')
+    sys.path.insert(0, ROOMS_DIR)
+
+
+def create_table(client, table_name):
+    client.create_table(
+        TableName=table_name,
+        KeySchema=[
+            {'AttributeName': 'roomCode', 'KeyType': 'HASH'},
+            {'AttributeName': 'sk', 'KeyType': 'RANGE'}
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'roomCode', 'AttributeType': 'S'},
+            {'AttributeName': 'sk', 'AttributeType': 'S'}
+        ],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    client.get_waiter('table_exists').wait(TableName=table_name)
+
+
+def create_room(table, room_code, questions):
+    """A room as create_room stores it: metadata item plus question chunks in the same partition"""
+    from room_utils import room_key, question_chunk_sk, encode_question_chunk, QUESTIONS_PER_CHUNK
+
+    ttl = int(time.time()) + 3600
+    table.put_item(Item={
+        **room_key(room_code),
+        'config': {'bookId': 1, 'questionCount': questions},
+        'createdBy': 'stress-test',
+        'studentsCount': 0,
+        'ttl': ttl
+    })
+    # A realistic payload, so reads that touch the questions cost what they do in production
+    question_items = [
+        {
+            'id': f'q{i}',
+            'type': 'jp_to_np',
+            'questionText': '私の（　　）は大きいです。' * 3,
+            'correctAnswer': 'घर',
+            'options': ['घर', 'पानी', 'किताब', 'विद्यालय']
+        }
+        for i in range(questions)
+    ]
+    for page, start in enumerate(range(0, questions, QUESTIONS_PER_CHUNK)):
+        table.put_item(Item={
+            **room_key(room_code, question_chunk_sk(page)),
+            **encode_question_chunk(question_items[start:start + QUESTIONS_PER_CHUNK]),
+            'ttl': ttl
+        })
+
+
+def legacy_join(table, room_code, student_name):
+    """The previous join: read the whole room, append in Python, write the list back"""
+    from room_utils import room_key
+
+    room_item = table.get_item(Key=room_key(room_code))['Item']
+    students_joined = room_item.get('studentsJoined', [])
+    if student_name not in students_joined:
+        students_joined.append(student_name)
+        table.update_item(
+            Key=room_key(room_code),
+            UpdateExpression='SET studentsJoined = :students',
+            ExpressionAttributeValues={':students': students_joined}
+        )
+
+
+def read_roster(table, room_code, legacy):
+    """(names in the roster, studentsCount on the metadata item)"""
+    from room_utils import room_key, get_room_roster
+
+    room_item = table.get_item(Key=room_key(room_code), ConsistentRead=True)['Item']
+    if legacy:
+        roster = room_item.get('studentsJoined', [])
+        return roster, len(roster)
+    roster = get_room_roster(room_code, consistent_read=True)
+    return [student['studentName'] for student in roster], int(room_item['studentsCount'])
+
+
+def run_round(table, join_room, room_code, students, legacy):
+    """All students join at the same moment; returns (statuses, roster, counter, seconds)"""
+
+    barrier = threading.Barrier(len(students))
+    statuses = []
+    lock = threading.Lock()
+
+    def join(name):
+        barrier.wait()
+        if legacy:
+            try:
+                legacy_join(table, room_code, name)
+                status = 200
+            except Exception:
+                status = 500
+        else:
+            response = join_room.lambda_handler({
+                'pathParameters': {'roomCode': room_code},
+                'body': json.dumps({'studentName': name})
+            }, None)
+            status = response['statusCode']
+        with lock:
+            statuses.append(status)
+
+    threads = [threading.Thread(target=join, args=(name,)) for name in students]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    roster, counter = read_roster(table, room_code, legacy)
+    return statuses, roster, counter, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Join one room from many threads at once')
+    parser.add_argument('--students', type=int, default=40)
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--questions', type=int, default=50, help='questions stored in the room item')
+    parser.add_argument('--legacy', action='store_true', help='use the old read-modify-write join')
+    args = parser.parse_args()
+
+    if not os.environ.get('AWS_ENDPOINT_URL_DYNAMODB'):
+        print("❌ Set AWS_ENDPOINT_URL_DYNAMODB to a local DynamoDB stand-in (never run this against AWS)")
+        sys.exit(1)
+
+    table_name = f"room-join-stress-{uuid.uuid4().hex[:8]}"
+    prepare_environment(table_name)
+
+    import boto3
+    client = boto3.client('dynamodb')
+    create_table(client, table_name)
+
+    import join_room
+    from room_utils import table
+
+    failed_rounds = set()
+    try:
+        for round_number in range(args.rounds):
+            room_code = f"S{round_number:05d}"
+            create_room(table, room_code, args.questions)
+            students = [f"student-{i:03d}" for i in range(args.students)]
+
+            statuses, roster, counter, elapsed = run_round(table, join_room, room_code, students, args.legacy)
+
+            lost = sorted(set(students) - set(roster))
+            duplicated = len(roster) - len(set(roster))
+            errors = sum(1 for status in statuses if status != 200)
+            ok = not lost and not duplicated and not errors and counter == len(roster)
+            if not ok:
+                failed_rounds.add(round_number)
+            print(f"{'✅' if ok else '❌'} round {round_number + 1}: {len(roster)}/{len(students)} in roster, "
+                  f"{len(lost)} lost, {duplicated} duplicated, {errors} errors, studentsCount {counter}, "
+                  f"{elapsed * 1000:.0f} ms")
+
+            # Joining again must not add a second entry
+            if not args.legacy:
+                join_room.lambda_handler({
+                    'pathParameters': {'roomCode': room_code},
+                    'body': json.dumps({'studentName': students[0]})
+                }, None)
+                roster, counter = read_roster(table, room_code, args.legacy)
+                if roster.count(students[0]) != 1 or counter != len(students):
+                    failed_rounds.add(round_number)
+                    print(f"❌ round {round_number + 1}: rejoin duplicated {students[0]}")
+    finally:
+        client.delete_table(TableName=table_name)
+
+    print(f"\n{args.rounds - len(failed_rounds)}/{args.rounds} rounds kept every join")
+    sys.exit(1 if failed_rounds else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Capacity benchmark for the room handlers' reads and deletes
+Builds rooms in two throwaway tables in a local DynamoDB stand-in: the previous layout (one item
+per room, questions inline) and the current one (META item + question chunks). It then runs the
+stats and delete access patterns of both, recording ConsumedCapacity and response bytes for each.
+
+DynamoDB bills a read by the size of the whole item, whatever the ProjectionExpression. Projections
+shrink the response; the smaller META item is what lowers the RCUs.
+
+Usage:
+    AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000 python perf/room_rcu_benchmark.py --questions 20 50 100
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+
+from room_join_stress import prepare_environment
+
+ROOMS_PER_SIZE = 20
+
+
+def sample_questions(count):
+    return [
+        {
+            'id': f'q{i}',
+            'type': 'jp_to_np',
+            'questionText': '私の（　　）は大きいです。' * 3,
+            'correctAnswer': 'घर',
+            'options': ['घर', 'पानी', 'किताब', 'विद्यालय']
+        }
+        for i in range(count)
+    ]
+
+
+def create_tables(client, legacy_name, current_name):
+    client.create_table(
+        TableName=legacy_name,
+        KeySchema=[{'AttributeName': 'roomCode', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'roomCode', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    client.create_table(
+        TableName=current_name,
+        KeySchema=[
+            {'AttributeName': 'roomCode', 'KeyType': 'HASH'},
+            {'AttributeName': 'sk', 'KeyType': 'RANGE'}
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'roomCode', 'AttributeType': 'S'},
+            {'AttributeName': 'sk', 'AttributeType': 'S'}
+        ],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    for name in (legacy_name, current_name):
+        client.get_waiter('table_exists').wait(TableName=name)
+
+
+STUDENTS = [f'student-{i:03d}' for i in range(30)]
+
+
+def room_metadata(ttl):
+    return {
+        'config': {'bookId': 1, 'questionCount': 0, 'lessonRange': {'start': 1, 'end': 5}},
+        'createdAt': '2026-01-01T00:00:00Z',
+        'expiresAt': '2026-01-02T00:00:00Z',
+        'createdBy': 'teacher-1',
+        'ttl': ttl
+    }
+
+
+def put_rooms(legacy_table, current_table, room_codes, questions):
+    from room_utils import room_key, question_chunk_sk, student_sk, encode_question_chunk, QUESTIONS_PER_CHUNK
+
+    ttl = int(time.time()) + 3600
+    for room_code in room_codes:
+        legacy_table.put_item(Item={
+            'roomCode': room_code, 'questions': questions, 'studentsJoined': STUDENTS, **room_metadata(ttl)
+        })
+        current_table.put_item(Item={**room_key(room_code), 'studentsCount': len(STUDENTS), **room_metadata(ttl)})
+        for name in STUDENTS:
+            current_table.put_item(Item={
+                **room_key(room_code, student_sk(name)),
+                'studentName': name,
+                'joinedAt': '2026-01-01T00:00:00Z',
+                'ttl': ttl
+            })
+        for page, start in enumerate(range(0, len(questions), QUESTIONS_PER_CHUNK)):
+            current_table.put_item(Item={
+                **room_key(room_code, question_chunk_sk(page)),
+                **encode_question_chunk(questions[start:start + QUESTIONS_PER_CHUNK]),
+                'ttl': ttl
+            })
+
+
+def capacity(response):
+    return float(response.get('ConsumedCapacity', {}).get('CapacityUnits', 0))
+
+
+def measure(operations):
+    """Run each operation (one or more requests); returns mean capacity units and response bytes"""
+    units = []
+    sizes = []
+    for operation in operations:
+        responses = operation()
+        if isinstance(responses, dict):
+            responses = [responses]
+        units.append(sum(capacity(response) for response in responses))
+        sizes.append(sum(
+            len(json.dumps(response.get('Item', response.get('Items', {})), default=str))
+            for response in responses
+        ))
+    return {'capacity_units': round(statistics.mean(units), 2), 'response_bytes': round(statistics.mean(sizes))}
+
+
+def projected(attributes):
+    return {
+        'ProjectionExpression': ', '.join(f'#a{i}' for i in range(len(attributes))),
+        'ExpressionAttributeNames': {f'#a{i}': name for i, name in enumerate(attributes)}
+    }
+
+
+def bench_size(legacy_table, current_table, question_count):
+    from boto3.dynamodb.conditions import Key
+    from room_utils import room_key, STUDENT_PREFIX
+    from get_room_stats import STATS_ATTRIBUTES
+
+    prefix = f"B{question_count:03d}"
+    room_codes = [f"{prefix}{i:03d}" for i in range(ROOMS_PER_SIZE)]
+    put_rooms(legacy_table, current_table, room_codes, sample_questions(question_count))
+    total = {'ReturnConsumedCapacity': 'TOTAL'}
+
+    results = {
+        'stats.before': measure([
+            lambda code=code: legacy_table.get_item(Key={'roomCode': code}, **total) for code in room_codes
+        ]),
+        # Metadata item plus one roster query (30 students fit in one page)
+        'stats.after': measure([
+            lambda code=code: [
+                current_table.get_item(Key=room_key(code), **projected(STATS_ATTRIBUTES), **total),
+                current_table.query(
+                    KeyConditionExpression=Key('roomCode').eq(code) & Key('sk').begins_with(STUDENT_PREFIX),
+                    ProjectionExpression='studentName, joinedAt',
+                    **total
+                )
+            ]
+            for code in room_codes
+        ]),
+    }
+
+    # Delete: read + unconditional delete before, one conditional delete after
+    before_units = []
+    for code in room_codes[:ROOMS_PER_SIZE // 2]:
+        read = legacy_table.get_item(Key={'roomCode': code}, **total)
+        deleted = legacy_table.delete_item(Key={'roomCode': code}, **total)
+        before_units.append(capacity(read) + capacity(deleted))
+    after_units = []
+    for code in room_codes[:ROOMS_PER_SIZE // 2]:
+        deleted = current_table.delete_item(
+            Key=room_key(code),
+            ConditionExpression='attribute_exists(roomCode) AND createdBy = :c',
+            ExpressionAttributeValues={':c': 'teacher-1'},
+            **total
+        )
+        after_units.append(capacity(deleted))
+    results['delete.before'] = {'capacity_units': round(statistics.mean(before_units), 2)}
+    results['delete.after'] = {'capacity_units': round(statistics.mean(after_units), 2)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare consumed capacity of room reads and deletes')
+    parser.add_argument('--questions', type=int, nargs='+', default=[20, 50, 100])
+    parser.add_argument('--json', help='also write results to this file')
+    args = parser.parse_args()
+
+    if not os.environ.get('AWS_ENDPOINT_URL_DYNAMODB'):
+        print("❌ Set AWS_ENDPOINT_URL_DYNAMODB to a local DynamoDB stand-in (never run this against AWS)")
+        sys.exit(1)
+
+    suffix = uuid.uuid4().hex[:8]
+    legacy_name = f"room-rcu-legacy-{suffix}"
+    current_name = f"room-rcu-current-{suffix}"
+    prepare_environment(current_name)
+
+    import boto3
+    client = boto3.client('dynamodb')
+    create_tables(client, legacy_name, current_name)
+    dynamodb = boto3.resource('dynamodb')
+
+    results = {}
+    try:
+        for question_count in args.questions:
+            results[question_count] = bench_size(
+                dynamodb.Table(legacy_name), dynamodb.Table(current_name), question_count
+            )
+    finally:
+        client.delete_table(TableName=legacy_name)
+        client.delete_table(TableName=current_name)
+
+    print(f"\n{'questions':<11}{'operation':<16}{'capacity units':>16}{'response bytes':>16}")
+    print('-' * 59)
+    for question_count, operations in results.items():
+        for name, result in operations.items():
+            print(f"{question_count:<11}{name:<16}{result['capacity_units']:>16}{result.get('response_bytes', ''):>16}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()